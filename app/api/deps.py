@@ -1,4 +1,4 @@
-from app.core.firebase_db import db
+from app.core import firebase_db
 
 def get_db():
-    return db
+    return firebase_db.get_client()
@@ -1,11 +1,11 @@
 from fastapi import APIRouter, Depends, HTTPException
 from sqlalchemy.orm import Session
-from typing import Any
+from typing import Any, List
 
 from app.core import database
 from app.api import deps
 from app.services import transaction_service
-from app.schemas.all_schemas import AccountResponse
+from app.schemas.all_schemas import AccountResponse, AccountBalanceResponse
 from app.models.all_models import User, CreditAnalysis
 
 router = APIRouter()
@@ -30,3 +30,17 @@ def get_my_account(
         account.score = 0
         
     return account
+
+@router.get("/me/balances", response_model=List[AccountBalanceResponse])
+def get_my_balances(
+    db: Session = Depends(database.get_db),
+    current_user: User = Depends(deps.get_current_user)
+) -> Any:
+    """
+    Balances of the current user's account in every currency it holds.
+    """
+    account = transaction_service.get_account_by_user_id(db, user_id=current_user.id)
+    if not account:
+        raise HTTPException(status_code=404, detail="Account not found")
+
+    return transaction_service.get_balances(db, account)
@@ -5,7 +5,6 @@ from typing import Any
 from app.core import security, config
 from app.api import deps
 from app.schemas.all_schemas import UserCreate, UserResponse, Token
-from firebase_admin import firestore
 
 router = APIRouter()
 
@@ -6,8 +6,10 @@ import random
 
 from app.core import database
 from app.api import deps
-from app.services import transaction_service
-from app.schemas.all_schemas import CreditCardResponse
+from app.services import transaction_service, card_service, audit_service
+from app.schemas.all_schemas import (
+    CreditCardResponse, CardAuthorizationCreate, CardAuthorizationResponse, CardCaptureCreate, CardLimitResponse
+)
 from app.models.all_models import User, CreditCard, CreditAnalysis, Transaction
 
 router = APIRouter()
@@ -93,6 +95,10 @@ def toggle_block_card(
         account.credit_card.status = "active"
     else:
         account.credit_card.status = "blocked"
+    audit_service.record_event(
+        db, account, "card_blocked" if account.credit_card.status == "blocked" else "card_unblocked",
+        card_id=account.credit_card.id
+    )
         
     db.commit()
     db.refresh(account.credit_card)
@@ -108,3 +114,56 @@ def get_cvv(
         raise HTTPException(status_code=404, detail="Cartão não encontrado.")
         
     return {"cvv": account.credit_card.cvv_hash}
+
+def _get_my_card(db: Session, current_user: User) -> CreditCard:
+    account = transaction_service.get_account_by_user_id(db, user_id=current_user.id)
+    if not account or not account.credit_card:
+        raise HTTPException(status_code=404, detail="Cartão não encontrado.")
+    return account.credit_card
+
+@router.get("/limit", response_model=CardLimitResponse)
+def get_card_limit(
+    db: Session = Depends(database.get_db),
+    current_user: User = Depends(deps.get_current_user)
+) -> Any:
+    return card_service.get_limit(db, _get_my_card(db, current_user))
+
+@router.post("/authorize", response_model=CardAuthorizationResponse)
+def authorize_purchase(
+    authorization_in: CardAuthorizationCreate,
+    db: Session = Depends(database.get_db),
+    current_user: User = Depends(deps.get_current_user)
+) -> Any:
+    """
+    Authorize a purchase: checks card status and available limit and places a hold.
+    """
+    return card_service.authorize(
+        db,
+        card=_get_my_card(db, current_user),
+        amount=authorization_in.amount,
+        merchant=authorization_in.merchant,
+        category=authorization_in.category
+    )
+
+@router.post("/authorizations/{authorization_id}/capture", response_model=CardAuthorizationResponse)
+def capture_authorization(
+    authorization_id: int,
+    capture_in: CardCaptureCreate,
+    db: Session = Depends(database.get_db),
+    current_user: User = Depends(deps.get_current_user)
+) -> Any:
+    """
+    Capture a hold (fully or partially) and post it to the card ledger.
+    """
+    return card_service.capture(db, card=_get_my_card(db, current_user), authorization_id=authorization_id, amount=capture_in.amount)
+
+@router.post("/authorizations/{authorization_id}/reverse", response_model=CardAuthorizationResponse)
+def reverse_authorization(
+    authorization_id: int,
+    db: Session = Depends(database.get_db),
+    current_user: User = Depends(deps.get_current_user)
+) -> Any:
+    """
+    Release a pending hold or refund a captured purchase.
+    """
+    return card_service.reverse(db, card=_get_my_card(db, current_user), authorization_id=authorization_id)
@@ -4,7 +4,7 @@ from typing import Any
 
 from app.core import database
 from app.api import deps
-from app.services import transaction_service, ai_service
+from app.services import transaction_service, ai_service, audit_service
 from app.schemas.all_schemas import CreditAnalysisCreate, CreditAnalysisResponse
 from app.models.all_models import User, CreditAnalysis
 
@@ -43,6 +43,10 @@ def apply_for_credit(
     
     # If approved, update account limit
     if analysis_result["status"] == "approved":
+        audit_service.record_event(
+            db, account, "limit_changed",
+            old=account.credit_limit, new=analysis_result["approved_limit"], source="credit_apply"
+        )
         account.credit_limit = analysis_result["approved_limit"]
     
     db.add(credit_analysis)
@@ -4,6 +4,7 @@ from typing import Any, List
 
 from app.core import database
 from app.api import deps
+from app.core.responses import rows_response
 from app.services import transaction_service, loan_service
 from app.schemas.all_schemas import LoanCreate, LoanResponse
 from app.models.all_models import User
@@ -31,4 +32,4 @@ def list_loans(
     if not account:
         raise HTTPException(status_code=404, detail="Account not found")
         
-    return loan_service.get_loans(db, account_id=account.id)
+    return rows_response(LoanResponse, loan_service.get_loans(db, account_id=account.id))
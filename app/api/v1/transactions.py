@@ -4,8 +4,12 @@ from typing import Any, List
 
 from app.core import database
 from app.api import deps
-from app.services import transaction_service
-from app.schemas.all_schemas import TransactionCreate, TransactionResponse, TransferCreate
+from app.core.responses import rows_response
+from app.services import transaction_service, scheduled_transfer_service
+from app.schemas.all_schemas import (
+    TransactionCreate, TransactionResponse, TransferCreate, TransferResponse,
+    ScheduledTransferCreate, ScheduledTransferResponse, ScheduledTransferRunResponse
+)
 from app.models.all_models import User, TransactionType
 
 router = APIRouter()
@@ -56,14 +60,15 @@ def withdraw(
         category=transaction_in.category
     )
 
-@router.post("/transfer", response_model=TransactionResponse)
+@router.post("/transfer", response_model=TransferResponse)
 def transfer(
     transfer_in: TransferCreate,
     db: Session = Depends(database.get_db),
     current_user: User = Depends(deps.get_current_user)
 ) -> Any:
     """
-    Transfer money to another account.
+    Transfer money to another account, converting between currencies when
+    currency and destination_currency differ (also between one's own balances).
     """
     account = transaction_service.get_account_by_user_id(db, user_id=current_user.id)
     if not account:
@@ -74,7 +79,9 @@ def transfer(
         from_account_id=account.id, 
         to_account_number=transfer_in.destination_account, 
         amount=transfer_in.amount,
-        category=transfer_in.category
+        category=transfer_in.category,
+        currency=transfer_in.currency,
+        destination_currency=transfer_in.destination_currency
     )
 
 @router.get("/statement", response_model=List[TransactionResponse])
@@ -89,4 +96,65 @@ def get_statement(
     if not account:
         raise HTTPException(status_code=404, detail="Account not found")
         
-    return transaction_service.get_statement(db, account_id=account.id)
+    return rows_response(TransactionResponse, transaction_service.get_statement(db, account_id=account.id))
+
+@router.post("/scheduled", response_model=ScheduledTransferResponse)
+def create_scheduled_transfer(
+    scheduled_in: ScheduledTransferCreate,
+    db: Session = Depends(database.get_db),
+    current_user: User = Depends(deps.get_current_user)
+) -> Any:
+    """
+    Schedule a future transfer, once or monthly (standing order).
+    """
+    account = transaction_service.get_account_by_user_id(db, user_id=current_user.id)
+    if not account:
+        raise HTTPException(status_code=404, detail="Account not found")
+
+    return scheduled_transfer_service.create(
+        db,
+        account_id=account.id,
+        destination_account=scheduled_in.destination_account,
+        amount=scheduled_in.amount,
+        run_at=scheduled_in.run_at,
+        frequency=scheduled_in.frequency,
+        end_date=scheduled_in.end_date,
+        category=scheduled_in.category,
+        currency=scheduled_in.currency,
+        destination_currency=scheduled_in.destination_currency
+    )
+
+@router.get("/scheduled", response_model=List[ScheduledTransferResponse])
+def list_scheduled_transfers(
+    db: Session = Depends(database.get_db),
+    current_user: User = Depends(deps.get_current_user)
+) -> Any:
+    account = transaction_service.get_account_by_user_id(db, user_id=current_user.id)
+    if not account:
+        raise HTTPException(status_code=404, detail="Account not found")
+
+    return rows_response(ScheduledTransferResponse, scheduled_transfer_service.list_for_account(db, account.id))
+
+@router.get("/scheduled/{scheduled_id}/runs", response_model=List[ScheduledTransferRunResponse])
+def list_scheduled_transfer_runs(
+    scheduled_id: int,
+    db: Session = Depends(database.get_db),
+    current_user: User = Depends(deps.get_current_user)
+) -> Any:
+    account = transaction_service.get_account_by_user_id(db, user_id=current_user.id)
+    if not account:
+        raise HTTPException(status_code=404, detail="Account not found")
+
+    return rows_response(ScheduledTransferRunResponse, scheduled_transfer_service.get_runs(db, account.id, scheduled_id))
+
+@router.delete("/scheduled/{scheduled_id}", response_model=ScheduledTransferResponse)
+def cancel_scheduled_transfer(
+    scheduled_id: int,
+    db: Session = Depends(database.get_db),
+    current_user: User = Depends(deps.get_current_user)
+) -> Any:
+    account = transaction_service.get_account_by_user_id(db, user_id=current_user.id)
+    if not account:
+        raise HTTPException(status_code=404, detail="Account not found")
+
+    return scheduled_transfer_service.cancel(db, account.id, scheduled_id)
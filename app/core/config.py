@@ -1,3 +1,4 @@
+from typing import Dict, List
 from pydantic_settings import BaseSettings
 
 class Settings(BaseSettings):
@@ -15,6 +16,105 @@ class Settings(BaseSettings):
     ALGORITHM: str = "HS256"
     ACCESS_TOKEN_EXPIRE_MINUTES: int = 30
 
+    # Production server (gunicorn.conf.py)
+    HOST: str = "0.0.0.0"
+    PORT: int = 8080
+    # 0 = one worker per usable CPU core. More than one needs shared rate limits
+    # (Redis) and FRAUD_ENABLED off; gunicorn refuses to start otherwise
+    WEB_CONCURRENCY: int = 0
+    WEB_KEEPALIVE: int = 5
+    WEB_BACKLOG: int = 2048
+    WEB_TIMEOUT: int = 60
+    WEB_GRACEFUL_TIMEOUT: int = 30
+    # Recycle workers after N requests (+ random jitter so they don't restart together)
+    WEB_MAX_REQUESTS: int = 10000
+    WEB_MAX_REQUESTS_JITTER: int = 1000
+    # Import the app once in the master and fork workers from it
+    WEB_PRELOAD: bool = True
+
+    # Initialize Firebase/Gemini/bcrypt at startup instead of on first use
+    WARMUP_ON_STARTUP: bool = False
+
+    # Frontend files up to this size are kept in memory (larger ones are streamed)
+    SPA_MAX_MEMORY_FILE_BYTES: int = 1024 * 1024
+
+    # Rate limiting / admission control, keyed by "METHOD path"
+    RATE_LIMIT_ENABLED: bool = True
+    # Token buckets as "requests/seconds", per user (JWT) or client IP
+    RATE_LIMITS: Dict[str, str] = {
+        "POST /api/v1/auth/login": "10/60",
+        "POST /api/v1/auth/register": "5/60",
+        "POST /api/v1/credit/apply": "3/300",
+        "POST /api/v1/transactions/transfer": "30/60",
+    }
+    # Max in-flight requests per process for expensive routes (Gemini, bcrypt, row locks)
+    CONCURRENCY_LIMITS: Dict[str, int] = {
+        "POST /api/v1/auth/login": 8,
+        "POST /api/v1/credit/apply": 4,
+        "POST /api/v1/transactions/transfer": 32,
+    }
+    # "" = in-memory (single process), "redis://..." = shared, "fake://" = local Redis stand-in
+    # Use Redis with more than one worker, otherwise each worker has its own budget
+    RATE_LIMIT_STORE_URL: str = ""
+    # Only enable behind a proxy that sets X-Forwarded-For
+    RATE_LIMIT_TRUST_FORWARDED: bool = False
+
+    # Velocity (fraud) rules on withdraw/transfer, evaluated in memory per account;
+    # the windows are per process, so this allows only one web worker
+    FRAUD_ENABLED: bool = True
+    FRAUD_WINDOW_SECONDS: int = 3600
+    FRAUD_BUCKET_SECONDS: int = 60
+    FRAUD_MAX_AMOUNT_PER_WINDOW: float = 50000.0
+    FRAUD_MAX_COUNT_PER_WINDOW: int = 30
+    FRAUD_MAX_NEW_DESTINATIONS_PER_WINDOW: int = 5
+    # Block a debit larger than N x the average of the window (after some history)
+    FRAUD_SPIKE_MULTIPLIER: float = 10.0
+    FRAUD_SPIKE_MIN_AMOUNT: float = 1000.0
+    FRAUD_SPIKE_MIN_HISTORY: int = 5
+
+    # Credit card billing cycle close (app/jobs/close_billing_cycles.py)
+    BILLING_DUE_DAYS: int = 10
+    BILLING_MONTHLY_INTEREST_RATE: float = 0.12
+    BILLING_MIN_PAYMENT_RATE: float = 0.15
+    BILLING_MIN_PAYMENT_FLOOR: float = 50.0
+    BILLING_CHUNK_SIZE: int = 5000
+    BILLING_WORKERS: int = 4
+
+    # Nightly portfolio re-scoring (app/jobs/rescore_portfolio.py)
+    SCORING_LOOKBACK_DAYS: int = 180
+    SCORING_CHUNK_SIZE: int = 2000
+    # Scoring processes; 0 = one per CPU core, 1 = score inline
+    SCORING_WORKERS: int = 0
+
+    # Scheduled / recurring transfers (app/jobs/run_scheduled_transfers.py)
+    SCHEDULED_BATCH_SIZE: int = 1000
+    # Accounts executed in parallel; orders of one account always run in sequence
+    SCHEDULED_WORKERS: int = 8
+    # A claimed order is picked up again if its runner dies before this
+    SCHEDULED_LEASE_SECONDS: int = 300
+    # Insufficient funds: retry after each delay in turn, then give up on the occurrence
+    SCHEDULED_RETRY_DELAYS: List[int] = [3600, 4 * 3600, 12 * 3600]
+    # Occurrences not executed within this window are skipped (e.g. after an outage)
+    SCHEDULED_MAX_DELAY_SECONDS: int = 2 * 86400
+
+    # Audit log replay / ledger verifier (app/jobs/replay_audit_log.py, app/jobs/verify_ledger.py)
+    AUDIT_STREAM_BATCH: int = 5000
+    # Verifier processes; 0 = one per CPU core
+    AUDIT_VERIFY_WORKERS: int = 0
+
+    # FX rate table (app/core/fx.py); "" = BRL only
+    FX_RATES_FILE: str = ""
+    # How often each worker checks the file for a new version
+    FX_REFRESH_SECONDS: float = 30.0
+    # Refuse conversions when the table's as_of is older than this (0 = no limit)
+    FX_MAX_AGE_SECONDS: int = 0
+
+    # Observability
+    METRICS_ENABLED: bool = True
+    # Single-request profiling via header; keep off in production unless needed
+    PROFILING_ENABLED: bool = False
+    PROFILING_HEADER: str = "X-Profile"
+
     class Config:
         case_sensitive = True
         # env_file = ".env" # Optional, Vercel injects env vars directly
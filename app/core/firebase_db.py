@@ -1,36 +1,61 @@
-import firebase_admin
-from firebase_admin import credentials, firestore
 import os
 import json
+import logging
 from app.core.config import settings
+from app.core.lazy import Lazy
+from app.core.metrics import InstrumentedFirestore
+
+logger = logging.getLogger(__name__)
 
 # Initialize Firebase Admin
 # We expect FIREBASE_CREDENTIALS env var to be a JSON string or path
 # For simplicity in Vercel, passing the raw JSON in an env var is common
+#
+# firebase_admin and the Firestore client (gRPC) are only imported and created
+# on first use, so requests that never touch Firestore don't pay for them.
+
+def _load_credentials():
+    from firebase_admin import credentials
+
+    if os.environ.get("FIREBASE_CREDENTIALS"):
+        try:
+            # Try to parse as JSON string
+            cred_info = json.loads(os.environ.get("FIREBASE_CREDENTIALS"))
+            return credentials.Certificate(cred_info)
+        except:
+            # Fallback to path
+            return credentials.Certificate(os.environ.get("FIREBASE_CREDENTIALS"))
 
-cred = None
-if os.environ.get("FIREBASE_CREDENTIALS"):
-    try:
-        # Try to parse as JSON string
-        cred_info = json.loads(os.environ.get("FIREBASE_CREDENTIALS"))
-        cred = credentials.Certificate(cred_info)
-    except:
-        # Fallback to path
-        cred = credentials.Certificate(os.environ.get("FIREBASE_CREDENTIALS"))
-else:
     # Development fallback or separate file
     # Ensure you have 'firebase-key.json' locally for dev
     if os.path.exists("firebase-key.json"):
-        cred = credentials.Certificate("firebase-key.json")
+        return credentials.Certificate("firebase-key.json")
+    return None
+
+def _create_client():
+    cred = _load_credentials()
+    if not cred:
+        logger.warning("Firebase credentials not found. DB will not work.")
+        return None
+
+    import firebase_admin
+    from firebase_admin import firestore
 
-if cred:
     try:
         firebase_admin.initialize_app(cred)
-        db = firestore.client()
-        print("Firebase initialized successfully.")
+        logger.info("Firebase initialized successfully.")
     except ValueError:
         # Already initialized
-        db = firestore.client()
-else:
-    print("Warning: Firebase credentials not found. DB will not work.")
-    db = None
+        pass
+    return InstrumentedFirestore(firestore.client())
+
+_client = Lazy(_create_client)
+
+def get_client():
+    return _client.get()
+
+def __getattr__(name):
+    # Backwards compatible `from app.core.firebase_db import db`
+    if name == "db":
+        return get_client()
+    raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
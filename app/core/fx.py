@@ -0,0 +1,207 @@
+"""
+FX rate table kept as an immutable in-memory snapshot.
+
+Rates are read from a JSON file (FX_RATES_FILE) written by whatever feed we
+subscribe to; the feed should write a temp file and rename it over the old
+one so readers never see a partial file:
+
+    {
+        "base": "BRL",
+        "as_of": "2026-10-19T12:00:00Z",
+        "rates": {"USD": "5.3712", "EUR": "5.8120", "JPY": "0.03561"},
+        "precision": {"JPY": 0}
+    }
+
+`rates` are units of the base currency per unit of each currency, as strings
+so they keep full Decimal precision. `precision` overrides the number of
+minor units for a currency (ISO 4217 defaults below).
+
+Every cross rate and rounding quantum is computed when the snapshot is built,
+so a conversion is a dict lookup, a multiplication and a quantize. Refreshing
+builds a new snapshot and swaps the module reference, so a request that
+grabbed a snapshot converts every leg with the same rates.
+"""
+import json
+import logging
+import os
+import threading
+import time
+from dataclasses import dataclass, field
+from datetime import datetime, timezone
+from decimal import ROUND_HALF_EVEN, Decimal, InvalidOperation
+from types import MappingProxyType
+from typing import Dict, Mapping, Optional, Tuple
+
+from app.core.config import settings
+
+logger = logging.getLogger(__name__)
+
+# Account.balance and the Transaction ledger are in this currency
+BASE_CURRENCY = "BRL"
+
+# ISO 4217 minor units that differ from 2
+MINOR_UNITS = {"JPY": 0, "KRW": 0, "CLP": 0, "PYG": 0, "VND": 0, "BHD": 3, "KWD": 3, "JOD": 3, "OMR": 3, "TND": 3}
+DEFAULT_MINOR_UNITS = 2
+
+
+class FxError(ValueError):
+    pass
+
+
+@dataclass(frozen=True)
+class FxSnapshot:
+    base: str
+    as_of: datetime
+    rates: Mapping[str, Decimal]
+    version: int = 0
+    _cross: Mapping[Tuple[str, str], Decimal] = field(default_factory=dict, repr=False)
+    _quanta: Mapping[str, Decimal] = field(default_factory=dict, repr=False)
+
+    @classmethod
+    def build(cls, base: str, as_of: datetime, rates: Dict[str, Decimal],
+              precision: Optional[Dict[str, int]] = None, version: int = 0) -> "FxSnapshot":
+        rates = {currency.upper(): Decimal(rate) for currency, rate in rates.items()}
+        rates[base] = Decimal("1")
+        for currency, rate in rates.items():
+            if len(currency) != 3 or not rate.is_finite() or rate <= 0:
+                raise FxError(f"Invalid rate for {currency!r}: {rate}")
+
+        minor_units = {**MINOR_UNITS, **(precision or {})}
+        quanta = {
+            currency: Decimal(1).scaleb(-minor_units.get(currency, DEFAULT_MINOR_UNITS))
+            for currency in rates
+        }
+        cross = {
+            (source, target): rates[source] / rates[target]
+            for source in rates for target in rates if source != target
+        }
+        return cls(
+            base=base,
+            as_of=as_of,
+            rates=MappingProxyType(rates),
+            version=version,
+            _cross=MappingProxyType(cross),
+            _quanta=MappingProxyType(quanta),
+        )
+
+    def supports(self, currency: str) -> bool:
+        return currency in self._quanta
+
+    def quantum(self, currency: str) -> Decimal:
+        try:
+            return self._quanta[currency]
+        except KeyError:
+            raise FxError(f"Unsupported currency: {currency}") from None
+
+    def round(self, amount: Decimal, currency: str) -> Decimal:
+        return amount.quantize(self.quantum(currency), rounding=ROUND_HALF_EVEN)
+
+    def rate(self, source: str, target: str) -> Decimal:
+        if source == target:
+            return Decimal("1")
+        try:
+            return self._cross[(source, target)]
+        except KeyError:
+            raise FxError(f"No rate for {source}->{target}") from None
+
+    def convert(self, amount: Decimal, source: str, target: str) -> Decimal:
+        """Convert and round to the target currency's minor units (banker's rounding)."""
+        if source == target:
+            return self.round(amount, target)
+        try:
+            rate = self._cross[(source, target)]
+            quantum = self._quanta[target]
+        except KeyError:
+            raise FxError(f"No rate for {source}->{target}") from None
+        return (amount * rate).quantize(quantum, rounding=ROUND_HALF_EVEN)
+
+    def age_seconds(self, now: Optional[datetime] = None) -> float:
+        return ((now or datetime.now(timezone.utc)) - self.as_of).total_seconds()
+
+
+def parse(document: dict, version: int = 0) -> FxSnapshot:
+    try:
+        as_of = datetime.fromisoformat(document["as_of"].replace("Z", "+00:00"))
+        rates = {currency: Decimal(str(rate)) for currency, rate in document["rates"].items()}
+    except (KeyError, TypeError, AttributeError, ValueError, InvalidOperation) as e:
+        raise FxError(f"Malformed FX rates document: {e}") from e
+    if as_of.tzinfo is None:
+        as_of = as_of.replace(tzinfo=timezone.utc)
+    return FxSnapshot.build(
+        base=document.get("base", BASE_CURRENCY).upper(),
+        as_of=as_of,
+        rates=rates,
+        precision={currency.upper(): int(units) for currency, units in document.get("precision", {}).items()},
+        version=version,
+    )
+
+
+def _base_only() -> FxSnapshot:
+    # No rate table configured: only the base currency is available
+    return FxSnapshot.build(BASE_CURRENCY, datetime.now(timezone.utc), {})
+
+
+_snapshot: Optional[FxSnapshot] = None
+_loaded_mtime: Optional[float] = None
+_lock = threading.Lock()
+
+
+def current() -> FxSnapshot:
+    snapshot = _snapshot
+    if snapshot is None:
+        snapshot = refresh()
+    return snapshot
+
+
+def install(snapshot: FxSnapshot) -> FxSnapshot:
+    global _snapshot
+    if snapshot.base != BASE_CURRENCY:
+        raise FxError(f"Rate table base is {snapshot.base}, expected {BASE_CURRENCY}")
+    _snapshot = snapshot
+    return snapshot
+
+
+def refresh(path: Optional[str] = None, force: bool = False) -> FxSnapshot:
+    """
+    (Re)load the rate file if it changed since the last load. On error the
+    previous snapshot stays in place.
+    """
+    global _loaded_mtime
+    path = path if path is not None else settings.FX_RATES_FILE
+    with _lock:
+        if not path:
+            return _snapshot or install(_base_only())
+        try:
+            mtime = os.stat(path).st_mtime
+            if _snapshot is not None and not force and mtime == _loaded_mtime:
+                return _snapshot
+            with open(path, encoding="utf-8") as f:
+                snapshot = parse(json.load(f), version=(_snapshot.version + 1) if _snapshot else 1)
+            install(snapshot)
+            _loaded_mtime = mtime
+            logger.info("Loaded FX rates v%d as of %s (%d currencies)", snapshot.version, snapshot.as_of, len(snapshot.rates))
+            return snapshot
+        except (OSError, ValueError) as e:
+            if _snapshot is None:
+                raise FxError(f"Could not load FX rates from {path}: {e}") from e
+            logger.warning("Keeping FX rates v%d; reload of %s failed: %s", _snapshot.version, path, e)
+            return _snapshot
+
+
+def start_refresher(interval: Optional[float] = None) -> Optional[threading.Thread]:
+    """Poll the rate file in a daemon thread (one per worker process)."""
+    interval = interval or settings.FX_REFRESH_SECONDS
+    if not settings.FX_RATES_FILE or interval <= 0:
+        return None
+
+    def run():
+        while True:
+            time.sleep(interval)
+            try:
+                refresh()
+            except FxError:
+                logger.exception("FX refresh failed")
+
+    thread = threading.Thread(target=run, name="fx-refresher", daemon=True)
+    thread.start()
+    return thread
@@ -0,0 +1,51 @@
+import os
+import threading
+from typing import Callable, Generic, Optional, TypeVar
+
+T = TypeVar("T")
+
+
+class Lazy(Generic[T]):
+    """
+    Thread-safe holder that builds a value on first use.
+    Used for clients that are expensive to create (Firebase, Gemini, bcrypt)
+    so cold starts only pay for what the request actually needs.
+
+    Values are dropped in forked children (gunicorn --preload) unless the
+    value is known to be fork-safe: gRPC/HTTP clients must be created per
+    worker, plain in-memory objects can be shared.
+    """
+
+    def __init__(self, factory: Callable[[], T], fork_safe: bool = False):
+        self._factory = factory
+        self._lock = threading.Lock()
+        self._value: Optional[T] = None
+        self._initialized = False
+        if hasattr(os, "register_at_fork"):
+            os.register_at_fork(after_in_child=self._after_fork if not fork_safe else self._new_lock)
+
+    @property
+    def initialized(self) -> bool:
+        return self._initialized
+
+    def get(self) -> T:
+        if not self._initialized:
+            with self._lock:
+                if not self._initialized:
+                    self._value = self._factory()
+                    self._initialized = True
+        return self._value
+
+    def _new_lock(self):
+        # The parent's lock may have been held by another thread at fork time
+        self._lock = threading.Lock()
+
+    def _after_fork(self):
+        self._new_lock()
+        self._value = None
+        self._initialized = False
+
+    def reset(self):
+        with self._lock:
+            self._value = None
+            self._initialized = False
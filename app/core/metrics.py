@@ -0,0 +1,306 @@
+import bisect
+import logging
+import threading
+import time
+from contextlib import contextmanager
+from contextvars import ContextVar
+from dataclasses import dataclass
+from typing import Dict, Iterator, Optional, Tuple
+
+logger = logging.getLogger(__name__)
+
+# Prometheus-style bucket bounds (seconds)
+LATENCY_BUCKETS = (0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0)
+
+Labels = Tuple[Tuple[str, str], ...]
+
+
+class Histogram:
+    __slots__ = ("buckets", "counts", "sum", "count")
+
+    def __init__(self, buckets=LATENCY_BUCKETS):
+        self.buckets = buckets
+        self.counts = [0] * (len(buckets) + 1)  # last slot is +Inf
+        self.sum = 0.0
+        self.count = 0
+
+    def observe(self, value: float):
+        self.counts[bisect.bisect_left(self.buckets, value)] += 1
+        self.sum += value
+        self.count += 1
+
+
+class MetricsRegistry:
+    """
+    Minimal thread-safe registry rendered in the Prometheus text format.
+    Kept dependency-free so it also works in the serverless build.
+    """
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._histograms: Dict[str, Dict[Labels, Histogram]] = {}
+        self._counters: Dict[str, Dict[Labels, float]] = {}
+        self._help: Dict[str, str] = {}
+
+    def describe(self, name: str, help_text: str):
+        self._help[name] = help_text
+
+    def observe(self, name: str, value: float, buckets=LATENCY_BUCKETS, **labels: str):
+        key = tuple(sorted(labels.items()))
+        with self._lock:
+            series = self._histograms.setdefault(name, {})
+            histogram = series.get(key)
+            if histogram is None:
+                histogram = series[key] = Histogram(buckets)
+            histogram.observe(value)
+
+    def inc(self, name: str, value: float = 1.0, **labels: str):
+        key = tuple(sorted(labels.items()))
+        with self._lock:
+            series = self._counters.setdefault(name, {})
+            series[key] = series.get(key, 0.0) + value
+
+    def render(self) -> str:
+        lines = []
+        with self._lock:
+            for name, series in sorted(self._counters.items()):
+                lines.append(f"# HELP {name} {self._help.get(name, name)}")
+                lines.append(f"# TYPE {name} counter")
+                for labels, value in series.items():
+                    lines.append(f"{name}{_format_labels(labels)} {value}")
+            for name, series in sorted(self._histograms.items()):
+                lines.append(f"# HELP {name} {self._help.get(name, name)}")
+                lines.append(f"# TYPE {name} histogram")
+                for labels, histogram in series.items():
+                    cumulative = 0
+                    for bound, count in zip(histogram.buckets, histogram.counts):
+                        cumulative += count
+                        lines.append(f"{name}_bucket{_format_labels(labels + (('le', repr(bound)),))} {cumulative}")
+                    lines.append(f"{name}_bucket{_format_labels(labels + (('le', '+Inf'),))} {histogram.count}")
+                    lines.append(f"{name}_sum{_format_labels(labels)} {histogram.sum}")
+                    lines.append(f"{name}_count{_format_labels(labels)} {histogram.count}")
+        return "\n".join(lines) + "\n"
+
+
+def _format_labels(labels: Labels) -> str:
+    if not labels:
+        return ""
+    body = ",".join(f'{key}="{_escape(value)}"' for key, value in labels)
+    return "{" + body + "}"
+
+
+def _escape(value) -> str:
+    return str(value).replace("\\", "\\\\").replace('"', '\\"').replace("\n", "\\n")
+
+
+registry = MetricsRegistry()
+registry.describe("http_request_duration_seconds", "Request latency per route")
+registry.describe("http_request_db_queries", "Database queries issued per request")
+registry.describe("db_query_duration_seconds", "Database query latency per backend")
+registry.describe("db_lock_wait_seconds", "Time spent in SELECT ... FOR UPDATE (lock wait plus query)")
+registry.describe("db_errors_total", "Database errors by kind (deadlock, lock_timeout, ...)")
+registry.describe("external_call_duration_seconds", "Latency of calls to external services")
+
+# Query counts are small integers, not seconds
+QUERY_COUNT_BUCKETS = (0, 1, 2, 3, 5, 8, 13, 21, 34, 55)
+
+
+@dataclass
+class RequestStats:
+    db_queries: int = 0
+    db_time: float = 0.0
+    lock_wait: float = 0.0
+    external_time: float = 0.0
+
+
+# Sync endpoints run in the threadpool with a copy of the request context,
+# so mutating the RequestStats object is visible to the middleware.
+_current_stats: ContextVar[Optional[RequestStats]] = ContextVar("request_stats", default=None)
+
+
+def begin_request():
+    stats = RequestStats()
+    return stats, _current_stats.set(stats)
+
+
+def end_request(token, request, status_code: int, elapsed: float):
+    stats = _current_stats.get()
+    _current_stats.reset(token)
+
+    # Use the route template, not the raw path, to keep label cardinality bounded
+    route = request.scope.get("route")
+    path = getattr(route, "path", None) or "unmatched"
+    registry.observe(
+        "http_request_duration_seconds", elapsed,
+        method=request.method, route=path, status=str(status_code),
+    )
+    if stats is not None:
+        registry.observe("http_request_db_queries", stats.db_queries, buckets=QUERY_COUNT_BUCKETS, route=path)
+    return stats
+
+
+def server_timing(stats: RequestStats, elapsed: float) -> str:
+    return (
+        f"app;dur={elapsed * 1000:.1f}, db;dur={stats.db_time * 1000:.1f};desc=\"{stats.db_queries} queries\", "
+        f"lock;dur={stats.lock_wait * 1000:.1f}, ext;dur={stats.external_time * 1000:.1f}"
+    )
+
+
+def record_db_query(backend: str, elapsed: float, lock: bool = False, count: int = 1):
+    registry.observe("db_query_duration_seconds", elapsed, backend=backend)
+    if lock:
+        registry.observe("db_lock_wait_seconds", elapsed, backend=backend)
+    stats = _current_stats.get()
+    if stats is not None:
+        stats.db_queries += count
+        stats.db_time += elapsed
+        if lock:
+            stats.lock_wait += elapsed
+
+
+@contextmanager
+def external_call(service: str) -> Iterator[None]:
+    start = time.perf_counter()
+    try:
+        yield
+    finally:
+        elapsed = time.perf_counter() - start
+        registry.observe("external_call_duration_seconds", elapsed, service=service)
+        stats = _current_stats.get()
+        if stats is not None:
+            stats.external_time += elapsed
+
+
+# SQLAlchemy
+
+_sqlalchemy_hooks_installed = False
+
+# Postgres SQLSTATEs we want to count separately
+_PG_ERROR_KINDS = {
+    "40P01": "deadlock",
+    "55P03": "lock_timeout",
+    "57014": "statement_timeout",
+    "40001": "serialization_failure",
+}
+
+
+def install_sqlalchemy_hooks():
+    """
+    Listen on the Engine class so every engine (including ones created
+    after this call) reports query count/time and lock waits.
+    """
+    global _sqlalchemy_hooks_installed
+    if _sqlalchemy_hooks_installed:
+        return
+    try:
+        from sqlalchemy import event
+        from sqlalchemy.engine import Engine
+    except ImportError:
+        return
+
+    @event.listens_for(Engine, "before_cursor_execute")
+    def _before_cursor_execute(conn, cursor, statement, parameters, context, executemany):
+        conn.info.setdefault("query_start", []).append(time.perf_counter())
+
+    @event.listens_for(Engine, "after_cursor_execute")
+    def _after_cursor_execute(conn, cursor, statement, parameters, context, executemany):
+        elapsed = time.perf_counter() - conn.info["query_start"].pop()
+        # with_for_update() renders as "FOR UPDATE"; its duration is dominated by the row lock wait
+        record_db_query("sql", elapsed, lock="FOR UPDATE" in statement)
+
+    @event.listens_for(Engine, "handle_error")
+    def _handle_error(context):
+        starts = context.connection.info.get("query_start") if context.connection is not None else None
+        if starts:
+            starts.pop()
+        orig = context.original_exception
+        kind = _PG_ERROR_KINDS.get(getattr(orig, "pgcode", None) or getattr(orig, "sqlstate", None), "other")
+        if kind == "other" and "deadlock" in str(orig).lower():
+            kind = "deadlock"
+        registry.inc("db_errors_total", kind=kind)
+
+    _sqlalchemy_hooks_installed = True
+
+
+# Firestore
+
+# Calls that hit the network; everything else just builds a query/reference
+_FIRESTORE_TIMED_CALLS = {"get", "add", "set", "update", "delete", "create", "count"}
+
+
+class InstrumentedFirestore:
+    """
+    Transparent proxy over a Firestore client/collection/query that times the
+    calls which actually reach the backend.
+    """
+
+    __slots__ = ("_target",)
+
+    def __init__(self, target):
+        self._target = target
+
+    def __getattr__(self, name):
+        attr = getattr(self._target, name)
+        if not callable(attr):
+            return attr
+        if name == "stream":
+            return lambda *args, **kwargs: _timed_stream(attr(*args, **kwargs))
+        if name in _FIRESTORE_TIMED_CALLS:
+            def timed(*args, **kwargs):
+                start = time.perf_counter()
+                try:
+                    return attr(*args, **kwargs)
+                finally:
+                    record_db_query("firestore", time.perf_counter() - start)
+            return timed
+
+        def chained(*args, **kwargs):
+            result = attr(*args, **kwargs)
+            # Keep wrapping references and queries so terminal calls stay instrumented
+            if hasattr(result, "stream") or hasattr(result, "collection"):
+                return InstrumentedFirestore(result)
+            return result
+        return chained
+
+    def __iter__(self):
+        return iter(self._target)
+
+
+def _timed_stream(iterator):
+    # Results are fetched lazily, so time every step and count the query once
+    first = True
+    while True:
+        start = time.perf_counter()
+        try:
+            item = next(iterator)
+        except StopIteration:
+            record_db_query("firestore", time.perf_counter() - start, count=1 if first else 0)
+            return
+        record_db_query("firestore", time.perf_counter() - start, count=1 if first else 0)
+        first = False
+        yield item
+
+
+# Profiling
+
+async def profile_request(request, call_next):
+    """
+    Profile a single request with pyinstrument and return the HTML report
+    instead of the normal response. Sync endpoints execute in the threadpool,
+    so their bodies show up as time awaited by the event loop.
+    """
+    try:
+        from pyinstrument import Profiler
+    except ImportError:
+        logger.warning("Profiling requested but pyinstrument is not installed")
+        return await call_next(request)
+
+    from fastapi.responses import HTMLResponse
+
+    profiler = Profiler(interval=0.0005, async_mode="enabled")
+    profiler.start()
+    try:
+        await call_next(request)
+    finally:
+        profiler.stop()
+    return HTMLResponse(profiler.output_html())
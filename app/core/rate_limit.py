@@ -0,0 +1,240 @@
+import json
+import logging
+import math
+import threading
+import time
+from abc import ABC, abstractmethod
+from collections import OrderedDict
+from dataclasses import dataclass
+from functools import lru_cache
+from typing import Dict, Optional, Tuple
+
+from jose import JWTError, jwt
+
+from app.core.config import settings
+
+logger = logging.getLogger(__name__)
+
+
+@dataclass(frozen=True)
+class RateRule:
+    capacity: float
+    refill_per_second: float
+
+    @classmethod
+    def parse(cls, spec: str) -> "RateRule":
+        """'5/60' -> bursts of 5 requests, refilled at 5 per 60 seconds."""
+        count, _, period = spec.partition("/")
+        capacity = float(count)
+        return cls(capacity=capacity, refill_per_second=capacity / float(period or 1))
+
+
+def _take(tokens: Optional[float], updated: Optional[float], now: float, rule: RateRule, cost: float) -> Tuple[float, float]:
+    """
+    Token bucket step shared by the stores. Returns (tokens_left, wait_seconds);
+    wait_seconds is 0 when the request is admitted.
+    """
+    if tokens is None:
+        tokens = rule.capacity
+    else:
+        tokens = min(rule.capacity, tokens + max(0.0, now - updated) * rule.refill_per_second)
+    if tokens >= cost:
+        return tokens - cost, 0.0
+    return tokens, (cost - tokens) / rule.refill_per_second
+
+
+class CounterStore(ABC):
+    @abstractmethod
+    async def consume(self, key: str, rule: RateRule, cost: float = 1.0) -> float:
+        """Take `cost` tokens from the bucket; return seconds to wait (0 = allowed)."""
+
+
+class InMemoryStore(CounterStore):
+    """
+    Per-process buckets. Only correct with a single worker. Keeps at most
+    max_keys buckets, evicting the least recently used one in O(1) (an
+    evicted key starts again with a full bucket).
+    """
+
+    def __init__(self, max_keys: int = 100_000):
+        self._buckets: "OrderedDict[str, Tuple[float, float]]" = OrderedDict()
+        self._lock = threading.Lock()
+        self._max_keys = max_keys
+
+    async def consume(self, key: str, rule: RateRule, cost: float = 1.0) -> float:
+        now = time.monotonic()
+        with self._lock:
+            tokens, updated = self._buckets.pop(key, (None, None))
+            tokens, wait = _take(tokens, updated, now, rule, cost)
+            self._buckets[key] = (tokens, now)
+            if len(self._buckets) > self._max_keys:
+                self._buckets.popitem(last=False)
+        return wait
+
+
+# Atomic token bucket; uses the server clock so workers agree on time
+TOKEN_BUCKET_LUA = """
+local capacity = tonumber(ARGV[1])
+local rate = tonumber(ARGV[2])
+local cost = tonumber(ARGV[3])
+local t = redis.call('TIME')
+local now = tonumber(t[1]) + tonumber(t[2]) / 1000000
+local state = redis.call('HMGET', KEYS[1], 'tokens', 'ts')
+local tokens = tonumber(state[1])
+local ts = tonumber(state[2])
+if tokens == nil then
+    tokens = capacity
+else
+    tokens = math.min(capacity, tokens + math.max(0, now - ts) * rate)
+end
+local wait = 0
+if tokens >= cost then
+    tokens = tokens - cost
+else
+    wait = (cost - tokens) / rate
+end
+redis.call('HSET', KEYS[1], 'tokens', tokens, 'ts', now)
+redis.call('EXPIRE', KEYS[1], math.ceil(capacity / rate) + 1)
+return tostring(wait)
+"""
+
+
+class RedisStore(CounterStore):
+    """Buckets shared by all workers, in Redis (or anything speaking EVAL)."""
+
+    def __init__(self, client, prefix: str = "ratelimit:"):
+        self.client = client
+        self.prefix = prefix
+
+    async def consume(self, key: str, rule: RateRule, cost: float = 1.0) -> float:
+        wait = await self.client.eval(
+            TOKEN_BUCKET_LUA, 1, self.prefix + key, rule.capacity, rule.refill_per_second, cost,
+        )
+        return float(wait)
+
+
+class FakeRedis:
+    """
+    Local stand-in for the Redis client used by RedisStore (fake:// URL).
+    Only understands the token bucket script; handy for running the shared
+    store code path without a Redis server.
+    """
+
+    def __init__(self):
+        self._hashes: Dict[str, Tuple[Optional[float], Optional[float]]] = {}
+        self._lock = threading.Lock()
+
+    async def eval(self, script: str, numkeys: int, *keys_and_args):
+        if script != TOKEN_BUCKET_LUA:
+            raise ValueError("FakeRedis only supports the token bucket script")
+        key = keys_and_args[0]
+        capacity, rate, cost = (float(value) for value in keys_and_args[numkeys:])
+        with self._lock:
+            tokens, updated = self._hashes.get(key, (None, None))
+            now = time.time()
+            tokens, wait = _take(tokens, updated, now, RateRule(capacity, rate), cost)
+            self._hashes[key] = (tokens, now)
+        return str(wait)
+
+
+def build_store(url: str) -> CounterStore:
+    if not url or url.startswith("memory://"):
+        return InMemoryStore()
+    if url.startswith("fake://"):
+        return RedisStore(FakeRedis())
+    # Optional dependency, only needed for multi-worker deployments
+    import redis.asyncio as redis
+    return RedisStore(redis.from_url(url))
+
+
+@lru_cache(maxsize=4096)
+def _verified_claims(token: str) -> Optional[Tuple[Optional[str], Optional[float]]]:
+    # Signature is verified so a client cannot spend someone else's budget;
+    # cached because the same token is presented on every request
+    try:
+        payload = jwt.decode(token, settings.SECRET_KEY, algorithms=[settings.ALGORITHM])
+    except JWTError:
+        return None
+    return payload.get("sub"), payload.get("exp")
+
+
+def _subject_from_token(token: str) -> Optional[str]:
+    claims = _verified_claims(token)
+    if claims is None:
+        return None
+    subject, expires = claims
+    # A cached token may have expired since it was verified
+    if expires is not None and expires <= time.time():
+        return None
+    return subject
+
+
+def client_identity(scope) -> str:
+    headers = dict(scope.get("headers") or [])
+    authorization = headers.get(b"authorization", b"").decode("latin-1")
+    if authorization[:7].lower() == "bearer ":
+        subject = _subject_from_token(authorization[7:].strip())
+        if subject:
+            return f"user:{subject}"
+
+    if settings.RATE_LIMIT_TRUST_FORWARDED and b"x-forwarded-for" in headers:
+        return "ip:" + headers[b"x-forwarded-for"].decode("latin-1").split(",")[0].strip()
+    client = scope.get("client")
+    return f"ip:{client[0] if client else 'unknown'}"
+
+
+class RateLimitMiddleware:
+    """
+    Admission control before any route work starts:
+    - token bucket per (route, user id from the JWT or client IP) -> 429
+    - cap on in-flight requests per expensive route -> 503
+    Both answers carry Retry-After.
+    """
+
+    def __init__(self, app, store: CounterStore, rules: Dict[str, str], concurrency: Dict[str, int]):
+        self.app = app
+        self.store = store
+        self.rules = {route: RateRule.parse(spec) for route, spec in rules.items()}
+        self.concurrency = dict(concurrency)
+        # Runs on the event loop only, so plain ints are enough
+        self.in_flight: Dict[str, int] = {route: 0 for route in self.concurrency}
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http":
+            return await self.app(scope, receive, send)
+
+        route = f"{scope['method']} {scope['path'].rstrip('/') or '/'}"
+        rule = self.rules.get(route)
+        limit = self.concurrency.get(route)
+        if rule is None and limit is None:
+            return await self.app(scope, receive, send)
+
+        # Take the in-flight slot before awaiting the store, so a request
+        # turned away with 503 doesn't spend the client's token
+        if limit is not None:
+            if self.in_flight[route] >= limit:
+                return await _reject(send, 503, "Service busy. Please try again shortly.", 1)
+            self.in_flight[route] += 1
+        try:
+            if rule is not None:
+                wait = await self.store.consume(f"{route}|{client_identity(scope)}", rule)
+                if wait > 0:
+                    return await _reject(send, 429, "Too many requests. Please try again later.", wait)
+            await self.app(scope, receive, send)
+        finally:
+            if limit is not None:
+                self.in_flight[route] -= 1
+
+
+async def _reject(send, status: int, detail: str, retry_after: float):
+    body = json.dumps({"detail": detail}).encode()
+    await send({
+        "type": "http.response.start",
+        "status": status,
+        "headers": [
+            (b"content-type", b"application/json"),
+            (b"content-length", str(len(body)).encode()),
+            (b"retry-after", str(max(1, math.ceil(retry_after))).encode()),
+        ],
+    })
+    await send({"type": "http.response.body", "body": body})
@@ -1,16 +1,22 @@
 from datetime import datetime, timedelta
 from typing import Any, Union
 from jose import jwt
-from passlib.context import CryptContext
 from app.core.config import settings
+from app.core.lazy import Lazy
 
-pwd_context = CryptContext(schemes=["bcrypt"], deprecated="auto")
+def _create_pwd_context():
+    # passlib loads its bcrypt backend here; defer it until a password is checked
+    from passlib.context import CryptContext
+    return CryptContext(schemes=["bcrypt"], deprecated="auto")
+
+# Pure Python state, safe to build once in a preloading master and share with workers
+pwd_context = Lazy(_create_pwd_context, fork_safe=True)
 
 def verify_password(plain_password: str, hashed_password: str) -> bool:
-    return pwd_context.verify(plain_password, hashed_password)
+    return pwd_context.get().verify(plain_password, hashed_password)
 
 def get_password_hash(password: str) -> str:
-    return pwd_context.hash(password)
+    return pwd_context.get().hash(password)
 
 def create_access_token(subject: Union[str, Any], expires_delta: timedelta = None) -> str:
     if expires_delta:
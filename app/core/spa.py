@@ -0,0 +1,154 @@
+import logging
+import mimetypes
+import os
+from functools import lru_cache
+from typing import Dict, FrozenSet, Optional
+
+from fastapi import Request
+from fastapi.responses import FileResponse, Response
+
+logger = logging.getLogger(__name__)
+
+# Vite emits content-hashed file names under assets/, so they never change
+IMMUTABLE = "public, max-age=31536000, immutable"
+# index.html must always be revalidated so new deploys are picked up
+REVALIDATE = "no-cache"
+# Other top-level files (favicon, robots.txt, ...) are not hashed
+SHORT_LIVED = "public, max-age=3600"
+
+# Preferred order when the client accepts several encodings
+ENCODINGS = (("br", ".br"), ("gzip", ".gz"))
+
+
+class _Variant:
+    __slots__ = ("path", "stat", "etag", "body")
+
+    def __init__(self, path: str, encoding: str, max_memory_bytes: int):
+        self.path = path
+        self.stat = os.stat(path)
+        suffix = "" if encoding == "identity" else f"-{encoding}"
+        self.etag = f'"{self.stat.st_size:x}-{self.stat.st_mtime_ns:x}{suffix}"'
+        self.body: Optional[bytes] = None
+        if self.stat.st_size <= max_memory_bytes:
+            with open(path, "rb") as fh:
+                self.body = fh.read()
+
+
+class _Asset:
+    __slots__ = ("media_type", "cache_control", "variants")
+
+    def __init__(self, media_type: str, cache_control: str, variants: Dict[str, _Variant]):
+        self.media_type = media_type
+        self.cache_control = cache_control
+        self.variants = variants
+
+
+class SPAStaticFiles:
+    """
+    In-memory index of the React build (dist/), built once at startup.
+
+    Serves pre-compressed .br/.gz siblings (see scripts/precompress.mjs)
+    according to Accept-Encoding, answers If-None-Match with 304 and keeps
+    small files - index.html included - in memory, so requests never touch
+    the filesystem except for large files streamed with a cached stat.
+    """
+
+    def __init__(self, dist_dir: str, max_memory_file_bytes: int = 1024 * 1024):
+        self.dist_dir = os.path.abspath(dist_dir)
+        self.max_memory_file_bytes = max_memory_file_bytes
+        self.assets: Dict[str, _Asset] = {}
+        self._build_index()
+        self.index = self.assets.get("index.html")
+        if self.index is None:
+            raise RuntimeError(f"index.html not found in {self.dist_dir}")
+
+    def _build_index(self):
+        compressed_suffixes = tuple(suffix for _, suffix in ENCODINGS)
+        for root, _, files in os.walk(self.dist_dir):
+            names = set(files)
+            for name in files:
+                if name.endswith(compressed_suffixes):
+                    continue
+                full_path = os.path.join(root, name)
+                rel_path = os.path.relpath(full_path, self.dist_dir).replace(os.sep, "/")
+
+                variants = {"identity": _Variant(full_path, "identity", self.max_memory_file_bytes)}
+                for encoding, suffix in ENCODINGS:
+                    if name + suffix in names:
+                        variants[encoding] = _Variant(full_path + suffix, encoding, self.max_memory_file_bytes)
+
+                media_type = mimetypes.guess_type(name)[0] or "application/octet-stream"
+                self.assets[rel_path] = _Asset(media_type, _cache_control(rel_path), variants)
+        logger.info("Indexed %d frontend files from %s", len(self.assets), self.dist_dir)
+
+    def response(self, path: str, request: Request) -> Response:
+        asset = self.assets.get(path)
+        if asset is None:
+            # Missing hashed assets are a real 404 (stale chunk), not a client-side route
+            if path.startswith("assets/"):
+                return Response(status_code=404)
+            asset = self.index
+
+        encoding = _negotiate(asset, request.headers.get("accept-encoding", ""))
+        variant = asset.variants[encoding]
+
+        headers = {"Cache-Control": asset.cache_control, "ETag": variant.etag}
+        if len(asset.variants) > 1:
+            headers["Vary"] = "Accept-Encoding"
+
+        # A 304 has no body, so it carries no Content-Encoding
+        if _etag_matches(request.headers.get("if-none-match"), variant.etag):
+            return Response(status_code=304, headers=headers)
+        if encoding != "identity":
+            headers["Content-Encoding"] = encoding
+        if variant.body is not None:
+            return Response(variant.body, media_type=asset.media_type, headers=headers)
+        return FileResponse(variant.path, media_type=asset.media_type, headers=headers, stat_result=variant.stat)
+
+
+def _cache_control(rel_path: str) -> str:
+    if rel_path == "index.html":
+        return REVALIDATE
+    if rel_path.startswith("assets/"):
+        return IMMUTABLE
+    return SHORT_LIVED
+
+
+def _negotiate(asset: _Asset, accept_encoding: str) -> str:
+    if len(asset.variants) == 1 or not accept_encoding:
+        return "identity"
+    accepted = _parse_accept_encoding(accept_encoding)
+    for encoding, _ in ENCODINGS:
+        if encoding in asset.variants and encoding in accepted:
+            return encoding
+    return "identity"
+
+
+@lru_cache(maxsize=128)
+def _parse_accept_encoding(header: str) -> FrozenSet[str]:
+    # Browsers send a handful of distinct values, so parsing is cached
+    accepted, refused = set(), set()
+    for part in header.split(","):
+        name, _, params = part.strip().partition(";")
+        q = 1.0
+        params = params.strip()
+        if params.startswith("q="):
+            try:
+                q = float(params[2:])
+            except ValueError:
+                q = 0.0
+        (accepted if q > 0 else refused).add(name.strip().lower())
+    if "*" in accepted:
+        # The wildcard covers only encodings not explicitly refused (e.g. "br;q=0, *")
+        accepted.update(encoding for encoding, _ in ENCODINGS if encoding not in refused)
+    return frozenset(accepted)
+
+
+def _etag_matches(if_none_match: Optional[str], etag: str) -> bool:
+    if not if_none_match:
+        return False
+    if if_none_match.strip() == "*":
+        return True
+    # Weak comparison, as required for If-None-Match
+    tags = {tag.strip().removeprefix("W/") for tag in if_none_match.split(",")}
+    return etag in tags
@@ -0,0 +1,35 @@
+import logging
+import time
+
+from app.core import firebase_db, security
+from app.services import ai_service
+
+logger = logging.getLogger(__name__)
+
+def warm_up():
+    """
+    Build the lazily initialized clients ahead of the first request.
+    Useful for long-running workers; serverless deployments should leave
+    WARMUP_ON_STARTUP off so cold starts stay cheap.
+    """
+    start = time.perf_counter()
+    security.pwd_context.get()
+    firebase_db.get_client()
+    if ai_service.API_KEY:
+        ai_service.get_model()
+    logger.info("Warm-up finished in %.1f ms", (time.perf_counter() - start) * 1000)
+
+def preload():
+    """
+    Run in the gunicorn master before forking (WEB_PRELOAD): import heavy
+    modules and build fork-safe state once, so workers share those pages
+    copy-on-write. Network clients are not created here; they are built
+    lazily in each worker.
+    """
+    start = time.perf_counter()
+    security.pwd_context.get()
+    import firebase_admin  # noqa: F401
+    from firebase_admin import firestore  # noqa: F401
+    if ai_service.API_KEY:
+        import google.generativeai  # noqa: F401
+    logger.info("Preload finished in %.1f ms", (time.perf_counter() - start) * 1000)
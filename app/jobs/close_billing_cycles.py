@@ -0,0 +1,38 @@
+"""
+Close credit card billing cycles for a cut-off date.
+
+    python -m app.jobs.close_billing_cycles                 # today, plus any missed days
+    python -m app.jobs.close_billing_cycles --date 2026-10-15 --workers 8
+    python -m app.jobs.close_billing_cycles --date 2026-10-15 --no-catch-up
+
+Safe to re-run: chunks that already committed are skipped. Cut-off dates
+missed since the last run are closed first, oldest first, so each invoice
+carries over the previous one's balance.
+"""
+import argparse
+import logging
+from datetime import date
+
+from app.services import billing_service
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--date", type=date.fromisoformat, default=date.today(), help="cut-off date (YYYY-MM-DD)")
+    parser.add_argument("--workers", type=int, default=None)
+    parser.add_argument("--chunk-size", type=int, default=None)
+    parser.add_argument("--no-catch-up", action="store_true", help="only close --date, even if earlier days were missed")
+    args = parser.parse_args(argv)
+
+    logging.basicConfig(level=logging.INFO, format="%(asctime)s %(levelname)s %(name)s: %(message)s")
+    if args.no_catch_up:
+        results = [billing_service.close_cycle(args.date, workers=args.workers, chunk_size=args.chunk_size)]
+    else:
+        results = billing_service.close_through(args.date, workers=args.workers, chunk_size=args.chunk_size)
+    for result in results:
+        print(f"{result.invoices} invoices for {result.cutoff} "
+              f"({result.chunks_processed}/{result.chunks} chunks) in {result.seconds:.2f}s")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,61 @@
+"""
+Rebuild account state from the audit log in one streaming pass.
+
+    python -m app.jobs.replay_audit_log --output /tmp/replayed.jsonl
+    python -m app.jobs.replay_audit_log --first-account 1000 --last-account 1999
+    python -m app.jobs.replay_audit_log --backfill    # once, when introducing the audit log
+
+Writes one JSON line per account with its balances per currency, the
+latest credit limit and card status seen in the events.
+"""
+import argparse
+import json
+import logging
+import sys
+import time
+
+from app.services import audit_service
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--output", help="JSONL file (default: stdout)")
+    parser.add_argument("--first-account", type=int, default=0)
+    parser.add_argument("--last-account", type=int, default=2 ** 31 - 1)
+    parser.add_argument("--batch", type=int, default=None, help="rows fetched per round trip")
+    parser.add_argument("--backfill", action="store_true", help="create events from the ledger for accounts without any")
+    args = parser.parse_args(argv)
+
+    logging.basicConfig(level=logging.INFO, format="%(asctime)s %(levelname)s %(name)s: %(message)s")
+    from app.core.database import SessionLocal
+
+    db = SessionLocal()
+    out = open(args.output, "w", encoding="utf-8") if args.output else sys.stdout
+    try:
+        if args.backfill:
+            print(f"backfilled {audit_service.backfill_from_ledger(db)} events", file=sys.stderr)
+
+        start = time.perf_counter()
+        accounts = events = 0
+        for state in audit_service.replay(db, args.first_account, args.last_account, args.batch):
+            accounts += 1
+            events += state.events
+            out.write(json.dumps({
+                "account_id": state.account_id,
+                "balances": {currency: str(balance) for currency, balance in state.balances.items()},
+                "credit_limit": state.credit_limit,
+                "card_status": state.card_status,
+                "events": state.events,
+                "last_event_id": state.last_event_id,
+            }) + "\n")
+        elapsed = time.perf_counter() - start
+        print(f"replayed {events} events for {accounts} accounts in {elapsed:.2f}s "
+              f"({events / elapsed if elapsed else 0:,.0f} events/s)", file=sys.stderr)
+    finally:
+        if out is not sys.stdout:
+            out.close()
+        db.close()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,47 @@
+"""
+Re-score the credit portfolio and recalculate account limits.
+
+    python -m app.jobs.rescore_portfolio
+    python -m app.jobs.rescore_portfolio --dry-run --diff-file /tmp/rescore.jsonl
+
+Only accounts whose score, status or limit changed are written, so the job
+can be re-run safely.
+"""
+import argparse
+import json
+import logging
+
+from app.services import scoring_service
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--workers", type=int, default=None, help="scoring processes (1 = inline)")
+    parser.add_argument("--chunk-size", type=int, default=None)
+    parser.add_argument("--dry-run", action="store_true", help="compute and report diffs without writing")
+    parser.add_argument("--diff-file", help="write one JSON line per changed account")
+    args = parser.parse_args(argv)
+
+    logging.basicConfig(level=logging.INFO, format="%(asctime)s %(levelname)s %(name)s: %(message)s")
+    diff_file = open(args.diff_file, "w", encoding="utf-8") if args.diff_file else None
+    try:
+        on_diff = (lambda diff: diff_file.write(json.dumps(diff) + "\n")) if diff_file else None
+        result = scoring_service.rescore_portfolio(
+            workers=args.workers, chunk_size=args.chunk_size, dry_run=args.dry_run, on_diff=on_diff,
+        )
+    finally:
+        if diff_file:
+            diff_file.close()
+
+    print(f"{result.accounts} accounts in {result.seconds:.2f}s ({result.accounts_per_second:,.0f}/s)"
+          f"{' [dry run]' if args.dry_run else ''}")
+    print(f"changed: {result.changed}  limits up: {result.limit_increased}  down: {result.limit_decreased}  "
+          f"status changes: {result.status_changed}  score delta: {result.score_delta_total:+d}  "
+          f"skipped (limit changed meanwhile): {result.conflicts}")
+    for diff in result.largest_changes:
+        print(f"  account {diff['account_id']}: limit {diff['credit_limit'][0]} -> {diff['credit_limit'][1]}, "
+              f"score {diff['score'][0]} -> {diff['score'][1]}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,40 @@
+"""
+Execute due scheduled and recurring transfers.
+
+    python -m app.jobs.run_scheduled_transfers                   # drain what is due and exit
+    python -m app.jobs.run_scheduled_transfers --loop --poll-seconds 30
+    python -m app.jobs.run_scheduled_transfers --workers 16 --batch-size 2000
+
+Several runners can work at the same time: each claims its own batches.
+"""
+import argparse
+import logging
+import time
+
+from app.services import scheduled_transfer_service
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--workers", type=int, default=None)
+    parser.add_argument("--batch-size", type=int, default=None)
+    parser.add_argument("--max-seconds", type=float, default=None, help="stop claiming new batches after this long")
+    parser.add_argument("--loop", action="store_true", help="keep polling for due orders")
+    parser.add_argument("--poll-seconds", type=float, default=30.0)
+    args = parser.parse_args(argv)
+
+    logging.basicConfig(level=logging.INFO, format="%(asctime)s %(levelname)s %(name)s: %(message)s")
+    while True:
+        result = scheduled_transfer_service.run_due(
+            workers=args.workers, batch_size=args.batch_size, max_seconds=args.max_seconds,
+        )
+        if result.claimed or not args.loop:
+            print(f"{result.claimed} orders in {result.seconds:.2f}s ({result.per_second:,.0f}/s), "
+                  f"max lag {result.max_lag_seconds:.1f}s: {result.outcomes}")
+        if not args.loop:
+            break
+        time.sleep(args.poll_seconds)
+
+
+if __name__ == "__main__":
+    main()
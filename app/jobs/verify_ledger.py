@@ -0,0 +1,48 @@
+"""
+Check every account's balances and Transaction.balance_after chain against
+the audit log.
+
+    python -m app.jobs.verify_ledger --report /tmp/mismatches.jsonl
+    python -m app.jobs.verify_ledger --workers 8
+
+Mismatch kinds: balance, balance_after, transaction_chain, event_chain,
+amount, missing_event, missing_transaction, orphan. Exits with status 1
+when any mismatch is found.
+"""
+import argparse
+import json
+import logging
+import sys
+
+from app.services import audit_service
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--workers", type=int, default=None, help="verifier processes")
+    parser.add_argument("--batch", type=int, default=None, help="rows fetched per round trip")
+    parser.add_argument("--report", help="write mismatches as JSONL")
+    parser.add_argument("--max-mismatches", type=int, default=1000, help="details kept per account range")
+    args = parser.parse_args(argv)
+
+    logging.basicConfig(level=logging.INFO, format="%(asctime)s %(levelname)s %(name)s: %(message)s")
+    report = open(args.report, "w", encoding="utf-8") if args.report else None
+    try:
+        result = audit_service.verify(
+            workers=args.workers,
+            batch=args.batch,
+            max_mismatches=args.max_mismatches,
+            on_mismatch=(lambda item: report.write(json.dumps(item) + "\n")) if report else None,
+        )
+    finally:
+        if report:
+            report.close()
+
+    print(f"{result.accounts} accounts, {result.events} events, {result.transactions} transactions "
+          f"in {result.seconds:.2f}s ({result.events_per_second:,.0f} events/s)")
+    print(f"mismatches: {result.mismatch_count} {result.kinds or ''}")
+    return 1 if result.mismatch_count else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -1,5 +1,13 @@
-from fastapi import FastAPI
+import logging
+import time
+
+from fastapi import FastAPI, Request
+from fastapi.responses import PlainTextResponse
 from app.core.config import settings
+from app.core import metrics
+from app.core.responses import ORJSONResponse
+from app.core.rate_limit import RateLimitMiddleware, build_store
+from app.api.v1 import auth
 # from app.models import all_models # Removed for NoSQL
 # from app.core.database import Base, engine # Removed for NoSQL
 
@@ -8,6 +16,71 @@ from app.core.config import settings
 # We will need to go through them. For now let's keep the imports but comment them out if they break 
 # or assume we fix them next.
 
+logger = logging.getLogger(__name__)
+
+app = FastAPI(title=settings.PROJECT_NAME, default_response_class=ORJSONResponse)
+
+if settings.METRICS_ENABLED:
+    metrics.install_sqlalchemy_hooks()
+
+if settings.WARMUP_ON_STARTUP:
+    @app.on_event("startup")
+    async def warm_up_clients():
+        from starlette.concurrency import run_in_threadpool
+        from app.core import warmup
+        await run_in_threadpool(warmup.warm_up)
+
+if settings.FRAUD_ENABLED:
+    @app.on_event("startup")
+    async def rebuild_velocity_state():
+        from starlette.concurrency import run_in_threadpool
+        from app.services import fraud_service
+        try:
+            await run_in_threadpool(fraud_service.rebuild_from_ledger)
+        except Exception:
+            # Rules still work, they just start from an empty window
+            logger.exception("Could not rebuild velocity state from the ledger")
+
+if settings.FX_RATES_FILE:
+    @app.on_event("startup")
+    async def load_fx_rates():
+        from app.core import fx
+        try:
+            fx.refresh()
+        except fx.FxError:
+            # Conversions answer 503 until a valid file shows up
+            logger.exception("Could not load FX rates")
+        fx.start_refresher()
+
+if settings.RATE_LIMIT_ENABLED:
+    # Registered before the metrics middleware, which wraps it,
+    # so rejections are still measured
+    app.add_middleware(
+        RateLimitMiddleware,
+        store=build_store(settings.RATE_LIMIT_STORE_URL),
+        rules=settings.RATE_LIMITS,
+        concurrency=settings.CONCURRENCY_LIMITS,
+    )
+
+@app.middleware("http")
+async def instrument_requests(request: Request, call_next):
+    if not settings.METRICS_ENABLED:
+        return await call_next(request)
+
+    if settings.PROFILING_ENABLED and request.headers.get(settings.PROFILING_HEADER):
+        return await metrics.profile_request(request, call_next)
+
+    stats, token = metrics.begin_request()
+    start = time.perf_counter()
+    status_code = 500
+    try:
+        response = await call_next(request)
+        status_code = response.status_code
+        response.headers["Server-Timing"] = metrics.server_timing(stats, time.perf_counter() - start)
+        return response
+    finally:
+        metrics.end_request(token, request, status_code, time.perf_counter() - start)
+
 # Let's keep the router imports active to surface errors we need to fix.
 app.include_router(auth.router, prefix=f"{settings.API_V1_STR}/auth", tags=["auth"])
 # app.include_router(accounts.router, prefix=f"{settings.API_V1_STR}/accounts", tags=["accounts"])
@@ -16,27 +89,26 @@ app.include_router(auth.router, prefix=f"{settings.API_V1_STR}/auth", tags=["aut
 # app.include_router(loans.router, prefix=f"{settings.API_V1_STR}/loans", tags=["loans"])
 # app.include_router(cards.router, prefix=f"{settings.API_V1_STR}/cards", tags=["cards"])
 
-from fastapi.staticfiles import StaticFiles
-from fastapi.responses import FileResponse
+@app.get("/metrics", include_in_schema=False)
+def prometheus_metrics():
+    return PlainTextResponse(metrics.registry.render(), media_type="text/plain; version=0.0.4")
+
+from app.core.spa import SPAStaticFiles
 import os
 
 # Serve static files (React build)
 # We assume the build output is in a 'dist' folder in the root or same dir
 static_dir = os.path.join(os.path.dirname(__file__), "..", "dist")
 
-if os.path.exists(static_dir):
-    app.mount("/assets", StaticFiles(directory=os.path.join(static_dir, "assets")), name="assets")
+if os.path.exists(os.path.join(static_dir, "index.html")):
+    # Indexed once at startup: no per-request filesystem lookups
+    spa = SPAStaticFiles(static_dir, max_memory_file_bytes=settings.SPA_MAX_MEMORY_FILE_BYTES)
 
-    @app.get("/{full_path:path}")
-    async def serve_react_app(full_path: str):
+    @app.get("/{full_path:path}", include_in_schema=False)
+    async def serve_react_app(full_path: str, request: Request):
         # API routes are already handled above because they are included first
-        # Check if file exists in dist
-        file_path = os.path.join(static_dir, full_path)
-        if os.path.isfile(file_path):
-            return FileResponse(file_path)
-        
-        # Otherwise serve index.html for client-side routing
-        return FileResponse(os.path.join(static_dir, "index.html"))
+        # Unknown paths serve index.html for client-side routing
+        return spa.response(full_path, request)
 else:
     @app.get("/")
     def read_root():
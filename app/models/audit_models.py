@@ -0,0 +1,31 @@
+from sqlalchemy import Column, Integer, String, Numeric, DateTime, ForeignKey, Index, JSON
+from sqlalchemy.orm import relationship
+from sqlalchemy.sql import func
+
+from app.core.database import Base
+
+class AuditEvent(Base):
+    """
+    Append-only account event, written in the same commit as the change it
+    describes. amount is the signed change to the balance in `currency`
+    (0 for events that don't move money), so replaying an account's events
+    in id order rebuilds its balances.
+    """
+    __tablename__ = "audit_events"
+    __table_args__ = (Index("ix_audit_events_account_id_id", "account_id", "id"),)
+
+    id = Column(Integer, primary_key=True)
+    account_id = Column(Integer, ForeignKey("accounts.id"), nullable=False)
+    # account_opened, deposit, withdraw, transfer_out, transfer_in, loan_disbursed,
+    # limit_changed, card_blocked, card_unblocked
+    type = Column(String, nullable=False)
+    currency = Column(String(3), nullable=False, default="BRL")
+    amount = Column(Numeric(18, 4), nullable=False, default=0)
+    balance_after = Column(Numeric(18, 4), nullable=True)
+    transaction_id = Column(Integer, ForeignKey("transactions.id"), nullable=True)
+    data = Column(JSON, nullable=True)
+    created_at = Column(DateTime(timezone=True), server_default=func.now())
+
+    # Let events reference rows created in the same flush
+    account = relationship("Account")
+    transaction = relationship("Transaction")
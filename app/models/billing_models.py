@@ -0,0 +1,47 @@
+from sqlalchemy import Column, Integer, String, Numeric, Date, DateTime, ForeignKey, UniqueConstraint
+from sqlalchemy.sql import func
+
+from app.core.database import Base
+
+class CardInvoice(Base):
+    """Credit card statement for one billing cycle (period_start <= t < period_end)."""
+    __tablename__ = "card_invoices"
+    __table_args__ = (UniqueConstraint("card_id", "period_end", name="uq_card_invoices_card_period"),)
+
+    id = Column(Integer, primary_key=True, index=True)
+    card_id = Column(Integer, ForeignKey("credit_cards.id"), nullable=False, index=True)
+    period_start = Column(Date, nullable=False)
+    period_end = Column(Date, nullable=False, index=True)  # cut-off date
+    due_date = Column(Date, nullable=False)
+    previous_balance = Column(Numeric(12, 2), default=0)
+    payments_total = Column(Numeric(12, 2), default=0)
+    revolving_balance = Column(Numeric(12, 2), default=0)
+    interest = Column(Numeric(12, 2), default=0)
+    purchases_total = Column(Numeric(12, 2), default=0)
+    refunds_total = Column(Numeric(12, 2), default=0)
+    total = Column(Numeric(12, 2), default=0)
+    minimum_payment = Column(Numeric(12, 2), default=0)
+    status = Column(String, default="closed")
+    created_at = Column(DateTime(timezone=True), server_default=func.now())
+
+class CardInvoiceItem(Base):
+    """Invoice totals by category."""
+    __tablename__ = "card_invoice_items"
+
+    id = Column(Integer, primary_key=True, index=True)
+    invoice_id = Column(Integer, ForeignKey("card_invoices.id"), nullable=False, index=True)
+    category = Column(String, nullable=False)
+    total = Column(Numeric(12, 2), nullable=False)
+
+class BillingChunk(Base):
+    """Progress of a billing run, one row per range of card ids, so runs can resume."""
+    __tablename__ = "billing_chunks"
+    __table_args__ = (UniqueConstraint("cutoff_date", "first_card_id", name="uq_billing_chunks_cutoff_first"),)
+
+    id = Column(Integer, primary_key=True, index=True)
+    cutoff_date = Column(Date, nullable=False, index=True)
+    first_card_id = Column(Integer, nullable=False)
+    last_card_id = Column(Integer, nullable=False)
+    status = Column(String, default="pending")  # pending, done
+    invoices = Column(Integer, default=0)
+    updated_at = Column(DateTime(timezone=True), server_default=func.now(), onupdate=func.now())
@@ -0,0 +1,47 @@
+from sqlalchemy import Column, Integer, String, Numeric, DateTime, ForeignKey
+from sqlalchemy.sql import func
+
+from app.core.database import Base
+
+class CardAuthorization(Base):
+    """A purchase authorization (hold) against a credit card's limit."""
+    __tablename__ = "card_authorizations"
+
+    id = Column(Integer, primary_key=True, index=True)
+    card_id = Column(Integer, ForeignKey("credit_cards.id"), nullable=False, index=True)
+    amount = Column(Numeric(12, 2), nullable=False)
+    captured_amount = Column(Numeric(12, 2), nullable=True)
+    merchant = Column(String, nullable=False)
+    category = Column(String, default="Outros")
+    status = Column(String, default="pending", index=True)  # pending, captured, reversed, declined
+    decline_reason = Column(String, nullable=True)
+    created_at = Column(DateTime(timezone=True), server_default=func.now())
+    updated_at = Column(DateTime(timezone=True), server_default=func.now(), onupdate=func.now())
+
+class CardTransaction(Base):
+    """Card ledger entry: purchases (+), reversals and payments (-)."""
+    __tablename__ = "card_transactions"
+
+    id = Column(Integer, primary_key=True, index=True)
+    card_id = Column(Integer, ForeignKey("credit_cards.id"), nullable=False, index=True)
+    authorization_id = Column(Integer, ForeignKey("card_authorizations.id"), nullable=True)
+    type = Column(String, nullable=False)  # purchase, reversal, payment
+    amount = Column(Numeric(12, 2), nullable=False)
+    category = Column(String, default="Outros")
+    description = Column(String, nullable=True)
+    timestamp = Column(DateTime(timezone=True), server_default=func.now(), index=True)
+
+class CardLimit(Base):
+    """
+    Running totals against a card's limit, so an authorization is one
+    conditional UPDATE instead of a sum over the card's history. Kept in
+    step by card_service; anything posting to card_transactions must go
+    through it. Cards issued before this table existed get their row built
+    from their history on first use.
+    """
+    __tablename__ = "card_limits"
+
+    card_id = Column(Integer, ForeignKey("credit_cards.id"), primary_key=True)
+    held = Column(Numeric(12, 2), nullable=False, default=0)  # pending authorizations
+    posted = Column(Numeric(12, 2), nullable=False, default=0)  # card ledger balance
+    updated_at = Column(DateTime(timezone=True), server_default=func.now(), onupdate=func.now())
@@ -0,0 +1,39 @@
+from sqlalchemy import Column, Integer, String, Numeric, DateTime, ForeignKey, UniqueConstraint
+from sqlalchemy.sql import func
+
+from app.core.database import Base
+
+class AccountBalance(Base):
+    """
+    Balance of an account in a foreign currency. The base currency (BRL)
+    stays in Account.balance; writers lock the Account row first, so these
+    rows are only ever changed under that lock.
+    """
+    __tablename__ = "account_balances"
+    __table_args__ = (UniqueConstraint("account_id", "currency", name="uq_account_balances_account_currency"),)
+
+    id = Column(Integer, primary_key=True, index=True)
+    account_id = Column(Integer, ForeignKey("accounts.id"), nullable=False, index=True)
+    currency = Column(String(3), nullable=False)
+    balance = Column(Numeric(18, 4), nullable=False, default=0)
+    updated_at = Column(DateTime(timezone=True), server_default=func.now(), onupdate=func.now())
+
+class CurrencyTransaction(Base):
+    """
+    Ledger entry for a foreign-currency balance, or the FX details of a
+    cross-currency transfer leg (rate and counter amount as converted).
+    """
+    __tablename__ = "currency_transactions"
+
+    id = Column(Integer, primary_key=True, index=True)
+    account_id = Column(Integer, ForeignKey("accounts.id"), nullable=False, index=True)
+    type = Column(String, nullable=False)  # transfer_out, transfer_in
+    currency = Column(String(3), nullable=False)
+    amount = Column(Numeric(18, 4), nullable=False)
+    balance_after = Column(Numeric(18, 4), nullable=False)
+    category = Column(String, default="Transferência")
+    counter_currency = Column(String(3), nullable=True)
+    counter_amount = Column(Numeric(18, 4), nullable=True)
+    rate = Column(Numeric(24, 12), nullable=True)
+    fx_version = Column(Integer, nullable=True)
+    timestamp = Column(DateTime(timezone=True), server_default=func.now(), index=True)
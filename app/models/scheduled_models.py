@@ -0,0 +1,47 @@
+from sqlalchemy import Column, Integer, String, Numeric, Date, DateTime, ForeignKey, Index
+from sqlalchemy.sql import func
+
+from app.core.database import Base
+
+class ScheduledTransfer(Base):
+    """
+    A future-dated (once) or recurring (monthly) transfer.
+
+    next_run_at is when the scheduler should pick the order up: the
+    occurrence time, a retry time, or a lease while a runner executes it.
+    occurrence_at is the nominal date of the occurrence being executed.
+    """
+    __tablename__ = "scheduled_transfers"
+    __table_args__ = (Index("ix_scheduled_transfers_due", "status", "next_run_at"),)
+
+    id = Column(Integer, primary_key=True, index=True)
+    account_id = Column(Integer, ForeignKey("accounts.id"), nullable=False, index=True)
+    destination_account = Column(String, nullable=False)
+    amount = Column(Numeric(12, 2), nullable=False)
+    currency = Column(String(3), nullable=False, default="BRL")
+    destination_currency = Column(String(3), nullable=True)
+    category = Column(String, nullable=False, default="Transferência")
+    frequency = Column(String, nullable=False, default="once")  # once, monthly
+    day_of_month = Column(Integer, nullable=True)  # monthly: nominal day, clamped to short months
+    end_date = Column(Date, nullable=True)
+    occurrence_at = Column(DateTime(timezone=True), nullable=False)
+    next_run_at = Column(DateTime(timezone=True), nullable=False)
+    attempts = Column(Integer, nullable=False, default=0)  # failed attempts of the current occurrence
+    lease_token = Column(String(32), nullable=True)
+    status = Column(String, nullable=False, default="active")  # active, completed, failed, cancelled
+    last_run_at = Column(DateTime(timezone=True), nullable=True)
+    last_error = Column(String, nullable=True)
+    created_at = Column(DateTime(timezone=True), nullable=False, server_default=func.now())
+    updated_at = Column(DateTime(timezone=True), server_default=func.now(), onupdate=func.now())
+
+class ScheduledTransferRun(Base):
+    """Outcome of one execution attempt of a scheduled transfer."""
+    __tablename__ = "scheduled_transfer_runs"
+
+    id = Column(Integer, primary_key=True, index=True)
+    scheduled_transfer_id = Column(Integer, ForeignKey("scheduled_transfers.id"), nullable=False, index=True)
+    occurrence_at = Column(DateTime(timezone=True), nullable=False)
+    attempt = Column(Integer, nullable=False, default=1)
+    status = Column(String, nullable=False)  # succeeded, retrying, failed, expired
+    error = Column(String, nullable=True)
+    executed_at = Column(DateTime(timezone=True), nullable=False, server_default=func.now())
@@ -1,6 +1,6 @@
 from pydantic import BaseModel, EmailStr, Field
-from typing import Optional, List
-from datetime import datetime
+from typing import Optional, List, Literal
+from datetime import date, datetime
 from decimal import Decimal
 
 # Shared properties
@@ -61,6 +61,62 @@ class TransferCreate(BaseModel):
     destination_account: str
     amount: Decimal = Field(..., gt=0)
     category: Optional[str] = "Transferência"
+    # Currency debited from the source; the destination is credited in
+    # destination_currency (same currency if omitted)
+    currency: str = Field("BRL", pattern="^[A-Z]{3}$")
+    destination_currency: Optional[str] = Field(None, pattern="^[A-Z]{3}$")
+
+class TransferResponse(TransactionResponse):
+    currency: str = "BRL"
+    destination_currency: Optional[str] = None
+    converted_amount: Optional[Decimal] = None
+    rate: Optional[Decimal] = None
+
+class AccountBalanceResponse(BaseModel):
+    currency: str
+    balance: Decimal
+
+class ScheduledTransferCreate(BaseModel):
+    destination_account: str
+    amount: Decimal = Field(..., gt=0)
+    category: Optional[str] = "Transferência"
+    currency: str = Field("BRL", pattern="^[A-Z]{3}$")
+    destination_currency: Optional[str] = Field(None, pattern="^[A-Z]{3}$")
+    # First execution; monthly orders repeat on the same day and time
+    run_at: datetime
+    frequency: Literal["once", "monthly"] = "once"
+    end_date: Optional[date] = None
+
+class ScheduledTransferResponse(BaseModel):
+    id: int
+    destination_account: str
+    amount: Decimal
+    currency: str
+    destination_currency: Optional[str] = None
+    category: str
+    frequency: str
+    end_date: Optional[date] = None
+    occurrence_at: datetime
+    next_run_at: datetime
+    attempts: int
+    status: str
+    last_run_at: Optional[datetime] = None
+    last_error: Optional[str] = None
+    created_at: datetime
+
+    class Config:
+        from_attributes = True
+
+class ScheduledTransferRunResponse(BaseModel):
+    id: int
+    occurrence_at: datetime
+    attempt: int
+    status: str
+    error: Optional[str] = None
+    executed_at: datetime
+
+    class Config:
+        from_attributes = True
 
 class CreditAnalysisCreate(BaseModel):
     age: int
@@ -106,6 +162,33 @@ class CreditCardResponse(BaseModel):
     class Config:
         from_attributes = True
 
+class CardAuthorizationCreate(BaseModel):
+    amount: Decimal = Field(..., gt=0)
+    merchant: str
+    category: Optional[str] = "Outros"
+
+class CardCaptureCreate(BaseModel):
+    # Defaults to the full authorized amount
+    amount: Optional[Decimal] = Field(None, gt=0)
+
+class CardAuthorizationResponse(BaseModel):
+    id: int
+    amount: Decimal
+    captured_amount: Optional[Decimal] = None
+    merchant: str
+    category: str
+    status: str
+    created_at: datetime
+
+    class Config:
+        from_attributes = True
+
+class CardLimitResponse(BaseModel):
+    limit: Decimal
+    held: Decimal
+    posted: Decimal
+    available: Decimal
+
 class Token(BaseModel):
     access_token: str
     token_type: str
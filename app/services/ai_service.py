@@ -1,13 +1,26 @@
-import google.generativeai as genai
 import os
 import json
+import logging
 from decimal import Decimal
+from app.core import metrics
+from app.core.lazy import Lazy
+
+logger = logging.getLogger(__name__)
 
 # Configure Gemini
 # Note: User should provide GEMINI_API_KEY in environment variables
 API_KEY = os.getenv("GEMINI_API_KEY")
-if API_KEY:
+
+def _create_model():
+    # google.generativeai is a heavy import; only load it when a real analysis runs
+    import google.generativeai as genai
     genai.configure(api_key=API_KEY)
+    return genai.GenerativeModel('gemini-1.5-pro')
+
+_model = Lazy(_create_model)
+
+def get_model():
+    return _model.get()
 
 def analyze_credit_with_ai(age: int, mother_name: str, monthly_income: Decimal, assets_value: Decimal):
     if not API_KEY:
@@ -26,8 +39,6 @@ def analyze_credit_with_ai(age: int, mother_name: str, monthly_income: Decimal,
                 "approved_limit": 0
             }
 
-    model = genai.GenerativeModel('gemini-1.5-pro')
-    
     prompt = f"""
     Atue como um analista de crédito sênior de um banco digital. 
     Analise os seguintes dados do cliente para decidir se ele deve receber um limite de crédito e um cartão de crédito:
@@ -49,13 +60,16 @@ def analyze_credit_with_ai(age: int, mother_name: str, monthly_income: Decimal,
     """
 
     try:
-        response = model.generate_content(prompt)
+        # Inside the try: a failed import or configure of the client also falls back
+        model = get_model()
+        with metrics.external_call("gemini"):
+            response = model.generate_content(prompt)
         # Clean response text in case it contains markdown code blocks
         text = response.text.replace("```json", "").replace("```", "").strip()
         result = json.loads(text)
         return result
     except Exception as e:
-        print(f"Error calling Gemini: {e}")
+        logger.warning("Error calling Gemini: %s", e)
         # Fallback to simple logic
         if monthly_income > 1500:
             return {
@@ -0,0 +1,391 @@
+import logging
+import os
+import time
+from collections import Counter, defaultdict
+from concurrent.futures import ProcessPoolExecutor
+from dataclasses import dataclass, field
+from decimal import Decimal
+from typing import Callable, Dict, Iterator, List, Optional, Tuple
+
+from sqlalchemy import func, select, text
+from sqlalchemy.orm import Session
+
+from app.core.config import settings
+from app.core.fx import BASE_CURRENCY
+from app.models.all_models import Account, Transaction
+from app.models.audit_models import AuditEvent
+from app.models.currency_models import AccountBalance, CurrencyTransaction
+
+logger = logging.getLogger(__name__)
+
+# Sign of each ledger type on the account balance
+DEBIT_TYPES = ("withdraw", "transfer_out")
+
+
+def signed_amount(tx_type: str, amount: Decimal) -> Decimal:
+    return -amount if tx_type in DEBIT_TYPES else amount
+
+
+def record_event(
+    db: Session,
+    account: Account,
+    event_type: str,
+    amount: Decimal = Decimal("0"),
+    balance_after: Optional[Decimal] = None,
+    transaction: Optional[Transaction] = None,
+    currency: str = BASE_CURRENCY,
+    **data,
+) -> AuditEvent:
+    """
+    Add an event to the session; it is written by the caller's commit, so
+    the event exists if and only if the change it describes does.
+    """
+    event = AuditEvent(
+        account=account,
+        type=event_type,
+        currency=currency,
+        amount=amount,
+        balance_after=balance_after,
+        transaction=transaction,
+        data={key: str(value) if isinstance(value, Decimal) else value for key, value in data.items()} or None,
+    )
+    db.add(event)
+    return event
+
+
+_BACKFILL_LEDGER = f"""
+INSERT INTO {AuditEvent.__tablename__} (account_id, type, currency, amount, balance_after, transaction_id)
+SELECT t.account_id, t.type, '{BASE_CURRENCY}',
+       CASE WHEN t.type IN ('withdraw', 'transfer_out') THEN -t.amount ELSE t.amount END,
+       t.balance_after, t.id
+FROM {Transaction.__tablename__} t
+WHERE NOT EXISTS (
+    SELECT 1 FROM {AuditEvent.__tablename__} e WHERE e.account_id = t.account_id AND e.id <= :watermark
+)
+ORDER BY t.account_id, t.id
+"""
+
+_BACKFILL_CURRENCY_LEDGER = f"""
+INSERT INTO {AuditEvent.__tablename__} (account_id, type, currency, amount, balance_after)
+SELECT c.account_id, c.type, c.currency,
+       CASE WHEN c.type IN ('withdraw', 'transfer_out') THEN -c.amount ELSE c.amount END,
+       c.balance_after
+FROM {CurrencyTransaction.__tablename__} c
+WHERE NOT EXISTS (
+    SELECT 1 FROM {AuditEvent.__tablename__} e WHERE e.account_id = c.account_id AND e.id <= :watermark
+)
+ORDER BY c.account_id, c.id
+"""
+
+
+def backfill_from_ledger(db: Session) -> int:
+    """
+    Create events from the existing ledger for accounts that have none yet
+    (data written before the audit log existed). Run once, before traffic,
+    right after deploying the audit log.
+    """
+    watermark = db.execute(select(func.coalesce(func.max(AuditEvent.id), 0))).scalar()
+    created = db.execute(text(_BACKFILL_LEDGER), {"watermark": watermark}).rowcount
+    created += db.execute(text(_BACKFILL_CURRENCY_LEDGER), {"watermark": watermark}).rowcount
+    db.commit()
+    return created
+
+
+# --- Streaming readers ---
+
+class _Stream:
+    """Peekable iterator over rows ordered by account_id."""
+
+    def __init__(self, rows):
+        self._rows = iter(rows)
+        self.row = next(self._rows, None)
+        self.count = 0
+
+    def _next(self):
+        row = self.row
+        self.row = next(self._rows, None)
+        self.count += 1
+        return row
+
+    def skip_before(self, account_id: int) -> Iterator:
+        while self.row is not None and self.row.account_id < account_id:
+            yield self._next()
+
+    def take(self, account_id: int) -> Iterator:
+        while self.row is not None and self.row.account_id == account_id:
+            yield self._next()
+
+
+def _stream(db: Session, statement, batch: int):
+    # yield_per keeps a bounded number of rows in memory (server-side cursor on PostgreSQL)
+    return db.execute(statement.execution_options(yield_per=batch))
+
+
+def _event_rows(db: Session, first: int, last: int, batch: int):
+    return _stream(db, select(
+        AuditEvent.id, AuditEvent.account_id, AuditEvent.type, AuditEvent.currency,
+        AuditEvent.amount, AuditEvent.balance_after, AuditEvent.transaction_id, AuditEvent.data,
+    ).where(AuditEvent.account_id.between(first, last)).order_by(AuditEvent.account_id, AuditEvent.id), batch)
+
+
+@dataclass
+class AccountState:
+    account_id: int
+    balances: Dict[str, Decimal] = field(default_factory=lambda: defaultdict(Decimal))
+    events: int = 0
+    last_event_id: int = 0
+    credit_limit: Optional[str] = None
+    card_status: Optional[str] = None
+
+    def apply(self, event):
+        self.events += 1
+        self.last_event_id = event.id
+        self.balances[event.currency] += event.amount
+        if event.type == "limit_changed" and event.data:
+            self.credit_limit = event.data.get("new")
+        elif event.type in ("card_blocked", "card_unblocked"):
+            self.card_status = "blocked" if event.type == "card_blocked" else "active"
+
+
+def replay(db: Session, first: int = 0, last: int = 2 ** 31 - 1, batch: int = None) -> Iterator[AccountState]:
+    """
+    Rebuild account state from events in one pass ordered by (account_id, id).
+    Only the account being replayed is held in memory.
+    """
+    events = _Stream(_event_rows(db, first, last, batch or settings.AUDIT_STREAM_BATCH))
+    while events.row is not None:
+        state = AccountState(events.row.account_id)
+        for event in events.take(state.account_id):
+            state.apply(event)
+        yield state
+
+
+# --- Verifier ---
+
+@dataclass
+class RangeReport:
+    first: int
+    last: int
+    accounts: int = 0
+    events: int = 0
+    transactions: int = 0
+    mismatches: List[dict] = field(default_factory=list)
+    mismatch_count: int = 0
+    kinds: Dict[str, int] = field(default_factory=dict)
+
+
+class _Collector:
+    def __init__(self, report: RangeReport, limit: int):
+        self.report = report
+        self.limit = limit
+        self.kinds = Counter()
+
+    def __call__(self, kind: str, account_id: int, **details):
+        self.kinds[kind] += 1
+        self.report.mismatch_count += 1
+        if len(self.report.mismatches) < self.limit:
+            self.report.mismatches.append({"kind": kind, "account_id": account_id, **{
+                key: str(value) if isinstance(value, Decimal) else value for key, value in details.items()
+            }})
+
+
+def _verify_account(account, events: Iterator, transactions: _Stream, foreign: Dict[str, Decimal], mismatch):
+    account_id = account.id
+    running: Dict[str, Decimal] = defaultdict(Decimal)
+    previous_balance_after = Decimal("0")
+    ledger = transactions.take(account_id)
+    tx = next(ledger, None)
+
+    def check_chain(row):
+        # Each balance_after must follow from the previous one
+        nonlocal previous_balance_after
+        expected = previous_balance_after + signed_amount(row.type, row.amount)
+        if row.balance_after != expected:
+            mismatch("transaction_chain", account_id, transaction_id=row.id, expected=expected, found=row.balance_after)
+        previous_balance_after = row.balance_after
+
+    for event in events:
+        running[event.currency] += event.amount
+        if event.balance_after is not None and event.balance_after != running[event.currency]:
+            mismatch("event_chain", account_id, event_id=event.id, currency=event.currency,
+                     expected=running[event.currency], found=event.balance_after)
+        if event.transaction_id is None:
+            continue
+
+        # Ledger rows before the event's transaction have no event of their own
+        while tx is not None and tx.id < event.transaction_id:
+            mismatch("missing_event", account_id, transaction_id=tx.id)
+            check_chain(tx)
+            tx = next(ledger, None)
+        if tx is None or tx.id != event.transaction_id:
+            mismatch("missing_transaction", account_id, event_id=event.id, transaction_id=event.transaction_id)
+            continue
+        if signed_amount(tx.type, tx.amount) != event.amount:
+            mismatch("amount", account_id, transaction_id=tx.id, event=event.amount, ledger=signed_amount(tx.type, tx.amount))
+        check_chain(tx)
+        if tx.balance_after != running[BASE_CURRENCY]:
+            mismatch("balance_after", account_id, transaction_id=tx.id, events=running[BASE_CURRENCY], ledger=tx.balance_after)
+        tx = next(ledger, None)
+
+    while tx is not None:
+        mismatch("missing_event", account_id, transaction_id=tx.id)
+        check_chain(tx)
+        tx = next(ledger, None)
+
+    if account.balance != running[BASE_CURRENCY]:
+        mismatch("balance", account_id, currency=BASE_CURRENCY, events=running[BASE_CURRENCY], account=account.balance)
+    for currency in set(foreign) | (set(running) - {BASE_CURRENCY}):
+        if foreign.get(currency, Decimal("0")) != running.get(currency, Decimal("0")):
+            mismatch("balance", account_id, currency=currency, events=running.get(currency, Decimal("0")),
+                     account=foreign.get(currency, Decimal("0")))
+
+
+def verify_range(db: Session, first: int, last: int, batch: int = None, max_mismatches: int = 1000) -> RangeReport:
+    """
+    Check accounts first..last against their events with four ordered
+    streams merged by account_id: accounts, foreign balances, events and
+    the Transaction ledger. Memory does not grow with the number of rows.
+    """
+    batch = batch or settings.AUDIT_STREAM_BATCH
+    report = RangeReport(first, last)
+    mismatch = _Collector(report, max_mismatches)
+
+    accounts = _stream(db, select(Account.id, Account.balance)
+                       .where(Account.id.between(first, last)).order_by(Account.id), batch)
+    foreign = _Stream(_stream(db, select(AccountBalance.account_id, AccountBalance.currency, AccountBalance.balance)
+                              .where(AccountBalance.account_id.between(first, last))
+                              .order_by(AccountBalance.account_id, AccountBalance.currency), batch))
+    events = _Stream(_event_rows(db, first, last, batch))
+    transactions = _Stream(_stream(db, select(
+        Transaction.id, Transaction.account_id, Transaction.type, Transaction.amount, Transaction.balance_after,
+    ).where(Transaction.account_id.between(first, last)).order_by(Transaction.account_id, Transaction.id), batch))
+
+    for account in accounts:
+        report.accounts += 1
+        for stream in (events, transactions, foreign):
+            for row in stream.skip_before(account.id):
+                mismatch("orphan", row.account_id, row_id=getattr(row, "id", None))
+        balances = {row.currency: row.balance for row in foreign.take(account.id)}
+        _verify_account(account, events.take(account.id), transactions, balances, mismatch)
+
+    for stream in (events, transactions, foreign):
+        for row in stream.skip_before(last + 1):
+            mismatch("orphan", row.account_id, row_id=getattr(row, "id", None))
+
+    report.events = events.count
+    report.transactions = transactions.count
+    report.kinds = dict(mismatch.kinds)
+    return report
+
+
+_worker_sessions: Dict[Optional[str], Callable[[], Session]] = {}
+
+
+def _session_factory(database_url: Optional[str]) -> Callable[[], Session]:
+    from sqlalchemy import create_engine
+    from sqlalchemy.orm import sessionmaker
+    if database_url:
+        return sessionmaker(bind=create_engine(database_url))
+    from app.core.database import SessionLocal
+    return SessionLocal
+
+
+def _init_worker():
+    # Forked from the parent: inherited pooled connections must not be reused
+    _worker_sessions.clear()
+    from app.core.database import engine
+    engine.dispose(close=False)
+
+
+def _worker_session(database_url: Optional[str]) -> Session:
+    # One engine per worker process, created on its first range
+    factory = _worker_sessions.get(database_url)
+    if factory is None:
+        factory = _worker_sessions[database_url] = _session_factory(database_url)
+    return factory()
+
+
+def _verify_range_task(args: Tuple[int, int, Optional[str], int, int]) -> RangeReport:
+    first, last, database_url, batch, max_mismatches = args
+    db = _worker_session(database_url)
+    try:
+        return verify_range(db, first, last, batch, max_mismatches)
+    finally:
+        db.close()
+
+
+@dataclass
+class VerifyResult:
+    accounts: int = 0
+    events: int = 0
+    transactions: int = 0
+    mismatch_count: int = 0
+    kinds: Dict[str, int] = field(default_factory=dict)
+    ranges: int = 0
+    seconds: float = 0.0
+
+    @property
+    def events_per_second(self) -> float:
+        return self.events / self.seconds if self.seconds else 0.0
+
+
+def verify(
+    workers: Optional[int] = None,
+    database_url: Optional[str] = None,
+    batch: Optional[int] = None,
+    max_mismatches: int = 1000,
+    on_mismatch: Optional[Callable[[dict], None]] = None,
+) -> VerifyResult:
+    """
+    Verify every account, splitting the account id space into ranges that
+    worker processes check independently.
+    """
+    workers = workers or settings.AUDIT_VERIFY_WORKERS or os.cpu_count() or 1
+    batch = batch or settings.AUDIT_STREAM_BATCH
+    start = time.perf_counter()
+
+    # Planning runs in the parent; keep it out of the cache the forked workers inherit
+    db = _session_factory(database_url)()
+    try:
+        low, high = db.execute(select(func.min(Account.id), func.max(Account.id))).one()
+    finally:
+        db.close()
+        if database_url:
+            db.get_bind().dispose()
+    result = VerifyResult()
+    if low is None:
+        return result
+
+    # More ranges than workers so a slow range doesn't hold up the others
+    parts = workers * 4
+    step = max(1, (high - low + parts) // parts)
+    ranges = [(first, min(first + step - 1, high), database_url, batch, max_mismatches)
+              for first in range(low, high + 1, step)]
+    kinds = Counter()
+
+    def collect(report: RangeReport):
+        result.accounts += report.accounts
+        result.events += report.events
+        result.transactions += report.transactions
+        result.mismatch_count += report.mismatch_count
+        kinds.update(report.kinds)
+        if on_mismatch:
+            for item in report.mismatches:
+                on_mismatch(item)
+
+    if workers == 1:
+        for args in ranges:
+            collect(_verify_range_task(args))
+    else:
+        with ProcessPoolExecutor(max_workers=workers, initializer=_init_worker) as pool:
+            for report in pool.map(_verify_range_task, ranges):
+                collect(report)
+
+    result.kinds = dict(kinds)
+    result.ranges = len(ranges)
+    result.seconds = time.perf_counter() - start
+    logger.info(
+        "Verified %d accounts, %d events, %d transactions in %.2fs: %d mismatches %s",
+        result.accounts, result.events, result.transactions, result.seconds, result.mismatch_count, result.kinds,
+    )
+    return result
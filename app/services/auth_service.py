@@ -2,6 +2,7 @@ from sqlalchemy.orm import Session
 from app.models.all_models import User, Account
 from app.schemas.all_schemas import UserCreate
 from app.core.security import get_password_hash, verify_password
+from app.services import audit_service
 import random
 
 def get_user_by_email(db: Session, email: str):
@@ -36,6 +37,7 @@ def create_user_account(db: Session, user: User):
     
     db_account = Account(user_id=user.id, number=number, balance=0.00)
     db.add(db_account)
+    audit_service.record_event(db, db_account, "account_opened", balance_after=0, number=number)
     db.commit()
     db.refresh(db_account)
     return db_account
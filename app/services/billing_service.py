@@ -0,0 +1,272 @@
+import logging
+import time
+from concurrent.futures import ThreadPoolExecutor
+from dataclasses import dataclass
+from datetime import date, datetime, time as dtime, timedelta, timezone
+from decimal import Decimal
+from typing import Callable, List, Optional
+
+from sqlalchemy import Date, DateTime, Numeric, bindparam, func, text
+from sqlalchemy.exc import IntegrityError
+from sqlalchemy.orm import Session
+
+from app.core.config import settings
+from app.models.all_models import CreditCard
+from app.models.billing_models import BillingChunk, CardInvoice, CardInvoiceItem
+from app.models.card_models import CardTransaction
+
+logger = logging.getLogger(__name__)
+
+# Cards carry no cut-off column, so the cycle day is derived from the id.
+# Days 1-28 exist in every month and spread cards evenly across the month.
+CYCLE_DAYS = 28
+
+
+def cutoff_day(card_id: int) -> int:
+    return card_id % CYCLE_DAYS + 1
+
+
+def previous_cutoff(cutoff: date) -> date:
+    if cutoff.month == 1:
+        return date(cutoff.year - 1, 12, cutoff.day)
+    return date(cutoff.year, cutoff.month - 1, cutoff.day)
+
+
+def _midnight_utc(day: date) -> datetime:
+    return datetime.combine(day, dtime.min, tzinfo=timezone.utc)
+
+
+# One statement per chunk: aggregate the period's card ledger per card and
+# derive revolving balance, interest, total and minimum payment in SQL.
+_INSERT_INVOICES = f"""
+INSERT INTO {CardInvoice.__tablename__} (
+    card_id, period_start, period_end, due_date, previous_balance, payments_total,
+    revolving_balance, interest, purchases_total, refunds_total, total, minimum_payment, status
+)
+SELECT card_id, :period_start, :period_end, :due_date, previous_balance, payments_total,
+       revolving_balance, interest, purchases_total, refunds_total, total,
+       CASE
+           WHEN total <= 0 THEN 0
+           WHEN total * :min_payment_rate >= :min_payment_floor THEN ROUND(total * :min_payment_rate, 2)
+           WHEN total < :min_payment_floor THEN total
+           ELSE :min_payment_floor
+       END,
+       'closed'
+FROM (
+    SELECT card_id, previous_balance, payments_total, revolving_balance, interest,
+           purchases_total, refunds_total,
+           revolving_balance + interest + purchases_total - refunds_total AS total
+    FROM (
+        SELECT card_id, previous_balance, payments_total, purchases_total, refunds_total,
+               revolving_balance, ROUND(revolving_balance * :interest_rate, 2) AS interest
+        FROM (
+            SELECT card_id, previous_balance, payments_total, purchases_total, refunds_total,
+                   CASE WHEN previous_balance > payments_total
+                        THEN previous_balance - payments_total ELSE 0 END AS revolving_balance
+            FROM (
+                SELECT c.id AS card_id,
+                       COALESCE(prev.total, 0) AS previous_balance,
+                       COALESCE(SUM(CASE WHEN t.type = 'payment' THEN -t.amount ELSE 0 END), 0) AS payments_total,
+                       COALESCE(SUM(CASE WHEN t.type = 'purchase' THEN t.amount ELSE 0 END), 0) AS purchases_total,
+                       COALESCE(SUM(CASE WHEN t.type = 'reversal' THEN -t.amount ELSE 0 END), 0) AS refunds_total
+                FROM {CreditCard.__tablename__} c
+                LEFT JOIN {CardInvoice.__tablename__} prev
+                       ON prev.card_id = c.id AND prev.period_end = :period_start
+                LEFT JOIN {CardTransaction.__tablename__} t
+                       ON t.card_id = c.id AND t.timestamp >= :start_ts AND t.timestamp < :end_ts
+                WHERE c.id BETWEEN :first_card_id AND :last_card_id
+                  AND (c.id % {CYCLE_DAYS}) + 1 = :cutoff_day
+                  AND NOT EXISTS (
+                      SELECT 1 FROM {CardInvoice.__tablename__} i
+                      WHERE i.card_id = c.id AND i.period_end = :period_end
+                  )
+                GROUP BY c.id, prev.total
+            ) ledger
+        ) revolving
+    ) charged
+) totals
+"""
+
+_INSERT_ITEMS = f"""
+INSERT INTO {CardInvoiceItem.__tablename__} (invoice_id, category, total)
+SELECT i.id, COALESCE(t.category, 'Outros'), SUM(t.amount)
+FROM {CardInvoice.__tablename__} i
+JOIN {CardTransaction.__tablename__} t
+  ON t.card_id = i.card_id AND t.timestamp >= :start_ts AND t.timestamp < :end_ts
+ AND t.type IN ('purchase', 'reversal')
+WHERE i.period_end = :period_end
+  AND i.card_id BETWEEN :first_card_id AND :last_card_id
+  AND NOT EXISTS (SELECT 1 FROM {CardInvoiceItem.__tablename__} x WHERE x.invoice_id = i.id)
+GROUP BY i.id, COALESCE(t.category, 'Outros')
+"""
+
+
+def _statement(sql: str):
+    # Explicit types so Decimal/date parameters bind the same way on every driver
+    return text(sql).bindparams(
+        *(bindparam(name, type_=Date()) for name in ("period_start", "period_end", "due_date") if f":{name}" in sql),
+        *(bindparam(name, type_=DateTime(timezone=True)) for name in ("start_ts", "end_ts")),
+        *(bindparam(name, type_=Numeric(12, 6)) for name in ("interest_rate", "min_payment_rate", "min_payment_floor") if f":{name}" in sql),
+    )
+
+
+INSERT_INVOICES = _statement(_INSERT_INVOICES)
+INSERT_ITEMS = _statement(_INSERT_ITEMS)
+
+
+@dataclass
+class BillingRunResult:
+    cutoff: date
+    chunks: int
+    chunks_processed: int
+    invoices: int
+    seconds: float
+
+
+def _session_factory() -> Callable[[], Session]:
+    from app.core.database import SessionLocal
+    return SessionLocal
+
+
+def plan_chunks(db: Session, cutoff: date, chunk_size: int) -> List[BillingChunk]:
+    """Create the chunk rows for a cut-off date once; later runs reuse them."""
+    chunks = db.query(BillingChunk).filter(BillingChunk.cutoff_date == cutoff).order_by(BillingChunk.first_card_id).all()
+    if chunks:
+        return chunks
+
+    card_ids = [
+        card_id for (card_id,) in db.query(CreditCard.id)
+        .filter((CreditCard.id % CYCLE_DAYS) + 1 == cutoff.day)
+        .order_by(CreditCard.id)
+    ]
+    for start in range(0, len(card_ids), chunk_size):
+        batch = card_ids[start:start + chunk_size]
+        db.add(BillingChunk(cutoff_date=cutoff, first_card_id=batch[0], last_card_id=batch[-1], status="pending"))
+    try:
+        db.commit()
+    except IntegrityError:
+        # Another runner planned the same cut-off first
+        db.rollback()
+    return db.query(BillingChunk).filter(BillingChunk.cutoff_date == cutoff).order_by(BillingChunk.first_card_id).all()
+
+
+def close_chunk(db: Session, chunk_id: int, cutoff: date) -> Optional[int]:
+    """
+    Bill one chunk in a single transaction (invoices, items and the chunk's
+    done flag commit together). Returns None if the chunk was already done or
+    is being processed by another runner.
+    """
+    chunk = (
+        db.query(BillingChunk)
+        .filter(BillingChunk.id == chunk_id, BillingChunk.status == "pending")
+        .with_for_update(skip_locked=True)
+        .first()
+    )
+    if chunk is None:
+        db.rollback()
+        return None
+
+    period_start = previous_cutoff(cutoff)
+    params = {
+        "period_start": period_start,
+        "period_end": cutoff,
+        "due_date": cutoff + timedelta(days=settings.BILLING_DUE_DAYS),
+        "start_ts": _midnight_utc(period_start),
+        "end_ts": _midnight_utc(cutoff),
+        "cutoff_day": cutoff.day,
+        "first_card_id": chunk.first_card_id,
+        "last_card_id": chunk.last_card_id,
+        "interest_rate": Decimal(str(settings.BILLING_MONTHLY_INTEREST_RATE)),
+        "min_payment_rate": Decimal(str(settings.BILLING_MIN_PAYMENT_RATE)),
+        "min_payment_floor": Decimal(str(settings.BILLING_MIN_PAYMENT_FLOOR)),
+    }
+    invoices = db.execute(INSERT_INVOICES, params).rowcount
+    db.execute(INSERT_ITEMS, {key: params[key] for key in ("period_end", "start_ts", "end_ts", "first_card_id", "last_card_id")})
+
+    chunk.status = "done"
+    chunk.invoices = invoices
+    db.commit()
+    return invoices
+
+
+def close_cycle(
+    cutoff: date,
+    session_factory: Optional[Callable[[], Session]] = None,
+    workers: Optional[int] = None,
+    chunk_size: Optional[int] = None,
+) -> BillingRunResult:
+    """
+    Close the billing cycle of every card whose cut-off day is `cutoff`.
+    Chunks run in parallel, each with its own session; re-running after an
+    interruption only processes the chunks that did not commit.
+    """
+    session_factory = session_factory or _session_factory()
+    workers = workers or settings.BILLING_WORKERS
+    chunk_size = chunk_size or settings.BILLING_CHUNK_SIZE
+    start = time.perf_counter()
+
+    db = session_factory()
+    try:
+        chunks = plan_chunks(db, cutoff, chunk_size)
+        pending = [chunk.id for chunk in chunks if chunk.status == "pending"]
+    finally:
+        db.close()
+
+    def run(chunk_id: int) -> Optional[int]:
+        session = session_factory()
+        try:
+            return close_chunk(session, chunk_id, cutoff)
+        except Exception:
+            session.rollback()
+            logger.exception("Billing chunk %s for %s failed; it will be retried on the next run", chunk_id, cutoff)
+            return None
+        finally:
+            session.close()
+
+    with ThreadPoolExecutor(max_workers=workers) as pool:
+        results = list(pool.map(run, pending))
+
+    processed = [invoices for invoices in results if invoices is not None]
+    result = BillingRunResult(
+        cutoff=cutoff,
+        chunks=len(chunks),
+        chunks_processed=len(processed),
+        invoices=sum(processed),
+        seconds=time.perf_counter() - start,
+    )
+    logger.info(
+        "Billing %s: %d invoices from %d/%d pending chunks in %.2fs",
+        cutoff, result.invoices, result.chunks_processed, len(pending), result.seconds,
+    )
+    return result
+
+
+def cutoffs_to_close(db: Session, through: date) -> List[date]:
+    """
+    Every cut-off date from the last one planned up to `through`, oldest
+    first. A period's invoice carries over the previous invoice's balance,
+    so a missed day (job down, outage) must be closed before the later ones.
+    The last planned date is included so an interrupted run is finished.
+    """
+    last = db.query(func.max(BillingChunk.cutoff_date)).scalar()
+    if last is None or last >= through:
+        return [through]
+    return [last + timedelta(days=offset) for offset in range((through - last).days + 1)]
+
+
+def close_through(
+    through: date,
+    session_factory: Optional[Callable[[], Session]] = None,
+    workers: Optional[int] = None,
+    chunk_size: Optional[int] = None,
+) -> List[BillingRunResult]:
+    """Close `through` and any cut-off dates missed since the last run, in order."""
+    session_factory = session_factory or _session_factory()
+    db = session_factory()
+    try:
+        cutoffs = cutoffs_to_close(db, through)
+    finally:
+        db.close()
+    if len(cutoffs) > 2:
+        logger.warning("Billing: catching up %d cut-off dates from %s", len(cutoffs), cutoffs[0])
+    return [close_cycle(cutoff, session_factory, workers, chunk_size) for cutoff in cutoffs]
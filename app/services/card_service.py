@@ -0,0 +1,177 @@
+from decimal import Decimal
+from typing import Optional, Tuple
+
+from fastapi import HTTPException
+from sqlalchemy import func, select, update
+from sqlalchemy.exc import IntegrityError
+from sqlalchemy.orm import Session
+
+from app.models.all_models import CreditCard
+from app.models.card_models import CardAuthorization, CardLimit, CardTransaction
+
+
+def _create_totals(db: Session, card_id: int) -> bool:
+    """
+    Build a card's CardLimit row from its pending authorizations and ledger
+    (cards issued before running totals existed). Sees the session's own
+    pending changes. Returns False if another worker created it first.
+    """
+    db.flush()
+    held = db.query(func.coalesce(func.sum(CardAuthorization.amount), 0)).filter(
+        CardAuthorization.card_id == card_id, CardAuthorization.status == "pending"
+    ).scalar()
+    posted = db.query(func.coalesce(func.sum(CardTransaction.amount), 0)).filter(
+        CardTransaction.card_id == card_id
+    ).scalar()
+    try:
+        with db.begin_nested():
+            db.add(CardLimit(card_id=card_id, held=held, posted=posted))
+    except IntegrityError:
+        return False
+    return True
+
+
+def _has_totals(db: Session, card_id: int) -> bool:
+    return db.query(CardLimit.card_id).filter(CardLimit.card_id == card_id).first() is not None
+
+
+def _hold(db: Session, card_id: int, amount: Decimal) -> Optional[Tuple[Decimal, Decimal]]:
+    """
+    Add `amount` to the card's holds if it fits in the available limit of
+    an active card: a single conditional UPDATE, so concurrent
+    authorizations can't overspend and none of them sums any history.
+    Returns the new (held, posted), or None if it doesn't fit.
+    """
+    active_limit = select(CreditCard.limit).where(
+        CreditCard.id == CardLimit.card_id, CreditCard.status == "active"
+    ).scalar_subquery()
+    statement = (
+        update(CardLimit)
+        .where(CardLimit.card_id == card_id, active_limit - CardLimit.held - CardLimit.posted >= amount)
+        .values(held=CardLimit.held + amount)
+        .returning(CardLimit.held, CardLimit.posted)
+        .execution_options(synchronize_session=False)
+    )
+    row = db.execute(statement).first()
+    if row is None and not _has_totals(db, card_id):
+        _create_totals(db, card_id)
+        row = db.execute(statement).first()
+    return None if row is None else (row.held, row.posted)
+
+
+def _adjust(db: Session, card_id: int, held: Decimal = Decimal("0"), posted: Decimal = Decimal("0")):
+    """Apply a capture or release to the card's running totals."""
+    statement = (
+        update(CardLimit)
+        .where(CardLimit.card_id == card_id)
+        .values(held=CardLimit.held + held, posted=CardLimit.posted + posted)
+        .execution_options(synchronize_session=False)
+    )
+    if db.execute(statement).rowcount:
+        return
+    # No totals yet: built from the history, which already includes this change
+    if not _create_totals(db, card_id):
+        db.execute(statement)
+
+
+def get_limit(db: Session, card: CreditCard):
+    totals = db.get(CardLimit, card.id, populate_existing=True)
+    if totals is None:
+        _create_totals(db, card.id)
+        db.commit()
+        totals = db.get(CardLimit, card.id)
+    held, posted = Decimal(totals.held), Decimal(totals.posted)
+    limit = Decimal(card.limit)
+    return {"limit": limit, "held": held, "posted": posted, "available": limit - held - posted}
+
+
+def authorize(db: Session, card: CreditCard, amount: Decimal, merchant: str, category: str = "Outros"):
+    if amount <= 0:
+        raise HTTPException(status_code=400, detail="Authorization amount must be positive.")
+    if card.status != "active":
+        raise HTTPException(status_code=400, detail="Cartão bloqueado.")
+
+    approved = _hold(db, card.id, amount) is not None
+    if not approved:
+        # The card may have been blocked since it was loaded
+        status = db.query(CreditCard.status).filter(CreditCard.id == card.id).scalar()
+        if status != "active":
+            db.rollback()
+            raise HTTPException(status_code=400, detail="Cartão bloqueado.")
+
+    authorization = CardAuthorization(
+        card_id=card.id,
+        amount=amount,
+        merchant=merchant,
+        category=category,
+        status="pending" if approved else "declined",
+        decline_reason=None if approved else "insufficient_limit",
+    )
+    db.add(authorization)
+    db.commit()
+    db.refresh(authorization)
+
+    if not approved:
+        raise HTTPException(status_code=400, detail="Limite insuficiente para esta compra.")
+    return authorization
+
+
+def _get_authorization(db: Session, card: CreditCard, authorization_id: int) -> CardAuthorization:
+    authorization = db.query(CardAuthorization).filter(
+        CardAuthorization.id == authorization_id, CardAuthorization.card_id == card.id
+    ).with_for_update().first()
+    if not authorization:
+        raise HTTPException(status_code=404, detail="Authorization not found.")
+    return authorization
+
+
+def capture(db: Session, card: CreditCard, authorization_id: int, amount: Optional[Decimal] = None):
+    authorization = _get_authorization(db, card, authorization_id)
+    if authorization.status != "pending":
+        raise HTTPException(status_code=400, detail=f"Authorization is {authorization.status}.")
+
+    # Partial captures release the rest of the hold
+    captured = authorization.amount if amount is None else amount
+    if captured <= 0 or captured > authorization.amount:
+        raise HTTPException(status_code=400, detail="Capture amount must be positive and within the authorized amount.")
+
+    authorization.status = "captured"
+    authorization.captured_amount = captured
+    db.add(CardTransaction(
+        card_id=card.id,
+        authorization_id=authorization.id,
+        type="purchase",
+        amount=captured,
+        category=authorization.category,
+        description=authorization.merchant,
+    ))
+    _adjust(db, card.id, held=-authorization.amount, posted=captured)
+    db.commit()
+    db.refresh(authorization)
+    return authorization
+
+
+def reverse(db: Session, card: CreditCard, authorization_id: int):
+    authorization = _get_authorization(db, card, authorization_id)
+    if authorization.status == "pending":
+        authorization.status = "reversed"
+        _adjust(db, card.id, held=-authorization.amount)
+        db.commit()
+    elif authorization.status == "captured":
+        # Refund: post the opposite entry to the card ledger
+        authorization.status = "reversed"
+        db.add(CardTransaction(
+            card_id=card.id,
+            authorization_id=authorization.id,
+            type="reversal",
+            amount=-authorization.captured_amount,
+            category=authorization.category,
+            description=authorization.merchant,
+        ))
+        _adjust(db, card.id, posted=-authorization.captured_amount)
+        db.commit()
+    else:
+        raise HTTPException(status_code=400, detail=f"Authorization is {authorization.status}.")
+
+    db.refresh(authorization)
+    return authorization
@@ -0,0 +1,309 @@
+import logging
+import threading
+import time
+from array import array
+from contextlib import contextmanager
+from dataclasses import dataclass
+from datetime import datetime, timezone
+from decimal import Decimal
+from typing import Dict, Iterator, Optional, Tuple
+
+from fastapi import HTTPException
+
+from app.core.config import settings
+
+logger = logging.getLogger(__name__)
+
+
+@dataclass(frozen=True)
+class VelocityRules:
+    window_seconds: int
+    bucket_seconds: int
+    max_amount: Decimal
+    max_count: int
+    max_new_destinations: int
+    spike_multiplier: Decimal
+    spike_min_amount: Decimal
+    spike_min_history: int
+
+    @classmethod
+    def from_settings(cls) -> "VelocityRules":
+        return cls(
+            window_seconds=settings.FRAUD_WINDOW_SECONDS,
+            bucket_seconds=settings.FRAUD_BUCKET_SECONDS,
+            max_amount=Decimal(str(settings.FRAUD_MAX_AMOUNT_PER_WINDOW)),
+            max_count=settings.FRAUD_MAX_COUNT_PER_WINDOW,
+            max_new_destinations=settings.FRAUD_MAX_NEW_DESTINATIONS_PER_WINDOW,
+            spike_multiplier=Decimal(str(settings.FRAUD_SPIKE_MULTIPLIER)),
+            spike_min_amount=Decimal(str(settings.FRAUD_SPIKE_MIN_AMOUNT)),
+            spike_min_history=settings.FRAUD_SPIKE_MIN_HISTORY,
+        )
+
+
+class SlidingWindow:
+    """
+    Per-account ring buffer of fixed-size time buckets with running totals.
+    Amounts are kept in cents in compact arrays, so a window costs about a
+    kilobyte regardless of how many transactions it has seen, and
+    reading the totals is O(1) amortized (expired buckets are subtracted
+    as the head moves forward).
+    """
+
+    __slots__ = ("bucket_seconds", "size", "head", "cents", "counts", "new_destinations",
+                 "total_cents", "total_count", "total_new_destinations", "destinations")
+
+    def __init__(self, size: int, bucket_seconds: int):
+        self.bucket_seconds = bucket_seconds
+        self.size = size
+        self.head = -1  # newest bucket number seen
+        self.cents = array("q", [0]) * size
+        self.counts = array("I", [0]) * size
+        self.new_destinations = array("I", [0]) * size
+        self.total_cents = 0
+        self.total_count = 0
+        self.total_new_destinations = 0
+        # Destination account id -> None; insertion order doubles as LRU
+        self.destinations: Dict[int, None] = {}
+
+    def _advance(self, epoch: int):
+        if epoch <= self.head:
+            return
+        if epoch - self.head >= self.size:
+            self.cents = array("q", [0]) * self.size
+            self.counts = array("I", [0]) * self.size
+            self.new_destinations = array("I", [0]) * self.size
+            self.total_cents = self.total_count = self.total_new_destinations = 0
+        else:
+            for expired in range(self.head + 1, epoch + 1):
+                slot = expired % self.size
+                self.total_cents -= self.cents[slot]
+                self.total_count -= self.counts[slot]
+                self.total_new_destinations -= self.new_destinations[slot]
+                self.cents[slot] = self.counts[slot] = self.new_destinations[slot] = 0
+        self.head = epoch
+
+    def add(self, now: float, cents: int, destination_id: Optional[int] = None, max_destinations: int = 256) -> bool:
+        """Count a debit; returns whether destination_id was new to the window."""
+        epoch = int(now // self.bucket_seconds)
+        self._advance(epoch)
+        if epoch <= self.head - self.size:
+            return False  # older than the window
+        slot = epoch % self.size
+        self.cents[slot] += cents
+        self.counts[slot] += 1
+        self.total_cents += cents
+        self.total_count += 1
+
+        is_new = False
+        if destination_id is not None:
+            if destination_id in self.destinations:
+                del self.destinations[destination_id]
+            else:
+                is_new = True
+                self.new_destinations[slot] += 1
+                self.total_new_destinations += 1
+                if len(self.destinations) >= max_destinations:
+                    del self.destinations[next(iter(self.destinations))]
+            self.destinations[destination_id] = None
+        return is_new
+
+    def remove(self, at: float, cents: int, destination_id: Optional[int], new_destination: bool):
+        """Undo an add() made at `at`, unless its bucket has already expired."""
+        epoch = int(at // self.bucket_seconds)
+        if epoch <= self.head - self.size:
+            return
+        slot = epoch % self.size
+        # Counters are unsigned; never take one below zero
+        if self.counts[slot]:
+            self.cents[slot] -= cents
+            self.counts[slot] -= 1
+            self.total_cents -= cents
+            self.total_count -= 1
+        if new_destination:
+            if self.new_destinations[slot]:
+                self.new_destinations[slot] -= 1
+                self.total_new_destinations -= 1
+            self.destinations.pop(destination_id, None)
+
+    def totals(self, now: float):
+        """(cents, count, new destinations) over the buckets still inside the window."""
+        self._advance(int(now // self.bucket_seconds))
+        return self.total_cents, self.total_count, self.total_new_destinations
+
+
+PRUNE_EVERY = 10_000
+
+
+@dataclass(frozen=True)
+class Reservation:
+    """A debit counted in its account's window before it is committed."""
+    account_id: int
+    at: float
+    cents: int
+    destination_id: Optional[int]
+    new_destination: bool
+    generation: int  # VelocityEngine.generation when it was counted
+
+
+class VelocityEngine:
+    """
+    In-memory velocity rules for money leaving an account (withdraw, transfer).
+    State is per process; it is rebuilt from recent Transaction rows on startup.
+    """
+
+    def __init__(self, rules: VelocityRules):
+        self.rules = rules
+        self.window_buckets = max(1, rules.window_seconds // rules.bucket_seconds)
+        self._windows: Dict[int, SlidingWindow] = {}
+        self._lock = threading.Lock()
+        # Known destinations can't be rebuilt from the ledger, so the
+        # new-destination rule only applies after a full window of learning
+        self.learning_since = time.time()
+        self._records_since_prune = 0
+        # Bumped by rebuild(); reservations from older windows are not released
+        self.generation = 0
+
+    def _window(self, account_id: int) -> SlidingWindow:
+        window = self._windows.get(account_id)
+        if window is None:
+            window = self._windows[account_id] = SlidingWindow(self.window_buckets, self.rules.bucket_seconds)
+        return window
+
+    def _blocked_reason(self, window: Optional[SlidingWindow], amount: Decimal,
+                        destination_id: Optional[int], now: float) -> Optional[str]:
+        rules = self.rules
+        if window is None:
+            cents, count, new_destinations = 0, 0, 0
+            is_new_destination = destination_id is not None
+        else:
+            cents, count, new_destinations = window.totals(now)
+            is_new_destination = destination_id is not None and destination_id not in window.destinations
+
+        total = Decimal(cents) / 100
+        if count + 1 > rules.max_count:
+            return "Limite de transações por hora excedido."
+        if total + amount > rules.max_amount:
+            return "Limite de valor movimentado por hora excedido."
+        if (
+            is_new_destination
+            and new_destinations + 1 > rules.max_new_destinations
+            and now - self.learning_since >= rules.window_seconds
+        ):
+            return "Muitas transferências para novos destinatários em pouco tempo."
+        if (
+            count >= rules.spike_min_history
+            and amount >= rules.spike_min_amount
+            and amount > total / count * rules.spike_multiplier
+        ):
+            return "Valor muito acima do seu padrão recente de movimentação."
+        return None
+
+    def reserve(self, account_id: int, amount: Decimal, destination_id: Optional[int] = None,
+                now: Optional[float] = None) -> Tuple[Optional[str], Optional[Reservation]]:
+        """
+        Check the debit against the rules and, if allowed, count it right
+        away under the same lock, so concurrent debits of one account each
+        see the others. Returns (reason it is blocked, None) or
+        (None, reservation); release() the reservation if the debit fails.
+        """
+        now = time.time() if now is None else now
+        with self._lock:
+            reason = self._blocked_reason(self._windows.get(account_id), amount, destination_id, now)
+            if reason:
+                return reason, None
+            cents = int(amount * 100)
+            new_destination = self._window(account_id).add(now, cents, destination_id)
+            self._records_since_prune += 1
+            if self._records_since_prune >= PRUNE_EVERY:
+                self._prune(now)
+            generation = self.generation
+        return None, Reservation(account_id, now, cents, destination_id, new_destination, generation)
+
+    def release(self, reservation: Reservation):
+        with self._lock:
+            if reservation.generation != self.generation:
+                return  # the windows it was counted in were replaced by rebuild()
+            window = self._windows.get(reservation.account_id)
+            if window is not None:
+                window.remove(reservation.at, reservation.cents, reservation.destination_id, reservation.new_destination)
+
+    def _prune(self, now: float):
+        # Drop windows of accounts that have been idle for a whole window
+        oldest = int(now // self.rules.bucket_seconds) - self.window_buckets
+        for account_id in [key for key, window in self._windows.items() if window.head <= oldest]:
+            del self._windows[account_id]
+        self._records_since_prune = 0
+
+    def rebuild(self, db, now: Optional[float] = None) -> int:
+        """Replay the last window of debits from the ledger. Returns rows loaded."""
+        from app.models.all_models import Transaction, TransactionType
+
+        now = time.time() if now is None else now
+        since = datetime.fromtimestamp(now - self.rules.window_seconds, tz=timezone.utc).replace(tzinfo=None)
+        debit_types = (TransactionType.WITHDRAW.value, "transfer_out")
+
+        rows = (
+            db.query(Transaction.account_id, Transaction.amount, Transaction.timestamp)
+            .filter(Transaction.timestamp >= since, Transaction.type.in_(debit_types))
+            .order_by(Transaction.timestamp)
+            .yield_per(5000)
+        )
+        # Build aside and swap, so checks are not blocked while the ledger streams
+        windows: Dict[int, SlidingWindow] = {}
+        loaded = 0
+        for account_id, amount, timestamp in rows:
+            window = windows.get(account_id)
+            if window is None:
+                window = windows[account_id] = SlidingWindow(self.window_buckets, self.rules.bucket_seconds)
+            window.add(_epoch_seconds(timestamp), int(amount * 100))
+            loaded += 1
+
+        # Transfer rows don't store the counterparty, so known destinations
+        # start empty and are learned again as transfers happen.
+        with self._lock:
+            self._windows = windows
+            self.learning_since = now
+            self.generation += 1
+        return loaded
+
+
+def _epoch_seconds(timestamp: datetime) -> float:
+    # Ledger timestamps are stored as naive UTC
+    if timestamp.tzinfo is None:
+        timestamp = timestamp.replace(tzinfo=timezone.utc)
+    return timestamp.timestamp()
+
+
+engine = VelocityEngine(VelocityRules.from_settings())
+
+
+@contextmanager
+def reserve_debit(account_id: int, amount: Decimal, destination_id: Optional[int] = None) -> Iterator[None]:
+    """
+    Raise before any row lock is taken if the debit breaks a velocity rule;
+    otherwise count it immediately and take it back if the block raises
+    (insufficient funds, failed commit).
+    """
+    if not settings.FRAUD_ENABLED:
+        yield
+        return
+    reason, reservation = engine.reserve(account_id, amount, destination_id)
+    if reason:
+        raise HTTPException(status_code=403, detail=reason)
+    try:
+        yield
+    except BaseException:
+        engine.release(reservation)
+        raise
+
+
+def rebuild_from_ledger():
+    from app.core.database import SessionLocal
+
+    db = SessionLocal()
+    try:
+        start = time.perf_counter()
+        loaded = engine.rebuild(db)
+        logger.info("Velocity state rebuilt from %d transactions in %.1f ms", loaded, (time.perf_counter() - start) * 1000)
+    finally:
+        db.close()
@@ -2,7 +2,7 @@ from sqlalchemy.orm import Session
 from app.models.all_models import Account, Loan, Transaction, TransactionType
 from fastapi import HTTPException
 from decimal import Decimal
-from app.services import transaction_service
+from app.services import audit_service, transaction_service
 
 def request_loan(db: Session, account_id: int, amount: Decimal, installments: int):
     account = db.query(Account).filter(Account.id == account_id).with_for_update().first()
@@ -50,6 +50,10 @@ def request_loan(db: Session, account_id: int, amount: Decimal, installments: in
         balance_after=account.balance
     )
     db.add(transaction)
+    audit_service.record_event(
+        db, account, "loan_disbursed", amount, account.balance, transaction,
+        installments=installments, total_to_pay=total_to_pay
+    )
 
     db.commit()
     db.refresh(loan)
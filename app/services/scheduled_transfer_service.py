@@ -0,0 +1,350 @@
+import calendar
+import logging
+import time
+import uuid
+from collections import defaultdict
+from concurrent.futures import ThreadPoolExecutor
+from dataclasses import dataclass, field
+from datetime import date, datetime, timedelta, timezone
+from decimal import Decimal
+from typing import Callable, Dict, List, Optional, Tuple
+
+from fastapi import HTTPException
+from sqlalchemy.orm import Session
+
+from app.core import fx
+from app.core.config import settings
+from app.models.all_models import Account
+from app.models.scheduled_models import ScheduledTransfer, ScheduledTransferRun
+from app.services import fraud_service, transaction_service
+
+logger = logging.getLogger(__name__)
+
+FREQUENCIES = ("once", "monthly")
+
+
+def _utc(value: datetime) -> datetime:
+    # Naive datetimes (SQLite, clients without an offset) are taken as UTC
+    return value.replace(tzinfo=timezone.utc) if value.tzinfo is None else value.astimezone(timezone.utc)
+
+
+def next_monthly(current: datetime, day_of_month: int) -> datetime:
+    """Same time of day on `day_of_month` of the next month, clamped to the month's length."""
+    year, month = (current.year + 1, 1) if current.month == 12 else (current.year, current.month + 1)
+    return current.replace(year=year, month=month, day=min(day_of_month, calendar.monthrange(year, month)[1]))
+
+
+# --- User-facing operations ---
+
+def create(
+    db: Session,
+    account_id: int,
+    destination_account: str,
+    amount: Decimal,
+    run_at: datetime,
+    frequency: str = "once",
+    end_date: Optional[date] = None,
+    category: str = "Transferência",
+    currency: str = "BRL",
+    destination_currency: Optional[str] = None,
+):
+    if amount <= 0:
+        raise HTTPException(status_code=400, detail="Transfer amount must be positive.")
+    if frequency not in FREQUENCIES:
+        raise HTTPException(status_code=400, detail=f"Frequency must be one of: {', '.join(FREQUENCIES)}.")
+    run_at = _utc(run_at)
+    if run_at < datetime.now(timezone.utc) - timedelta(minutes=1):
+        raise HTTPException(status_code=400, detail="A data do agendamento deve ser futura.")
+    if end_date and end_date < run_at.date():
+        raise HTTPException(status_code=400, detail="end_date must not be before the first run.")
+
+    dest = db.query(Account).filter(Account.number == destination_account).first()
+    if not dest:
+        raise HTTPException(status_code=404, detail="Destination account not found.")
+    if dest.id == account_id and currency == (destination_currency or currency):
+        raise HTTPException(status_code=400, detail="Cannot transfer to the same account.")
+
+    # Scheduled debits skip the velocity rules when they run (see execute()),
+    # so placing the order is what counts against the account's window
+    velocity_amount = amount
+    if currency != fx.BASE_CURRENCY:
+        try:
+            velocity_amount = transaction_service._fx_snapshot().convert(amount, currency, fx.BASE_CURRENCY)
+        except fx.FxError:
+            raise HTTPException(status_code=400, detail=f"Moeda não suportada: {currency}.")
+    own_account = dest.id == account_id
+    with fraud_service.reserve_debit(account_id, velocity_amount, None if own_account else dest.id):
+        scheduled = ScheduledTransfer(
+            account_id=account_id,
+            destination_account=destination_account,
+            amount=amount,
+            currency=currency,
+            destination_currency=destination_currency,
+            category=category,
+            frequency=frequency,
+            day_of_month=run_at.day if frequency == "monthly" else None,
+            end_date=end_date,
+            occurrence_at=run_at,
+            next_run_at=run_at,
+            status="active",
+        )
+        db.add(scheduled)
+        db.commit()
+    db.refresh(scheduled)
+    return scheduled
+
+
+def list_for_account(db: Session, account_id: int):
+    return db.query(ScheduledTransfer).filter(
+        ScheduledTransfer.account_id == account_id
+    ).order_by(ScheduledTransfer.next_run_at).all()
+
+
+def get_runs(db: Session, account_id: int, scheduled_id: int):
+    scheduled = _get_own(db, account_id, scheduled_id)
+    return db.query(ScheduledTransferRun).filter(
+        ScheduledTransferRun.scheduled_transfer_id == scheduled.id
+    ).order_by(ScheduledTransferRun.executed_at.desc()).all()
+
+
+def cancel(db: Session, account_id: int, scheduled_id: int):
+    # Locks the row, so an execution in progress finishes first
+    scheduled = _get_own(db, account_id, scheduled_id, lock=True)
+    if scheduled.status != "active":
+        raise HTTPException(status_code=400, detail=f"Scheduled transfer is {scheduled.status}.")
+    scheduled.status = "cancelled"
+    scheduled.lease_token = None
+    db.commit()
+    db.refresh(scheduled)
+    return scheduled
+
+
+def _get_own(db: Session, account_id: int, scheduled_id: int, lock: bool = False) -> ScheduledTransfer:
+    query = db.query(ScheduledTransfer).filter(
+        ScheduledTransfer.id == scheduled_id, ScheduledTransfer.account_id == account_id
+    )
+    scheduled = (query.with_for_update() if lock else query).first()
+    if not scheduled:
+        raise HTTPException(status_code=404, detail="Scheduled transfer not found.")
+    return scheduled
+
+
+# --- Scheduler ---
+
+@dataclass
+class SchedulerRunResult:
+    claimed: int = 0
+    succeeded: int = 0
+    retrying: int = 0
+    failed: int = 0
+    expired: int = 0
+    skipped: int = 0  # cancelled or re-claimed by another runner meanwhile
+    batches: int = 0
+    max_lag_seconds: float = 0.0  # from due time to execution
+    seconds: float = 0.0
+    outcomes: Dict[str, int] = field(default_factory=dict)
+
+    @property
+    def per_second(self) -> float:
+        return self.claimed / self.seconds if self.seconds else 0.0
+
+
+def claim_due(db: Session, now: datetime, batch_size: int) -> Tuple[str, List[Tuple[int, int, datetime]]]:
+    """
+    Take up to batch_size due orders, oldest first, through the
+    (status, next_run_at) index. SKIP LOCKED lets several runners claim
+    disjoint batches; pushing next_run_at out by the lease hides the orders
+    from other runners until they are executed (or the lease runs out).
+    """
+    due = (
+        db.query(ScheduledTransfer.id, ScheduledTransfer.account_id, ScheduledTransfer.next_run_at)
+        .filter(ScheduledTransfer.status == "active", ScheduledTransfer.next_run_at <= now)
+        .order_by(ScheduledTransfer.next_run_at)
+        .limit(batch_size)
+        .with_for_update(skip_locked=True)
+        .all()
+    )
+    token = uuid.uuid4().hex
+    if due:
+        db.query(ScheduledTransfer).filter(ScheduledTransfer.id.in_([row.id for row in due])).update(
+            {
+                ScheduledTransfer.next_run_at: now + timedelta(seconds=settings.SCHEDULED_LEASE_SECONDS),
+                ScheduledTransfer.lease_token: token,
+            },
+            synchronize_session=False,
+        )
+    db.commit()
+    return token, [(row.id, row.account_id, _utc(row.next_run_at)) for row in due]
+
+
+def _advance(scheduled: ScheduledTransfer):
+    """Move to the next occurrence, or finish the order."""
+    scheduled.attempts = 0
+    scheduled.lease_token = None
+    if scheduled.frequency == "monthly":
+        following = next_monthly(_utc(scheduled.occurrence_at), scheduled.day_of_month)
+        if scheduled.end_date is None or following.date() <= scheduled.end_date:
+            scheduled.occurrence_at = following
+            scheduled.next_run_at = following
+            return
+    if scheduled.status == "active":
+        scheduled.status = "completed"
+
+
+def execute(db: Session, scheduled_id: int, token: str, now: datetime) -> str:
+    """
+    Run one claimed order. The order's next state and its run record are
+    written in the same database transaction as the transfer itself, so an
+    occurrence can't be paid twice or advanced without being paid.
+    """
+    scheduled = db.query(ScheduledTransfer).filter(ScheduledTransfer.id == scheduled_id).with_for_update().first()
+    if scheduled is None or scheduled.status != "active" or scheduled.lease_token != token:
+        db.rollback()
+        return "skipped"
+
+    occurrence = _utc(scheduled.occurrence_at)
+    attempt = scheduled.attempts + 1
+    scheduled.last_run_at = now
+
+    if (now - occurrence).total_seconds() > settings.SCHEDULED_MAX_DELAY_SECONDS:
+        db.add(ScheduledTransferRun(scheduled_transfer_id=scheduled.id, occurrence_at=occurrence, attempt=attempt,
+                                    status="expired", error="Execution window missed.", executed_at=now))
+        scheduled.last_error = "Execution window missed."
+        if scheduled.frequency == "once":
+            scheduled.status = "failed"
+        _advance(scheduled)
+        db.commit()
+        return "expired"
+
+    db.add(ScheduledTransferRun(scheduled_transfer_id=scheduled.id, occurrence_at=occurrence, attempt=attempt,
+                                status="succeeded", executed_at=now))
+    scheduled.last_error = None
+    _advance(scheduled)
+    try:
+        # transfer() commits the pending changes above together with the money movement
+        transaction_service.transfer(
+            db,
+            from_account_id=scheduled.account_id,
+            to_account_number=scheduled.destination_account,
+            amount=scheduled.amount,
+            category=scheduled.category,
+            currency=scheduled.currency,
+            destination_currency=scheduled.destination_currency,
+            # The velocity rules were applied when the order was created (see create());
+            # a month-start batch must not trip the hourly limits a second time
+            check_velocity=False,
+        )
+        return "succeeded"
+    except HTTPException as e:
+        db.rollback()
+        return _record_failure(db, scheduled_id, token, occurrence, attempt, now, str(e.detail))
+
+
+def _record_failure(db: Session, scheduled_id: int, token: str, occurrence: datetime,
+                    attempt: int, now: datetime, error: str) -> str:
+    scheduled = db.query(ScheduledTransfer).filter(ScheduledTransfer.id == scheduled_id).with_for_update().first()
+    if scheduled is None or scheduled.lease_token != token:
+        db.rollback()
+        return "skipped"
+
+    delays = settings.SCHEDULED_RETRY_DELAYS
+    retry_at = now + timedelta(seconds=delays[attempt - 1]) if attempt <= len(delays) else None
+    # Only a lack of funds is worth retrying; a missing account or an unsupported currency won't fix itself
+    retryable = error == transaction_service.INSUFFICIENT_FUNDS_FOR_TRANSFER
+    within_window = retry_at is not None and (retry_at - occurrence).total_seconds() <= settings.SCHEDULED_MAX_DELAY_SECONDS
+
+    scheduled.last_run_at = now
+    scheduled.last_error = error
+    if retryable and within_window:
+        outcome = "retrying"
+        scheduled.attempts = attempt
+        scheduled.next_run_at = retry_at
+        scheduled.lease_token = None
+    else:
+        outcome = "failed"
+        if scheduled.frequency == "once":
+            scheduled.status = "failed"
+        _advance(scheduled)
+    db.add(ScheduledTransferRun(scheduled_transfer_id=scheduled.id, occurrence_at=occurrence, attempt=attempt,
+                                status=outcome, error=error, executed_at=now))
+    db.commit()
+    return outcome
+
+
+def _session_factory() -> Callable[[], Session]:
+    from app.core.database import SessionLocal
+    return SessionLocal
+
+
+def run_due(
+    clock: Optional[Callable[[], datetime]] = None,
+    session_factory: Optional[Callable[[], Session]] = None,
+    workers: Optional[int] = None,
+    batch_size: Optional[int] = None,
+    max_seconds: Optional[float] = None,
+) -> SchedulerRunResult:
+    """
+    Execute due orders until none are left (or max_seconds has passed).
+    Each batch is grouped by source account: accounts run in parallel,
+    each account's orders run one after the other in due order, so
+    they never compete for the same account lock.
+    """
+    clock = clock or (lambda: datetime.now(timezone.utc))
+    session_factory = session_factory or _session_factory()
+    workers = workers or settings.SCHEDULED_WORKERS
+    batch_size = batch_size or settings.SCHEDULED_BATCH_SIZE
+    result = SchedulerRunResult()
+    outcomes: Dict[str, int] = defaultdict(int)
+    start = time.perf_counter()
+
+    def run_account(args: Tuple[str, List[Tuple[int, datetime]]]) -> List[Tuple[str, float]]:
+        token, orders = args
+        session = session_factory()
+        done = []
+        try:
+            for scheduled_id, due_at in orders:
+                executed_at = clock()
+                try:
+                    outcome = execute(session, scheduled_id, token, executed_at)
+                except Exception:
+                    # Lease expires and the order is picked up again
+                    session.rollback()
+                    logger.exception("Scheduled transfer %s failed unexpectedly", scheduled_id)
+                    outcome = "error"
+                done.append((outcome, (executed_at - due_at).total_seconds()))
+        finally:
+            session.close()
+        return done
+
+    with ThreadPoolExecutor(max_workers=workers) as pool:
+        while max_seconds is None or time.perf_counter() - start < max_seconds:
+            db = session_factory()
+            try:
+                token, claimed = claim_due(db, clock(), batch_size)
+            finally:
+                db.close()
+            if not claimed:
+                break
+
+            by_account: Dict[int, List[Tuple[int, datetime]]] = defaultdict(list)
+            for scheduled_id, account_id, due_at in claimed:
+                by_account[account_id].append((scheduled_id, due_at))
+            for done in pool.map(run_account, [(token, orders) for orders in by_account.values()]):
+                for outcome, lag in done:
+                    outcomes[outcome] += 1
+                    result.max_lag_seconds = max(result.max_lag_seconds, lag)
+            result.claimed += len(claimed)
+            result.batches += 1
+
+    result.seconds = time.perf_counter() - start
+    result.outcomes = dict(outcomes)
+    result.succeeded = outcomes["succeeded"]
+    result.retrying = outcomes["retrying"]
+    result.failed = outcomes["failed"]
+    result.expired = outcomes["expired"]
+    result.skipped = outcomes["skipped"]
+    logger.info(
+        "Scheduled transfers: %d claimed in %d batches, %.2fs (%.0f/s): %s",
+        result.claimed, result.batches, result.seconds, result.per_second, result.outcomes,
+    )
+    return result
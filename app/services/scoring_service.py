@@ -0,0 +1,331 @@
+import logging
+import os
+import time
+from collections import deque
+from concurrent.futures import ProcessPoolExecutor
+from dataclasses import dataclass, field
+from datetime import datetime, timedelta, timezone
+from decimal import ROUND_DOWN, Decimal
+from typing import Callable, Dict, Iterator, List, Optional
+
+from sqlalchemy import bindparam, func, insert, select, update
+from sqlalchemy.orm import Session
+
+from app.core.config import settings
+from app.models.all_models import Account, CreditAnalysis, Loan, Transaction
+from app.models.audit_models import AuditEvent
+
+logger = logging.getLogger(__name__)
+
+
+@dataclass
+class AccountFeatures:
+    account_id: int
+    credit_limit: Decimal
+    movement: Decimal          # ledger volume in the lookback window
+    average_balance: Decimal   # mean balance_after in the lookback window
+    transaction_count: int
+    loan_exposure: Decimal     # total_to_pay of active loans
+    monthly_income: Decimal    # from the latest credit application
+    assets_value: Decimal
+    age: int
+    mother_name: str
+    previous_score: int
+    previous_status: str
+
+
+@dataclass
+class ScoreResult:
+    account_id: int
+    score: int
+    status: str
+    approved_limit: Decimal
+
+
+# Local scorecard (0-1000), same business rules given to the Gemini analyst:
+# low income is rejected and the limit is 20%-50% of the monthly income.
+BASE_POINTS = 250
+MIN_APPROVAL_SCORE = 500
+MIN_APPROVAL_INCOME = Decimal("1000")
+LIMIT_STEP = Decimal("10")
+MOVEMENT_LIMIT_SHARE = Decimal("0.20")
+
+
+def score(features: AccountFeatures, lookback_days: int) -> ScoreResult:
+    income = max(features.monthly_income, Decimal("0"))
+    months = max(Decimal(lookback_days) / 30, 1)
+
+    points = BASE_POINTS
+    points += 250 * min(income / 10_000, 1)
+    points += 100 * min(features.assets_value / 200_000, 1)
+    points += 40 if features.age < 26 else (100 if features.age <= 60 else 70)
+    if income:
+        points += 150 * min(features.movement / (income * months), 1)
+        points += 150 * min(max(features.average_balance, 0) / income, 1)
+        # Debt-to-income over a year of income
+        points -= 250 * min(features.loan_exposure / (income * 12), 1)
+    value = int(max(0, min(1000, round(points))))
+
+    if value < MIN_APPROVAL_SCORE or income < MIN_APPROVAL_INCOME:
+        return ScoreResult(features.account_id, value, "rejected", Decimal("0"))
+
+    share = Decimal("0.2") + Decimal("0.3") * (value - MIN_APPROVAL_SCORE) / (1000 - MIN_APPROVAL_SCORE)
+    # Same movement rule used when issuing the card
+    limit = max(income * share, features.movement * MOVEMENT_LIMIT_SHARE)
+    # Round down to a step so small ledger changes don't churn limits every night
+    limit = (limit / LIMIT_STEP).to_integral_value(rounding=ROUND_DOWN) * LIMIT_STEP
+    return ScoreResult(features.account_id, value, "approved", limit)
+
+
+def score_chunk(chunk: List[AccountFeatures], lookback_days: int) -> List[ScoreResult]:
+    # Module-level so it can run in a worker process
+    return [score(features, lookback_days) for features in chunk]
+
+
+def _money(value) -> Decimal:
+    # Aggregates come back as Decimal, int or float depending on the dialect
+    return Decimal(str(value or 0))
+
+
+def iter_feature_chunks(db: Session, chunk_size: int, since: datetime) -> Iterator[List[AccountFeatures]]:
+    """
+    Stream accounts that have a credit analysis, with their ledger aggregates,
+    in keyset-paginated chunks. Each chunk costs four range queries on
+    account_id regardless of the portfolio size.
+    """
+    after = 0
+    while True:
+        accounts = db.execute(
+            select(Account.id, Account.credit_limit)
+            .where(Account.id > after)
+            .order_by(Account.id)
+            .limit(chunk_size)
+        ).all()
+        if not accounts:
+            return
+        first, last = accounts[0].id, accounts[-1].id
+        after = last
+
+        ranked = (
+            select(
+                CreditAnalysis.account_id,
+                CreditAnalysis.age,
+                CreditAnalysis.mother_name,
+                CreditAnalysis.monthly_income,
+                CreditAnalysis.assets_value,
+                CreditAnalysis.score,
+                CreditAnalysis.status,
+                func.row_number().over(
+                    partition_by=CreditAnalysis.account_id,
+                    order_by=(CreditAnalysis.timestamp.desc(), CreditAnalysis.id.desc()),
+                ).label("rn"),
+            )
+            .where(CreditAnalysis.account_id.between(first, last))
+            .subquery()
+        )
+        analyses = {row.account_id: row for row in db.execute(select(ranked).where(ranked.c.rn == 1))}
+
+        ledger = {
+            row.account_id: row for row in db.execute(
+                select(
+                    Transaction.account_id,
+                    func.coalesce(func.sum(func.abs(Transaction.amount)), 0).label("movement"),
+                    func.coalesce(func.avg(Transaction.balance_after), 0).label("average_balance"),
+                    func.count(Transaction.id).label("transactions"),
+                )
+                .where(Transaction.account_id.between(first, last), Transaction.timestamp >= since)
+                .group_by(Transaction.account_id)
+            )
+        }
+        exposure = dict(db.execute(
+            select(Loan.account_id, func.sum(Loan.total_to_pay))
+            .where(Loan.account_id.between(first, last), Loan.status == "active")
+            .group_by(Loan.account_id)
+        ).all())
+
+        chunk = []
+        for account in accounts:
+            analysis = analyses.get(account.id)
+            if analysis is None:
+                # Never applied for credit: there is no income to score against
+                continue
+            activity = ledger.get(account.id)
+            chunk.append(AccountFeatures(
+                account_id=account.id,
+                credit_limit=_money(account.credit_limit),
+                movement=_money(activity.movement) if activity else Decimal("0"),
+                average_balance=_money(activity.average_balance) if activity else Decimal("0"),
+                transaction_count=activity.transactions if activity else 0,
+                loan_exposure=_money(exposure.get(account.id)),
+                monthly_income=_money(analysis.monthly_income),
+                assets_value=_money(analysis.assets_value),
+                age=analysis.age or 0,
+                mother_name=analysis.mother_name,
+                previous_score=analysis.score or 0,
+                previous_status=analysis.status,
+            ))
+        if chunk:
+            yield chunk
+
+
+@dataclass
+class RescoreResult:
+    accounts: int = 0
+    changed: int = 0
+    limit_increased: int = 0
+    limit_decreased: int = 0
+    status_changed: int = 0
+    score_delta_total: int = 0
+    conflicts: int = 0       # limit changed by someone else while the chunk was scored
+    seconds: float = 0.0
+    largest_changes: List[Dict] = field(default_factory=list)
+
+    @property
+    def accounts_per_second(self) -> float:
+        return self.accounts / self.seconds if self.seconds else 0.0
+
+
+def _feedback(result: ScoreResult) -> str:
+    if result.status == "approved":
+        return f"Reavaliação automática: limite de R$ {result.approved_limit:.2f} com score {result.score}."
+    return f"Reavaliação automática: crédito suspenso (score {result.score})."
+
+
+def _write_chunk(db: Session, chunk: List[AccountFeatures], results: List[ScoreResult],
+                 report: RescoreResult, dry_run: bool, on_diff: Optional[Callable[[Dict], None]]):
+    candidates = []
+    for features, result in zip(chunk, results):
+        report.accounts += 1
+        old_limit = features.credit_limit.quantize(Decimal("0.01"))
+        new_limit = result.approved_limit.quantize(Decimal("0.01"))
+        if result.score != features.previous_score or result.status != features.previous_status or new_limit != old_limit:
+            candidates.append((features, result, old_limit, new_limit))
+
+    # Lock the accounts whose limit moves and skip those changed since the
+    # chunk was read (e.g. a /credit/apply meanwhile); they keep their limit
+    # and get no new analysis
+    conflicts = set()
+    moving = {features.account_id: old for features, _, old, new in candidates if new != old}
+    if moving and not dry_run:
+        current = db.execute(
+            select(Account.id, Account.credit_limit).where(Account.id.in_(list(moving))).with_for_update()
+        ).all()
+        conflicts = {row.id for row in current if _money(row.credit_limit).quantize(Decimal("0.01")) != moving[row.id]}
+        conflicts |= set(moving) - {row.id for row in current}
+        report.conflicts += len(conflicts)
+
+    analyses, limits, events = [], [], []
+    for features, result, old_limit, new_limit in candidates:
+        if features.account_id in conflicts:
+            continue
+        diff = {
+            "account_id": features.account_id,
+            "score": [features.previous_score, result.score],
+            "status": [features.previous_status, result.status],
+            "credit_limit": [str(old_limit), str(new_limit)],
+        }
+        report.changed += 1
+        report.score_delta_total += result.score - features.previous_score
+        report.status_changed += result.status != features.previous_status
+        report.limit_increased += new_limit > old_limit
+        report.limit_decreased += new_limit < old_limit
+        report.largest_changes.append(diff)
+        if on_diff:
+            on_diff(diff)
+
+        analyses.append({
+            "account_id": features.account_id,
+            "age": features.age,
+            "mother_name": features.mother_name,
+            "monthly_income": features.monthly_income,
+            "assets_value": features.assets_value,
+            "status": result.status,
+            "ai_feedback": _feedback(result),
+            "approved_limit": new_limit,
+            "score": result.score,
+        })
+        if new_limit != old_limit:
+            limits.append({"b_id": features.account_id, "b_limit": new_limit})
+            events.append({
+                "account_id": features.account_id,
+                "type": "limit_changed",
+                "amount": Decimal("0"),
+                "data": {"old": str(old_limit), "new": str(new_limit), "source": "rescoring"},
+            })
+
+    # Keep only the biggest limit moves for the summary
+    report.largest_changes.sort(key=lambda d: abs(Decimal(d["credit_limit"][1]) - Decimal(d["credit_limit"][0])), reverse=True)
+    del report.largest_changes[10:]
+
+    if dry_run or not analyses:
+        db.rollback()
+        return
+    db.execute(insert(CreditAnalysis.__table__), analyses)
+    if limits:
+        db.execute(
+            update(Account.__table__)
+            .where(Account.__table__.c.id == bindparam("b_id"))
+            .values(credit_limit=bindparam("b_limit")),
+            limits,
+        )
+        db.execute(insert(AuditEvent.__table__), events)
+    db.commit()
+
+
+def _session_factory() -> Callable[[], Session]:
+    from app.core.database import SessionLocal
+    return SessionLocal
+
+
+def rescore_portfolio(
+    session_factory: Optional[Callable[[], Session]] = None,
+    workers: Optional[int] = None,
+    chunk_size: Optional[int] = None,
+    dry_run: bool = False,
+    on_diff: Optional[Callable[[Dict], None]] = None,
+) -> RescoreResult:
+    """
+    Re-score every account with a credit analysis and recalculate its limit.
+    The main process streams chunks from the database and writes results,
+    while scoring runs in a process pool (workers=1 scores inline). Only
+    accounts whose score, status or limit changed get a new CreditAnalysis
+    row, so re-running on the same data writes nothing.
+    """
+    session_factory = session_factory or _session_factory()
+    workers = workers if workers is not None else settings.SCORING_WORKERS
+    workers = workers or os.cpu_count() or 1
+    chunk_size = chunk_size or settings.SCORING_CHUNK_SIZE
+    lookback_days = settings.SCORING_LOOKBACK_DAYS
+    since = datetime.now(timezone.utc) - timedelta(days=lookback_days)
+
+    report = RescoreResult()
+    start = time.perf_counter()
+    reader, writer = session_factory(), session_factory()
+    try:
+        chunks = iter_feature_chunks(reader, chunk_size, since)
+        if workers == 1:
+            for chunk in chunks:
+                _write_chunk(writer, chunk, score_chunk(chunk, lookback_days), report, dry_run, on_diff)
+        else:
+            # Bounded pipeline: read ahead a few chunks while earlier ones are scored
+            with ProcessPoolExecutor(max_workers=workers) as pool:
+                in_flight = deque()
+                for chunk in chunks:
+                    in_flight.append((chunk, pool.submit(score_chunk, chunk, lookback_days)))
+                    if len(in_flight) >= workers * 2:
+                        done, future = in_flight.popleft()
+                        _write_chunk(writer, done, future.result(), report, dry_run, on_diff)
+                while in_flight:
+                    done, future = in_flight.popleft()
+                    _write_chunk(writer, done, future.result(), report, dry_run, on_diff)
+    finally:
+        reader.close()
+        writer.close()
+
+    report.seconds = time.perf_counter() - start
+    logger.info(
+        "Re-scored %d accounts in %.2fs (%.0f/s): %d changed, %d limits up, %d down, %d status changes, %d skipped (limit changed meanwhile)",
+        report.accounts, report.seconds, report.accounts_per_second,
+        report.changed, report.limit_increased, report.limit_decreased, report.status_changed, report.conflicts,
+    )
+    return report
@@ -1,8 +1,18 @@
+from sqlalchemy import func
 from sqlalchemy.orm import Session
 from app.models.all_models import Account, Transaction, TransactionType
 from app.schemas.all_schemas import TransactionCreate
 from fastapi import HTTPException
+from contextlib import nullcontext
 from decimal import Decimal
+from typing import Optional
+from app.core import fx
+from app.core.config import settings
+from app.models.currency_models import AccountBalance, CurrencyTransaction
+from app.services import audit_service, fraud_service
+
+# Scheduled transfers retry on this error, so keep the message in one place
+INSUFFICIENT_FUNDS_FOR_TRANSFER = "Insufficient funds for transfer."
 
 def get_account_by_user_id(db: Session, user_id: int):
     return db.query(Account).filter(Account.user_id == user_id).first()
@@ -30,6 +40,7 @@ def deposit(db: Session, account_id: int, amount: Decimal, category: str = "Outr
         balance_after=account.balance
     )
     db.add(transaction)
+    audit_service.record_event(db, account, "deposit", amount, account.balance, transaction)
     
     # Commit transaction
     db.commit()
@@ -39,36 +50,61 @@ def deposit(db: Session, account_id: int, amount: Decimal, category: str = "Outr
 def withdraw(db: Session, account_id: int, amount: Decimal, category: str = "Outros"):
     if amount <= 0:
         raise HTTPException(status_code=400, detail="Withdrawal amount must be positive.")
-    
-    # Lock for update
-    account = db.query(Account).filter(Account.id == account_id).with_for_update().first()
-    if not account:
-        raise HTTPException(status_code=404, detail="Account not found.")
 
-    if account.balance < amount:
-        raise HTTPException(status_code=400, detail="Insufficient funds.")
+    # Velocity rules run in memory before we take any row lock; the debit is
+    # counted right away and taken back if anything below fails
+    with fraud_service.reserve_debit(account_id, amount):
+        # Lock for update
+        account = db.query(Account).filter(Account.id == account_id).with_for_update().first()
+        if not account:
+            raise HTTPException(status_code=404, detail="Account not found.")
 
-    account.balance -= amount
+        if account.balance < amount:
+            raise HTTPException(status_code=400, detail="Insufficient funds.")
 
-    transaction = Transaction(
-        account_id=account.id,
-        type=TransactionType.WITHDRAW.value,
-        amount=amount,
-        category=category,
-        balance_after=account.balance
-    )
-    db.add(transaction)
-    
-    db.commit()
+        account.balance -= amount
+
+        transaction = Transaction(
+            account_id=account.id,
+            type=TransactionType.WITHDRAW.value,
+            amount=amount,
+            category=category,
+            balance_after=account.balance
+        )
+        db.add(transaction)
+        audit_service.record_event(db, account, "withdraw", -amount, account.balance, transaction)
+
+        db.commit()
     db.refresh(transaction)
     return transaction
 
 def get_statement(db: Session, account_id: int):
-    return db.query(Transaction).filter(Transaction.account_id == account_id).order_by(Transaction.timestamp.desc()).all()
+    # Plain rows for the statement fast path (TransactionResponse); category
+    # is nullable in the table but not in the response
+    return db.query(
+        Transaction.id, Transaction.account_id, Transaction.type, Transaction.amount,
+        func.coalesce(Transaction.category, "Outros").label("category"),
+        Transaction.balance_after, Transaction.timestamp,
+    ).filter(Transaction.account_id == account_id).order_by(Transaction.timestamp.desc()).all()
 
-def transfer(db: Session, from_account_id: int, to_account_number: str, amount: Decimal, category: str = "Transferência"):
+def transfer(
+    db: Session,
+    from_account_id: int,
+    to_account_number: str,
+    amount: Decimal,
+    category: str = "Transferência",
+    currency: str = fx.BASE_CURRENCY,
+    destination_currency: Optional[str] = None,
+    check_velocity: bool = True,
+):
+    """
+    check_velocity=False skips the velocity (fraud) rules, for debits that
+    already went through them when they were authorized, such as scheduled
+    transfers (see scheduled_transfer_service.create).
+    """
     if amount <= 0:
         raise HTTPException(status_code=400, detail="Transfer amount must be positive.")
+    destination_currency = destination_currency or currency
     
     # Order locks by ID to prevent deadlocks
     # 1. Get destination account first (don't lock yet to see if it exists)
@@ -76,47 +112,171 @@ def transfer(db: Session, from_account_id: int, to_account_number: str, amount:
     if not dest_account:
         raise HTTPException(status_code=404, detail="Destination account not found.")
     
-    if from_account_id == dest_account.id:
+    # Moving money between one's own currencies is a conversion, not a transfer
+    if from_account_id == dest_account.id and currency == destination_currency:
         raise HTTPException(status_code=400, detail="Cannot transfer to the same account.")
 
-    # Sort IDs for locking order
-    ids = sorted([from_account_id, dest_account.id])
-    
-    # Lock both accounts
-    accounts_map = {
-        acc.id: acc for acc in db.query(Account).filter(Account.id.in_(ids)).with_for_update().all()
-    }
-    
-    source = accounts_map[from_account_id]
-    dest = accounts_map[dest_account.id]
+    if currency != fx.BASE_CURRENCY or destination_currency != fx.BASE_CURRENCY:
+        return _transfer_with_conversion(
+            db, from_account_id, dest_account.id, amount, category, currency, destination_currency, check_velocity
+        )
 
-    if source.balance < amount:
-        raise HTTPException(status_code=400, detail="Insufficient funds for transfer.")
+    # Velocity rules run in memory before we take any row lock; the debit is
+    # counted right away and taken back if anything below fails
+    with _velocity_reservation(check_velocity, from_account_id, amount, dest_account.id):
+        # Sort IDs for locking order
+        ids = sorted([from_account_id, dest_account.id])
 
-    # Perform transfer
-    source.balance -= amount
-    dest.balance += amount
+        # Lock both accounts
+        accounts_map = {
+            acc.id: acc for acc in db.query(Account).filter(Account.id.in_(ids)).with_for_update().all()
+        }
 
-    # Record transactions for both
-    tx_out = Transaction(
-        account_id=source.id,
-        type="transfer_out",
-        amount=amount,
-        category=category,
-        balance_after=source.balance
-    )
-    tx_in = Transaction(
-        account_id=dest.id,
-        type="transfer_in",
-        amount=amount,
-        category=category,
-        balance_after=dest.balance
-    )
-    
-    db.add(tx_out)
-    db.add(tx_in)
-    
-    db.commit()
+        source = accounts_map[from_account_id]
+        dest = accounts_map[dest_account.id]
+
+        if source.balance < amount:
+            raise HTTPException(status_code=400, detail=INSUFFICIENT_FUNDS_FOR_TRANSFER)
+
+        # Perform transfer
+        source.balance -= amount
+        dest.balance += amount
+
+        # Record transactions for both
+        tx_out = Transaction(
+            account_id=source.id,
+            type="transfer_out",
+            amount=amount,
+            category=category,
+            balance_after=source.balance
+        )
+        tx_in = Transaction(
+            account_id=dest.id,
+            type="transfer_in",
+            amount=amount,
+            category=category,
+            balance_after=dest.balance
+        )
+
+        db.add(tx_out)
+        db.add(tx_in)
+        audit_service.record_event(db, source, "transfer_out", -amount, source.balance, tx_out, counterparty=dest.id)
+        audit_service.record_event(db, dest, "transfer_in", amount, dest.balance, tx_in, counterparty=source.id)
+
+        db.commit()
     db.refresh(tx_out)
     return tx_out
 
+def _velocity_reservation(check_velocity: bool, account_id: int, amount: Decimal, destination_id: Optional[int]):
+    if not check_velocity:
+        return nullcontext()
+    return fraud_service.reserve_debit(account_id, amount, destination_id=destination_id)
+
+def _fx_snapshot() -> fx.FxSnapshot:
+    try:
+        snapshot = fx.current()
+    except fx.FxError:
+        raise HTTPException(status_code=503, detail="Câmbio indisponível no momento.")
+    if settings.FX_MAX_AGE_SECONDS and snapshot.age_seconds() > settings.FX_MAX_AGE_SECONDS:
+        raise HTTPException(status_code=503, detail="Cotações de câmbio desatualizadas. Tente novamente em instantes.")
+    return snapshot
+
+def get_balances(db: Session, account: Account):
+    balances = [{"currency": fx.BASE_CURRENCY, "balance": account.balance}]
+    balances += [
+        {"currency": row.currency, "balance": row.balance}
+        for row in db.query(AccountBalance).filter(AccountBalance.account_id == account.id).order_by(AccountBalance.currency)
+    ]
+    return balances
+
+def _move(db: Session, account: Account, currency: str, amount: Decimal, tx_type: str, category: str,
+          counterparty: int, **fx_details):
+    """
+    Apply a signed amount to one of the account's balances and write the ledger
+    entry. The caller must hold the Account row lock.
+    """
+    if currency == fx.BASE_CURRENCY:
+        if account.balance + amount < 0:
+            raise HTTPException(status_code=400, detail=INSUFFICIENT_FUNDS_FOR_TRANSFER)
+        account.balance += amount
+        entry = Transaction(
+            account_id=account.id,
+            type=tx_type,
+            amount=abs(amount),
+            category=category,
+            balance_after=account.balance
+        )
+    else:
+        balance = db.query(AccountBalance).filter(
+            AccountBalance.account_id == account.id, AccountBalance.currency == currency
+        ).first()
+        if (balance.balance if balance else 0) + amount < 0:
+            raise HTTPException(status_code=400, detail=INSUFFICIENT_FUNDS_FOR_TRANSFER)
+        if balance is None:
+            balance = AccountBalance(account_id=account.id, currency=currency, balance=Decimal("0"))
+            db.add(balance)
+        balance.balance += amount
+        entry = CurrencyTransaction(
+            account_id=account.id,
+            type=tx_type,
+            currency=currency,
+            amount=abs(amount),
+            balance_after=balance.balance,
+            category=category,
+            **fx_details
+        )
+    db.add(entry)
+    audit_service.record_event(
+        db, account, tx_type, amount, entry.balance_after,
+        entry if currency == fx.BASE_CURRENCY else None,
+        currency=currency, counterparty=counterparty, **fx_details
+    )
+    return entry
+
+def _transfer_with_conversion(
+    db: Session, from_account_id: int, dest_id: int, amount: Decimal, category: str, currency: str,
+    destination_currency: str, check_velocity: bool = True
+):
+    # One snapshot for the whole transfer so both legs use the same rates;
+    # no DB or network lookup is needed to convert
+    snapshot = _fx_snapshot()
+    try:
+        if amount != snapshot.round(amount, currency):
+            raise HTTPException(
+                status_code=400,
+                detail=f"{currency} amounts allow at most {-snapshot.quantum(currency).as_tuple().exponent} decimal places."
+            )
+        rate = snapshot.rate(currency, destination_currency)
+        credited = snapshot.convert(amount, currency, destination_currency)
+        # Velocity rules are expressed in the base currency
+        debited_base = snapshot.convert(amount, currency, fx.BASE_CURRENCY)
+    except fx.FxError:
+        raise HTTPException(status_code=400, detail=f"Moeda não suportada: {currency}->{destination_currency}.")
+    if credited <= 0:
+        raise HTTPException(status_code=400, detail="Amount is too small to convert.")
+
+    own_account = from_account_id == dest_id
+    with _velocity_reservation(check_velocity, from_account_id, debited_base, None if own_account else dest_id):
+        accounts_map = {
+            acc.id: acc for acc in db.query(Account).filter(Account.id.in_(sorted({from_account_id, dest_id}))).with_for_update().all()
+        }
+        source = accounts_map[from_account_id]
+        dest = accounts_map[dest_id]
+
+        tx_out = _move(
+            db, source, currency, -amount, "transfer_out", category, dest.id,
+            counter_currency=destination_currency, counter_amount=credited, rate=rate, fx_version=snapshot.version,
+        )
+        _move(
+            db, dest, destination_currency, credited, "transfer_in", category, source.id,
+            counter_currency=currency, counter_amount=amount, rate=rate, fx_version=snapshot.version,
+        )
+
+        db.commit()
+    db.refresh(tx_out)
+    # Conversion details for the response (not columns of the BRL ledger)
+    tx_out.currency = currency
+    tx_out.destination_currency = destination_currency
+    tx_out.converted_amount = credited
+    tx_out.rate = rate
+    return tx_out
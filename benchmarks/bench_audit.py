@@ -0,0 +1,151 @@
+"""
+Audit log replay and ledger verifier benchmark (app/services/audit_service.py).
+
+Creates a scratch database with N accounts, a consistent ledger and its
+audit events, corrupts a few known rows, then measures the streaming replay
+and the parallel verifier (events/sec, peak memory) and checks that exactly
+the corrupted accounts are reported.
+
+    python -m benchmarks.bench_audit --accounts 100000 --events-per-account 20 --workers 1 4
+    python -m benchmarks.bench_audit --database-url postgresql://.../bench_scratch
+"""
+import argparse
+import os
+import random
+import resource
+import sys
+import tempfile
+import time
+from decimal import Decimal
+
+from sqlalchemy import create_engine, insert, update
+from sqlalchemy.orm import sessionmaker
+
+from app.core.database import Base
+from app.models.all_models import Account, Transaction
+from app.models.audit_models import AuditEvent
+from app.services import audit_service
+from benchmarks.common import save_results
+
+
+def seed(engine, accounts: int, per_account: int, batch: int = 50_000):
+    rng = random.Random(13)
+    tx_id = event_id = 0
+    ledger, events, balances = [], [], []
+
+    def flush(conn):
+        conn.execute(insert(Account.__table__), balances)
+        conn.execute(insert(Transaction.__table__), ledger)
+        conn.execute(insert(AuditEvent.__table__), events)
+        balances.clear()
+        ledger.clear()
+        events.clear()
+
+    with engine.begin() as conn:
+        for account_id in range(1, accounts + 1):
+            event_id += 1
+            events.append({"id": event_id, "account_id": account_id, "type": "account_opened",
+                           "currency": "BRL", "amount": Decimal("0"), "balance_after": Decimal("0"),
+                           "transaction_id": None})
+            balance = Decimal("0")
+            for _ in range(per_account):
+                amount = Decimal(rng.randint(100, 100_000)) / 100
+                kind = "withdraw" if balance >= amount and rng.random() < 0.4 else "deposit"
+                signed = audit_service.signed_amount(kind, amount)
+                balance += signed
+                tx_id += 1
+                event_id += 1
+                ledger.append({"id": tx_id, "account_id": account_id, "type": kind, "amount": amount,
+                               "category": "Outros", "balance_after": balance})
+                events.append({"id": event_id, "account_id": account_id, "type": kind, "currency": "BRL",
+                               "amount": signed, "balance_after": balance, "transaction_id": tx_id})
+            balances.append({"id": account_id, "user_id": account_id, "number": f"{account_id:08d}",
+                             "balance": balance, "credit_limit": Decimal("0")})
+            if len(events) >= batch:
+                flush(conn)
+        if balances:
+            flush(conn)
+    return tx_id
+
+
+def corrupt(engine, accounts: int, transactions: int, count: int):
+    """Break `count` accounts in different ways; returns their ids."""
+    rng = random.Random(17)
+    broken = set()
+    with engine.begin() as conn:
+        for index in range(count):
+            if index % 2 == 0:
+                account_id = rng.randint(1, accounts)
+                conn.execute(update(Account.__table__).where(Account.__table__.c.id == account_id)
+                             .values(balance=Account.__table__.c.balance + 1))
+            else:
+                tx = rng.randint(1, transactions)
+                account_id = (tx - 1) // (transactions // accounts) + 1
+                conn.execute(update(Transaction.__table__).where(Transaction.__table__.c.id == tx)
+                             .values(balance_after=Transaction.__table__.c.balance_after + Decimal("0.01")))
+            broken.add(account_id)
+    return broken
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--accounts", type=int, default=100_000)
+    parser.add_argument("--events-per-account", type=int, default=20)
+    parser.add_argument("--workers", type=int, nargs="+", default=[1, 4])
+    parser.add_argument("--corrupt", type=int, default=10, help="accounts to corrupt")
+    parser.add_argument("--database-url", help="scratch database (default: temporary SQLite file)")
+    args = parser.parse_args(argv)
+
+    url = args.database_url or f"sqlite:///{os.path.join(tempfile.mkdtemp(), 'audit_bench.db')}"
+    engine = create_engine(url)
+    Base.metadata.create_all(engine)
+
+    start = time.perf_counter()
+    transactions = seed(engine, args.accounts, args.events_per_account)
+    print(f"seeded {args.accounts} accounts, {transactions} transactions and their events "
+          f"in {time.perf_counter() - start:.1f}s")
+    broken = corrupt(engine, args.accounts, transactions, args.corrupt)
+
+    db = sessionmaker(bind=engine)()
+    start = time.perf_counter()
+    replayed = sum(state.events for state in audit_service.replay(db))
+    replay_seconds = time.perf_counter() - start
+    db.close()
+    print(f"replay: {replayed} events in {replay_seconds:.2f}s -> {replayed / replay_seconds:,.0f} events/s")
+
+    runs = []
+    for workers in args.workers:
+        found = set()
+        result = audit_service.verify(workers=workers, database_url=url,
+                                      on_mismatch=lambda item: found.add(item["account_id"]))
+        exact = found == broken
+        runs.append({
+            "workers": workers,
+            "events": result.events,
+            "seconds": result.seconds,
+            "events_per_second": result.events_per_second,
+            "mismatches": result.mismatch_count,
+            "kinds": result.kinds,
+            "detected_exactly": exact,
+        })
+        print(f"verify {workers:>2} workers: {result.events_per_second:>10,.0f} events/s  "
+              f"{result.mismatch_count} mismatches in {len(found)} accounts "
+              f"({'OK' if exact else f'expected {len(broken)} accounts'})")
+
+    # ru_maxrss is in KiB on Linux; children covers the verifier processes
+    peak_mb = max(resource.getrusage(resource.RUSAGE_SELF).ru_maxrss,
+                  resource.getrusage(resource.RUSAGE_CHILDREN).ru_maxrss) / 1024
+    print(f"peak RSS: {peak_mb:.0f} MB")
+
+    save_results("audit", {
+        "config": {key: value for key, value in vars(args).items() if key != "database_url"},
+        "dialect": engine.dialect.name,
+        "replay_events_per_second": replayed / replay_seconds,
+        "runs": runs,
+        "peak_rss_mb": peak_mb,
+    })
+    return 0 if all(run["detected_exactly"] for run in runs) else 1
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,126 @@
+"""
+Billing cycle close benchmark (app/services/billing_service.py).
+
+Creates a scratch database with N cards and their card ledger for one month,
+then closes every cut-off day of the month (which bills every card once) and
+reports cards/sec. Also checks that a second run is a no-op (resumability).
+
+    python -m benchmarks.bench_billing --cards 100000 --transactions-per-card 8
+    python -m benchmarks.bench_billing --database-url postgresql://.../bench_scratch --workers 8
+
+SQLite serializes writers, so keep --workers 1 there; use PostgreSQL to
+measure parallel chunks.
+"""
+import argparse
+import os
+import random
+import sys
+import tempfile
+import time
+from datetime import date, datetime, timedelta, timezone
+from decimal import Decimal
+
+from sqlalchemy import create_engine, func, insert, select
+from sqlalchemy.orm import sessionmaker
+
+from app.core.database import Base
+from app.models.all_models import CreditCard
+from app.models.billing_models import CardInvoice, CardInvoiceItem
+from app.models.card_models import CardTransaction
+from app.services import billing_service
+from benchmarks.common import save_results
+
+CATEGORIES = ["Alimentação", "Transporte", "Lazer", "Saúde", "Compras", "Outros"]
+
+
+def seed(engine, cards: int, per_card: int, period_start: date, batch: int = 20_000):
+    rng = random.Random(7)
+    with engine.begin() as conn:
+        rows = [
+            {"id": i, "account_id": i, "card_number": f"**** **** **** {i % 10000:04d}",
+             "cvv_hash": "888", "expiry_date": "12/29", "limit": Decimal("5000"), "status": "active"}
+            for i in range(1, cards + 1)
+        ]
+        for start in range(0, len(rows), batch):
+            conn.execute(insert(CreditCard.__table__), rows[start:start + batch])
+
+        # Enough ledger to cover each card's cycle that ends inside the month
+        window_start = datetime.combine(period_start - timedelta(days=31), datetime.min.time(), tzinfo=timezone.utc)
+        buffer = []
+        for card_id in range(1, cards + 1):
+            for _ in range(per_card):
+                kind = rng.random()
+                amount = Decimal(rng.randint(500, 50_000)) / 100
+                buffer.append({
+                    "card_id": card_id,
+                    "type": "purchase" if kind < 0.85 else ("reversal" if kind < 0.9 else "payment"),
+                    "amount": amount if kind < 0.85 else -amount,
+                    "category": rng.choice(CATEGORIES),
+                    "description": "bench",
+                    "timestamp": window_start + timedelta(minutes=rng.randint(0, 62 * 24 * 60)),
+                })
+            if len(buffer) >= batch:
+                conn.execute(insert(CardTransaction.__table__), buffer)
+                buffer = []
+        if buffer:
+            conn.execute(insert(CardTransaction.__table__), buffer)
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--cards", type=int, default=100_000)
+    parser.add_argument("--transactions-per-card", type=int, default=8)
+    parser.add_argument("--month", type=lambda value: date.fromisoformat(value + "-01"), default=date(2026, 10, 1),
+                        help="YYYY-MM")
+    parser.add_argument("--workers", type=int, default=1)
+    parser.add_argument("--chunk-size", type=int, default=5000)
+    parser.add_argument("--database-url", help="scratch database (default: temporary SQLite file)")
+    args = parser.parse_args(argv)
+
+    url = args.database_url or f"sqlite:///{os.path.join(tempfile.mkdtemp(), 'billing_bench.db')}"
+    engine = create_engine(url)
+    Base.metadata.create_all(engine)
+    session_factory = sessionmaker(bind=engine)
+
+    start = time.perf_counter()
+    seed(engine, args.cards, args.transactions_per_card, args.month)
+    print(f"seeded {args.cards} cards x {args.transactions_per_card} ledger rows in {time.perf_counter() - start:.1f}s")
+
+    cutoffs = [args.month.replace(day=day) for day in range(1, billing_service.CYCLE_DAYS + 1)]
+    start = time.perf_counter()
+    invoices = 0
+    for cutoff in cutoffs:
+        invoices += billing_service.close_cycle(
+            cutoff, session_factory=session_factory, workers=args.workers, chunk_size=args.chunk_size,
+        ).invoices
+    elapsed = time.perf_counter() - start
+
+    rerun_start = time.perf_counter()
+    rerun = sum(
+        billing_service.close_cycle(cutoff, session_factory=session_factory, workers=args.workers).invoices
+        for cutoff in cutoffs
+    )
+    rerun_elapsed = time.perf_counter() - rerun_start
+
+    with engine.connect() as conn:
+        stored = conn.execute(select(func.count()).select_from(CardInvoice.__table__)).scalar()
+        items = conn.execute(select(func.count()).select_from(CardInvoiceItem.__table__)).scalar()
+
+    print(f"billed {invoices} cards ({items} category lines) in {elapsed:.2f}s -> {invoices / elapsed:,.0f} cards/s")
+    print(f"re-run: {rerun} new invoices in {rerun_elapsed:.2f}s ({'OK' if rerun == 0 and stored == invoices else 'NOT IDEMPOTENT'})")
+
+    save_results("billing", {
+        "config": {key: str(value) for key, value in vars(args).items() if key != "database_url"},
+        "dialect": engine.dialect.name,
+        "invoices": invoices,
+        "category_items": items,
+        "seconds": elapsed,
+        "cards_per_second": invoices / elapsed if elapsed else 0.0,
+        "rerun_seconds": rerun_elapsed,
+        "idempotent": rerun == 0 and stored == invoices,
+    })
+    return 0 if rerun == 0 and stored == invoices else 1
+
+
+if __name__ == "__main__":
+    sys.exit(main())
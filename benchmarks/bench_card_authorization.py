@@ -0,0 +1,143 @@
+"""
+Concurrent authorizations on a single card through card_service.authorize().
+
+Several processes - standing in for web workers - authorize purchases
+against the same card in a scratch database, the worst case for the
+card's running totals row. The card starts with a long captured history,
+which an authorization must not have to read. Checks that the holds never
+exceed the limit and reports authorizations/sec and approve/decline latency.
+
+    python -m benchmarks.bench_card_authorization --workers 1 4 --operations 2000
+    python -m benchmarks.bench_card_authorization --database-url postgresql://.../bench_scratch
+
+SQLite has no row locks; there every transaction starts with
+BEGIN IMMEDIATE, which serializes writers the way the row lock taken by the
+conditional UPDATE serializes authorizations of one card on PostgreSQL.
+"""
+import argparse
+import os
+import random
+import sys
+import tempfile
+import time
+from concurrent.futures import ProcessPoolExecutor
+from decimal import Decimal
+
+from fastapi import HTTPException
+from sqlalchemy import create_engine, event, func, insert, select
+from sqlalchemy.orm import sessionmaker
+
+from app.core.database import Base
+from app.models.all_models import CreditCard
+from app.models.card_models import CardAuthorization, CardLimit, CardTransaction
+from app.services import card_service
+from benchmarks.common import save_results, summarize_latencies
+
+CARD_ID = 1
+
+
+def _engine(url: str):
+    engine = create_engine(url)
+    if engine.dialect.name == "sqlite":
+        @event.listens_for(engine, "connect")
+        def _connect(dbapi_connection, _):
+            dbapi_connection.isolation_level = None
+            dbapi_connection.execute("PRAGMA busy_timeout = 30000")
+
+        @event.listens_for(engine, "begin")
+        def _begin(connection):
+            connection.exec_driver_sql("BEGIN IMMEDIATE")
+    return engine
+
+
+def _run(args):
+    url, seed, operations = args
+    engine = _engine(url)
+    db = sessionmaker(bind=engine)()
+    rng = random.Random(seed)
+    approved, declined = [], []
+    try:
+        for _ in range(operations):
+            card = db.get(CreditCard, CARD_ID)
+            amount = Decimal(rng.randint(1, 300))
+            start = time.perf_counter()
+            try:
+                card_service.authorize(db, card, amount, merchant="bench")
+                approved.append(time.perf_counter() - start)
+            except HTTPException:
+                declined.append(time.perf_counter() - start)
+    finally:
+        db.close()
+        engine.dispose()
+    return approved, declined
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--workers", type=int, nargs="+", default=[1, 4])
+    parser.add_argument("--operations", type=int, default=2000, help="authorizations per run")
+    parser.add_argument("--limit", type=Decimal, default=Decimal("50000"),
+                        help="card limit; by default it runs out partway through the run")
+    parser.add_argument("--history", type=int, default=100_000, help="captured purchases already on the card")
+    parser.add_argument("--database-url", help="scratch database (default: temporary SQLite file per run)")
+    args = parser.parse_args(argv)
+
+    runs = []
+    for workers in args.workers:
+        url = args.database_url or f"sqlite:///{os.path.join(tempfile.mkdtemp(), 'card_bench.db')}"
+        engine = _engine(url)
+        Base.metadata.create_all(engine)
+        with engine.begin() as conn:
+            for table in (CardLimit, CardTransaction, CardAuthorization):
+                conn.execute(table.__table__.delete().where(table.card_id == CARD_ID))
+            conn.execute(CreditCard.__table__.delete().where(CreditCard.id == CARD_ID))
+            # Each purchase is refunded, so the history leaves the whole limit available
+            conn.execute(insert(CreditCard.__table__), {
+                "id": CARD_ID, "account_id": CARD_ID, "card_number": "**** **** **** 0001",
+                "cvv_hash": "888", "expiry_date": "12/29", "limit": args.limit, "status": "active",
+            })
+            if args.history:
+                conn.execute(insert(CardTransaction.__table__), [
+                    {"card_id": CARD_ID, "type": kind, "amount": amount, "category": "Outros"}
+                    for _ in range(args.history // 2) for kind, amount in (("purchase", 10), ("reversal", -10))
+                ])
+
+        per_worker = args.operations // workers
+        start = time.perf_counter()
+        with ProcessPoolExecutor(max_workers=workers) as pool:
+            results = list(pool.map(_run, [(url, seed, per_worker) for seed in range(workers)]))
+        elapsed = time.perf_counter() - start
+
+        with engine.connect() as conn:
+            held = conn.execute(select(func.coalesce(func.sum(CardAuthorization.amount), 0)).where(
+                CardAuthorization.card_id == CARD_ID, CardAuthorization.status == "pending")).scalar()
+        engine.dispose()
+
+        approved = summarize_latencies([value for result in results for value in result[0]])
+        declined = summarize_latencies([value for result in results for value in result[1]])
+        total = per_worker * workers
+        overspent = Decimal(held) > args.limit
+        runs.append({
+            "workers": workers,
+            "authorizations": total,
+            "per_second": total / elapsed,
+            "approved": approved["count"],
+            "declined": declined["count"],
+            "approve_latency": approved,
+            "decline_latency": declined,
+            "held": str(held),
+            "overspent": overspent,
+        })
+        print(f"{workers:>3} workers: {total / elapsed:>8,.0f} auth/s  approve p50 {approved['p50_ms']:.2f} ms  "
+              f"decline p50 {declined['p50_ms']:.2f} ms  held {held} of {args.limit}  "
+              f"{'OVERSPENT' if overspent else 'OK'}")
+
+    save_results("card_authorization", {
+        "config": {"limit": str(args.limit), "operations": args.operations, "history": args.history},
+        "runs": runs,
+    })
+    return 1 if any(run["overspent"] for run in runs) else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
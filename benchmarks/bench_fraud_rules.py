@@ -0,0 +1,83 @@
+"""
+Velocity rule evaluation cost per transaction (app/services/fraud_service.py).
+
+Simulates debits spread over many accounts with a skewed distribution and
+times reserve() (check and count under one lock) per debit, plus memory used by the windows.
+
+    python -m benchmarks.bench_fraud_rules --accounts 100000 --debits 1000000
+"""
+import argparse
+import random
+import sys
+import time
+import tracemalloc
+from decimal import Decimal
+
+from app.services.fraud_service import VelocityEngine, VelocityRules
+from benchmarks.common import save_results
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--accounts", type=int, default=100_000)
+    parser.add_argument("--debits", type=int, default=500_000)
+    parser.add_argument("--window", type=int, default=3600)
+    parser.add_argument("--bucket", type=int, default=60)
+    args = parser.parse_args(argv)
+
+    rules = VelocityRules(
+        window_seconds=args.window, bucket_seconds=args.bucket,
+        max_amount=Decimal("50000"), max_count=30, max_new_destinations=5,
+        spike_multiplier=Decimal("10"), spike_min_amount=Decimal("1000"), spike_min_history=5,
+    )
+
+    rng = random.Random(42)
+    # Pre-generate inputs so only the engine is timed
+    now = time.time() - args.window
+    step = args.window / args.debits
+    debits = []
+    for i in range(args.debits):
+        # 10% of debits come from a small set of very active accounts
+        account = rng.randrange(100) if rng.random() < 0.1 else rng.randrange(args.accounts)
+        destination = rng.randrange(args.accounts) if rng.random() < 0.6 else None
+        debits.append((account, Decimal(rng.randint(1, 2000)), destination, now + i * step))
+
+    def run(engine):
+        # Pretend the engine has been learning destinations for a full window
+        engine.learning_since = now - args.window
+        blocked = 0
+        start = time.perf_counter()
+        for account, amount, destination, at in debits:
+            reason, _ = engine.reserve(account, amount, destination, now=at)
+            if reason:
+                blocked += 1
+        return time.perf_counter() - start, blocked
+
+    elapsed, blocked = run(VelocityEngine(rules))
+
+    # Second pass only to measure memory; tracemalloc slows everything down
+    tracemalloc.start()
+    engine = VelocityEngine(rules)
+    run(engine)
+    _, peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+
+    per_debit_us = elapsed / args.debits * 1e6
+    print(f"{args.debits} debits over {args.accounts} accounts: {per_debit_us:.2f} us per reserve "
+          f"({args.debits / elapsed:,.0f}/s), {blocked} blocked")
+    print(f"windows: {len(engine._windows)}, peak memory {peak / 1024 / 1024:.1f} MiB")
+
+    save_results("fraud_rules", {
+        "accounts": args.accounts,
+        "debits": args.debits,
+        "us_per_debit": per_debit_us,
+        "debits_per_second": args.debits / elapsed,
+        "blocked": blocked,
+        "windows": len(engine._windows),
+        "peak_memory_mib": peak / 1024 / 1024,
+    })
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,128 @@
+"""
+FX conversion throughput (app/core/fx.py).
+
+Converts random amounts between random currency pairs with the in-memory
+snapshot, compares it with reading both rates from a table on every call
+(in-memory SQLite, so this is the best case for a database lookup), and
+repeats the run while another thread keeps installing new snapshots, to
+show refreshes don't slow down or break conversions.
+
+    python -m benchmarks.bench_fx --conversions 500000 --currencies 30
+"""
+import argparse
+import random
+import sqlite3
+import sys
+import threading
+import time
+from datetime import datetime, timezone
+from decimal import ROUND_HALF_EVEN, Decimal
+
+from app.core import fx
+from benchmarks.common import save_results
+
+CODES = ["USD", "EUR", "GBP", "JPY", "ARS", "CLP", "MXN", "CAD", "CHF", "AUD", "CNY", "KWD", "BHD", "COP", "PEN"]
+
+
+def make_document(currencies: int, rng: random.Random) -> dict:
+    codes = CODES + [f"X{i:02d}" for i in range(max(0, currencies - len(CODES)))]
+    return {
+        "base": fx.BASE_CURRENCY,
+        "as_of": datetime.now(timezone.utc).isoformat(),
+        "rates": {code: str(Decimal(rng.uniform(0.001, 30)).quantize(Decimal("0.000001"))) for code in codes[:currencies]},
+    }
+
+
+def workload(snapshot: fx.FxSnapshot, count: int, rng: random.Random):
+    currencies = sorted(snapshot.rates)
+    ops = []
+    for _ in range(count):
+        source, target = rng.sample(currencies, 2)
+        amount = snapshot.round(Decimal(rng.randint(1, 10_000_000)) / 100, source)
+        ops.append((amount, source, target))
+    return ops
+
+
+def run_snapshot(ops) -> float:
+    start = time.perf_counter()
+    for amount, source, target in ops:
+        fx.current().convert(amount, source, target)
+    return time.perf_counter() - start
+
+
+def run_table_lookup(ops, rates, quanta) -> float:
+    conn = sqlite3.connect(":memory:")
+    conn.execute("CREATE TABLE fx_rates (currency TEXT PRIMARY KEY, rate TEXT)")
+    conn.executemany("INSERT INTO fx_rates VALUES (?, ?)", [(code, str(rate)) for code, rate in rates.items()])
+    query = "SELECT currency, rate FROM fx_rates WHERE currency IN (?, ?)"
+    start = time.perf_counter()
+    for amount, source, target in ops:
+        found = dict(conn.execute(query, (source, target)).fetchall())
+        (amount * Decimal(found[source]) / Decimal(found[target])).quantize(quanta[target], rounding=ROUND_HALF_EVEN)
+    elapsed = time.perf_counter() - start
+    conn.close()
+    return elapsed
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--conversions", type=int, default=500_000)
+    parser.add_argument("--currencies", type=int, default=30)
+    parser.add_argument("--refresh-ms", type=float, default=5.0, help="snapshot swap interval during the refresh run")
+    args = parser.parse_args(argv)
+
+    rng = random.Random(3)
+    document = make_document(args.currencies, rng)
+    fx.install(fx.parse(document, version=1))
+    snapshot = fx.current()
+    ops = workload(snapshot, args.conversions, rng)
+    quanta = {currency: snapshot.quantum(currency) for currency in snapshot.rates}
+
+    lookup_ops = ops[:max(1, args.conversions // 10)]
+    lookup = run_table_lookup(lookup_ops, dict(snapshot.rates), quanta)
+    steady = min(run_snapshot(ops) for _ in range(3))
+
+    # Swap in freshly parsed snapshots while converting
+    stop = threading.Event()
+    swaps = 0
+
+    def refresher():
+        nonlocal swaps
+        version = 1
+        while not stop.wait(args.refresh_ms / 1000):
+            version += 1
+            fx.install(fx.parse(make_document(args.currencies, random.Random(version)), version=version))
+            swaps += 1
+
+    thread = threading.Thread(target=refresher, daemon=True)
+    thread.start()
+    refreshing = run_snapshot(ops)
+    stop.set()
+    thread.join()
+
+    # Precision: every result carries exactly the target currency's minor units
+    final = fx.current()
+    wrong_precision = sum(
+        1 for amount, source, target in ops[:10_000]
+        if final.convert(amount, source, target).as_tuple().exponent != final.quantum(target).as_tuple().exponent
+    )
+
+    results = {
+        "config": vars(args),
+        "table_lookup_per_second": len(lookup_ops) / lookup,
+        "snapshot_per_second": args.conversions / steady,
+        "snapshot_refreshing_per_second": args.conversions / refreshing,
+        "snapshot_swaps": swaps,
+        "wrong_precision": wrong_precision,
+    }
+    print(f"rate table query    : {results['table_lookup_per_second']:>12,.0f} conversions/s")
+    print(f"snapshot            : {results['snapshot_per_second']:>12,.0f} conversions/s")
+    print(f"snapshot + refresh  : {results['snapshot_refreshing_per_second']:>12,.0f} conversions/s ({swaps} swaps)")
+    print(f"precision check     : {'OK' if not wrong_precision else f'{wrong_precision} results with wrong minor units'}")
+
+    save_results("fx", results)
+    return 0 if not wrong_precision else 1
+
+
+if __name__ == "__main__":
+    sys.exit(main())
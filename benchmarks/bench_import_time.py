@@ -0,0 +1,84 @@
+"""
+Import-time budget for the API process (cold start cost).
+
+Runs `python -X importtime -c "import app.main"` in a fresh interpreter,
+reports the slowest imports and fails (exit code 1) when the cumulative time
+exceeds the budget or when a module that must stay lazy is imported eagerly.
+
+    python -m benchmarks.bench_import_time --budget-ms 400 --runs 5
+"""
+import argparse
+import os
+import statistics
+import subprocess
+import sys
+
+from benchmarks.common import save_results
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+# Must only be imported on first use (see app/core/lazy.py)
+LAZY_MODULES = ("google.generativeai", "firebase_admin", "passlib.context")
+
+
+def measure(target: str):
+    proc = subprocess.run(
+        [sys.executable, "-X", "importtime", "-c", f"import {target}"],
+        capture_output=True, text=True, cwd=ROOT,
+    )
+    if proc.returncode != 0:
+        raise SystemExit(f"import {target} failed:\n{proc.stderr[-2000:]}")
+
+    imports = []
+    for line in proc.stderr.splitlines():
+        if not line.startswith("import time:") or "[us]" in line:
+            continue
+        self_us, cumulative_us, name = line[len("import time:"):].split("|")
+        imports.append((name.strip(), int(self_us), int(cumulative_us)))
+    return imports
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--target", default="app.main")
+    parser.add_argument("--budget-ms", type=float, default=400.0)
+    parser.add_argument("--runs", type=int, default=5)
+    parser.add_argument("--top", type=int, default=15)
+    args = parser.parse_args(argv)
+
+    totals = []
+    imports = []
+    for _ in range(args.runs):
+        imports = measure(args.target)
+        target = [cumulative for name, _, cumulative in imports if name == args.target]
+        totals.append(target[-1] / 1000 if target else 0.0)
+
+    median_ms = statistics.median(totals)
+    print(f"import {args.target}: median {median_ms:.1f} ms over {args.runs} runs (budget {args.budget_ms:.0f} ms)")
+    print(f"{'cumulative ms':>14}{'self ms':>10}  module")
+    for name, self_us, cumulative_us in sorted(imports, key=lambda item: item[2], reverse=True)[:args.top]:
+        print(f"{cumulative_us / 1000:>14.1f}{self_us / 1000:>10.1f}  {name}")
+
+    loaded = {name for name, _, _ in imports}
+    eager = [module for module in LAZY_MODULES if module in loaded]
+
+    save_results("import_time", {
+        "target": args.target,
+        "runs_ms": totals,
+        "median_ms": median_ms,
+        "budget_ms": args.budget_ms,
+        "eager_lazy_modules": eager,
+    })
+
+    failed = False
+    if eager:
+        print(f"FAIL: imported eagerly: {', '.join(eager)}")
+        failed = True
+    if median_ms > args.budget_ms:
+        print(f"FAIL: {median_ms:.1f} ms exceeds the {args.budget_ms:.0f} ms budget")
+        failed = True
+    return 1 if failed else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
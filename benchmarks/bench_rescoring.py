@@ -0,0 +1,111 @@
+"""
+Nightly re-scoring benchmark (app/services/scoring_service.py).
+
+Creates a scratch database with N accounts, their ledger, loans and a credit
+analysis each, runs the re-scoring pipeline with each worker count and
+reports accounts/sec. The first run writes the new scores; every later run
+must find no diffs.
+
+    python -m benchmarks.bench_rescoring --accounts 100000 --workers 1 4
+    python -m benchmarks.bench_rescoring --database-url postgresql://.../bench_scratch
+"""
+import argparse
+import os
+import random
+import sys
+import tempfile
+import time
+from datetime import datetime, timedelta, timezone
+from decimal import Decimal
+
+from sqlalchemy import create_engine, insert
+from sqlalchemy.orm import sessionmaker
+
+from app.core.database import Base
+from app.models.all_models import Account, CreditAnalysis, Loan, Transaction
+from app.services import scoring_service
+from benchmarks.common import save_results
+
+
+def seed(engine, accounts: int, per_account: int, batch: int = 20_000):
+    rng = random.Random(11)
+    now = datetime.now(timezone.utc)
+    with engine.begin() as conn:
+        for start in range(1, accounts + 1, batch):
+            ids = range(start, min(start + batch, accounts + 1))
+            conn.execute(insert(Account.__table__), [
+                {"id": i, "user_id": i, "number": f"{i:08d}", "balance": Decimal("0"), "credit_limit": Decimal("0")}
+                for i in ids
+            ])
+            conn.execute(insert(CreditAnalysis.__table__), [
+                {"account_id": i, "age": rng.randint(18, 80), "mother_name": "Maria",
+                 "monthly_income": Decimal(rng.randint(800, 20_000)), "assets_value": Decimal(rng.randint(0, 300_000)),
+                 "status": "approved", "ai_feedback": "seed", "approved_limit": Decimal("0"), "score": 0,
+                 "timestamp": now - timedelta(days=200)}
+                for i in ids
+            ])
+            conn.execute(insert(Loan.__table__), [
+                {"account_id": i, "amount": Decimal("1000"), "installments": 12, "interest_rate": Decimal("3.7"),
+                 "installment_amount": Decimal("120.33"), "total_to_pay": Decimal("1444"), "status": "active",
+                 "timestamp": now - timedelta(days=30)}
+                for i in ids if rng.random() < 0.2
+            ])
+            ledger = []
+            for i in ids:
+                balance = Decimal("0")
+                for _ in range(per_account):
+                    amount = Decimal(rng.randint(100, 500_000)) / 100
+                    balance += amount if rng.random() < 0.6 or balance < amount else -amount
+                    ledger.append({"account_id": i, "type": "deposit", "amount": amount, "category": "Outros",
+                                   "balance_after": balance, "timestamp": now - timedelta(minutes=rng.randint(0, 150 * 24 * 60))})
+            conn.execute(insert(Transaction.__table__), ledger)
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--accounts", type=int, default=100_000)
+    parser.add_argument("--transactions-per-account", type=int, default=10)
+    parser.add_argument("--workers", type=int, nargs="+", default=[1, 4])
+    parser.add_argument("--chunk-size", type=int, default=2000)
+    parser.add_argument("--database-url", help="scratch database (default: temporary SQLite file)")
+    args = parser.parse_args(argv)
+
+    url = args.database_url or f"sqlite:///{os.path.join(tempfile.mkdtemp(), 'rescoring_bench.db')}"
+    engine = create_engine(url)
+    Base.metadata.create_all(engine)
+    session_factory = sessionmaker(bind=engine)
+
+    start = time.perf_counter()
+    seed(engine, args.accounts, args.transactions_per_account)
+    print(f"seeded {args.accounts} accounts x {args.transactions_per_account} ledger rows in {time.perf_counter() - start:.1f}s")
+
+    runs = []
+    for workers in args.workers:
+        result = scoring_service.rescore_portfolio(session_factory=session_factory, workers=workers, chunk_size=args.chunk_size)
+        runs.append({
+            "workers": workers,
+            "accounts": result.accounts,
+            "seconds": result.seconds,
+            "accounts_per_second": result.accounts_per_second,
+            "changed": result.changed,
+            "limit_increased": result.limit_increased,
+            "limit_decreased": result.limit_decreased,
+        })
+        print(f"{workers:>3} workers: {result.accounts_per_second:>10,.0f} accounts/s  "
+              f"changed {result.changed} (limits up {result.limit_increased}, down {result.limit_decreased})")
+
+    stable = all(run["changed"] == 0 for run in runs[1:])
+    if len(runs) > 1:
+        print(f"later runs: {'no diffs (OK)' if stable else 'DIFFS ON UNCHANGED DATA'}")
+
+    save_results("rescoring", {
+        "config": {key: value for key, value in vars(args).items() if key != "database_url"},
+        "dialect": engine.dialect.name,
+        "runs": runs,
+        "stable": stable,
+    })
+    return 0 if stable else 1
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,125 @@
+"""
+Month-start burst of standing orders (app/services/scheduled_transfer_service.py).
+
+Creates a scratch database with N accounts and M monthly orders all due at
+the same instant (some sources without enough funds), runs the scheduler
+until the burst is drained and reports orders/sec, the outcome mix and the
+worst lag. Then checks that money was conserved, that every successful run
+moved money exactly once and that a second pass finds nothing due.
+
+    python -m benchmarks.bench_scheduled_transfers --orders 200000 --accounts 50000
+    python -m benchmarks.bench_scheduled_transfers --database-url postgresql://.../bench_scratch --workers 16
+
+SQLite serializes writers, so keep --workers 1 there; use PostgreSQL to
+measure parallel accounts.
+"""
+import argparse
+import os
+import random
+import sys
+import tempfile
+import time
+from datetime import datetime, timedelta, timezone
+from decimal import Decimal
+
+from sqlalchemy import create_engine, func, insert, select
+from sqlalchemy.orm import sessionmaker
+
+from app.core.database import Base
+from app.models.all_models import Account, Transaction
+from app.models.scheduled_models import ScheduledTransfer, ScheduledTransferRun
+from app.services import scheduled_transfer_service
+from benchmarks.common import save_results
+
+
+def seed(engine, accounts: int, orders: int, due_at: datetime, broke_share: float, batch: int = 20_000):
+    rng = random.Random(5)
+    with engine.begin() as conn:
+        rows = [
+            {"id": i, "user_id": i, "number": f"{i:08d}", "credit_limit": Decimal("0"),
+             "balance": Decimal("0") if rng.random() < broke_share else Decimal("100000")}
+            for i in range(1, accounts + 1)
+        ]
+        for start in range(0, len(rows), batch):
+            conn.execute(insert(Account.__table__), rows[start:start + batch])
+
+        buffer = []
+        for _ in range(orders):
+            source = rng.randint(1, accounts)
+            dest = rng.randint(1, accounts - 1)
+            dest = dest + 1 if dest >= source else dest
+            buffer.append({
+                "account_id": source, "destination_account": f"{dest:08d}",
+                "amount": Decimal(rng.randint(1000, 50_000)) / 100, "currency": "BRL", "category": "Aluguel",
+                "frequency": "monthly", "day_of_month": due_at.day, "occurrence_at": due_at, "next_run_at": due_at,
+                "attempts": 0, "status": "active",
+            })
+            if len(buffer) >= batch:
+                conn.execute(insert(ScheduledTransfer.__table__), buffer)
+                buffer = []
+        if buffer:
+            conn.execute(insert(ScheduledTransfer.__table__), buffer)
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--orders", type=int, default=200_000)
+    parser.add_argument("--accounts", type=int, default=50_000)
+    parser.add_argument("--broke-share", type=float, default=0.05, help="share of source accounts with no funds")
+    parser.add_argument("--workers", type=int, default=1)
+    parser.add_argument("--batch-size", type=int, default=1000)
+    parser.add_argument("--database-url", help="scratch database (default: temporary SQLite file)")
+    args = parser.parse_args(argv)
+
+    url = args.database_url or f"sqlite:///{os.path.join(tempfile.mkdtemp(), 'scheduled_bench.db')}"
+    engine = create_engine(url)
+    Base.metadata.create_all(engine)
+    session_factory = sessionmaker(bind=engine)
+
+    due_at = datetime.now(timezone.utc).replace(microsecond=0) - timedelta(seconds=1)
+    start = time.perf_counter()
+    seed(engine, args.accounts, args.orders, due_at, args.broke_share)
+    print(f"seeded {args.accounts} accounts, {args.orders} orders due at {due_at:%Y-%m-%d %H:%M} "
+          f"in {time.perf_counter() - start:.1f}s")
+
+    with engine.connect() as conn:
+        total_before = conn.execute(select(func.sum(Account.balance))).scalar()
+
+    result = scheduled_transfer_service.run_due(
+        session_factory=session_factory, workers=args.workers, batch_size=args.batch_size,
+    )
+    again = scheduled_transfer_service.run_due(session_factory=session_factory, workers=args.workers)
+
+    with engine.connect() as conn:
+        total_after = conn.execute(select(func.sum(Account.balance))).scalar()
+        transfers = conn.execute(
+            select(func.count()).select_from(Transaction.__table__).where(Transaction.type == "transfer_out")
+        ).scalar()
+        succeeded_runs = conn.execute(
+            select(func.count()).select_from(ScheduledTransferRun.__table__).where(ScheduledTransferRun.status == "succeeded")
+        ).scalar()
+
+    conserved = total_before == total_after
+    exactly_once = transfers == succeeded_runs == result.succeeded
+    print(f"{result.claimed} orders in {result.seconds:.2f}s -> {result.per_second:,.0f} orders/s "
+          f"({result.batches} batches, max lag {result.max_lag_seconds:.1f}s)")
+    print(f"outcomes: {result.outcomes}")
+    print(f"balances conserved: {'OK' if conserved else 'NO'}  exactly once: {'OK' if exactly_once else 'NO'}  "
+          f"second pass: {again.claimed} due")
+
+    save_results("scheduled_transfers", {
+        "config": {key: value for key, value in vars(args).items() if key != "database_url"},
+        "dialect": engine.dialect.name,
+        "orders": result.claimed,
+        "seconds": result.seconds,
+        "orders_per_second": result.per_second,
+        "max_lag_seconds": result.max_lag_seconds,
+        "outcomes": result.outcomes,
+        "conserved": conserved,
+        "exactly_once": exactly_once,
+    })
+    return 0 if conserved and exactly_once and again.claimed == 0 else 1
+
+
+if __name__ == "__main__":
+    sys.exit(main())
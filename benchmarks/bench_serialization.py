@@ -0,0 +1,91 @@
+"""
+Statement serialization micro-benchmark.
+
+Compares the default FastAPI path (validate every row through
+List[TransactionResponse] with from_attributes, dump to JSON-able Python,
+encode with the stdlib json) against the fast path in app/core/responses.py
+(field pick + orjson with Decimal-as-string).
+
+    python -m benchmarks.bench_serialization --rows 100 10000 100000
+"""
+import argparse
+import sys
+import time
+from datetime import datetime, timedelta
+from decimal import Decimal
+from types import SimpleNamespace
+from typing import List
+
+from fastapi.responses import JSONResponse
+from pydantic import TypeAdapter
+
+from app.core.responses import ORJSONResponse, dump_rows
+from app.schemas.all_schemas import TransactionResponse
+from benchmarks.common import save_results
+
+
+def make_rows(count: int):
+    # Stand-ins for ORM rows: plain attribute access, like loaded Transaction objects
+    start = datetime(2026, 1, 1, 12, 0, 0)
+    balance = Decimal("1000.00")
+    rows = []
+    for i in range(count):
+        amount = Decimal(i % 500 + 1) + Decimal("0.25")
+        balance += amount
+        rows.append(SimpleNamespace(
+            id=i + 1,
+            amount=amount,
+            type="deposit" if i % 3 else "transfer_out",
+            category="Outros",
+            timestamp=start + timedelta(minutes=i),
+            balance_after=balance,
+            account_id=42,
+        ))
+    return rows
+
+
+def default_path(adapter: TypeAdapter, rows) -> bytes:
+    validated = adapter.validate_python(rows, from_attributes=True)
+    return JSONResponse(adapter.dump_python(validated, mode="json")).body
+
+
+def fast_path(rows) -> bytes:
+    return ORJSONResponse(dump_rows(TransactionResponse, rows)).body
+
+
+def best_of(func, repeat: int) -> float:
+    best = float("inf")
+    for _ in range(repeat):
+        start = time.perf_counter()
+        func()
+        best = min(best, time.perf_counter() - start)
+    return best
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--rows", type=int, nargs="+", default=[100, 10_000, 100_000])
+    parser.add_argument("--repeat", type=int, default=5)
+    args = parser.parse_args(argv)
+
+    adapter = TypeAdapter(List[TransactionResponse])
+    results = []
+    print(f"{'rows':>8}{'default ms':>14}{'fast ms':>12}{'speedup':>10}")
+    for count in args.rows:
+        rows = make_rows(count)
+        # Both paths must agree on content before timing them
+        assert adapter.validate_json(default_path(adapter, rows)) == adapter.validate_json(fast_path(rows))
+
+        repeat = args.repeat if count <= 10_000 else max(1, args.repeat // 2)
+        default_s = best_of(lambda: default_path(adapter, rows), repeat)
+        fast_s = best_of(lambda: fast_path(rows), repeat)
+        speedup = default_s / fast_s if fast_s else 0.0
+        print(f"{count:>8}{default_s * 1000:>14.2f}{fast_s * 1000:>12.2f}{speedup:>9.1f}x")
+        results.append({"rows": count, "default_ms": default_s * 1000, "fast_ms": fast_s * 1000, "speedup": speedup})
+
+    save_results("serialization", {"results": results})
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
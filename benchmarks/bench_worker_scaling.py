@@ -0,0 +1,97 @@
+"""
+Throughput scaling from 1 to N gunicorn workers.
+
+Starts the production launcher (gunicorn.conf.py) with WEB_CONCURRENCY set to
+each worker count and runs the load test against it over HTTP.
+
+    python -m benchmarks.bench_worker_scaling --workers 1 2 4 8 --duration 20
+
+Like the load test it drives, it needs the accounts, transactions, credit and
+loans routers, which app/main.py does not mount in this tree; until they are
+mounted again every run stops during seeding.
+"""
+import argparse
+import asyncio
+import contextlib
+import os
+import subprocess
+import sys
+import time
+
+import httpx
+
+from benchmarks import load_test
+from benchmarks.common import save_results
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+
+@contextlib.contextmanager
+def gunicorn_server(workers: int):
+    port = load_test._free_port()
+    env = load_test.configure_environment(dict(os.environ), rate_limit=False)
+    env.update({"WEB_CONCURRENCY": str(workers), "HOST": "127.0.0.1", "PORT": str(port)})
+    # Velocity windows are per process, so gunicorn refuses several workers with them on
+    env["FRAUD_ENABLED"] = "false"
+    proc = subprocess.Popen(
+        [sys.executable, "-m", "gunicorn", "-c", "gunicorn.conf.py", "app.main:app", "--access-logfile", "/dev/null"],
+        env=env, cwd=ROOT,
+    )
+    base_url = f"http://127.0.0.1:{port}"
+    try:
+        deadline = time.time() + 60
+        while time.time() < deadline:
+            try:
+                httpx.get(f"{base_url}/metrics", timeout=1)
+                break
+            except httpx.HTTPError:
+                time.sleep(0.3)
+        else:
+            raise SystemExit("gunicorn did not become ready")
+        yield base_url
+    finally:
+        proc.terminate()
+        proc.wait(timeout=60)
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--workers", type=int, nargs="+", default=[1, 2, 4, os.cpu_count() or 4])
+    parser.add_argument("--duration", type=float, default=20.0)
+    parser.add_argument("--concurrency", type=int, default=64)
+    parser.add_argument("--users", type=int, default=100)
+    parser.add_argument("--mix", help="load test operation mix (see benchmarks.load_test)")
+    args = parser.parse_args(argv)
+
+    load_args = ["--duration", str(args.duration), "--concurrency", str(args.concurrency), "--users", str(args.users)]
+    if args.mix:
+        load_args += ["--mix", args.mix]
+
+    runs = []
+    for workers in sorted(set(args.workers)):
+        with gunicorn_server(workers) as base_url:
+            options = load_test.build_parser().parse_args(load_args + ["--workers", str(workers)])
+            result = asyncio.run(load_test.run(options, httpx.AsyncClient(base_url=base_url, timeout=60)))
+        runs.append({
+            "workers": workers,
+            "throughput_rps": result["throughput_rps"],
+            "operations": result["operations"],
+            "balance_invariant": result["balance_invariant"],
+        })
+        print(f"{workers:>3} workers: {result['throughput_rps']:>9} req/s  ({result['failed_requests']} non-2xx)")
+
+    baseline = runs[0]["throughput_rps"] or 1
+    print(f"{'workers':>8}{'req/s':>12}{'speedup':>10}{'efficiency':>12}")
+    for run in runs:
+        speedup = run["throughput_rps"] / baseline
+        run["speedup"] = speedup
+        print(f"{run['workers']:>8}{run['throughput_rps']:>12}{speedup:>9.2f}x"
+              f"{speedup / (run['workers'] / runs[0]['workers']) * 100:>11.0f}%")
+
+    save_results("worker_scaling", {"config": vars(args), "runs": runs})
+    # A missing balance check means the load test could not reach the accounts
+    return 0 if all(run["balance_invariant"] and run["balance_invariant"]["conserved"] for run in runs) else 1
+
+
+if __name__ == "__main__":
+    sys.exit(main())
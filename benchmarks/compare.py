@@ -0,0 +1,51 @@
+"""
+Compare two saved benchmark results, e.g. before/after a change:
+
+    python -m benchmarks.compare benchmarks/results/load_test-abc123-*.json benchmarks/results/load_test-def456-*.json
+"""
+import argparse
+import json
+import sys
+
+
+def _delta(old: float, new: float) -> str:
+    if not old:
+        return "n/a"
+    return f"{(new - old) / old * 100:+.1f}%"
+
+
+def compare(old: dict, new: dict):
+    print(f"{old['benchmark']}: {old['revision']} -> {new['revision']}")
+    if "throughput_rps" in old and "throughput_rps" in new:
+        print(f"throughput: {old['throughput_rps']} -> {new['throughput_rps']} req/s "
+              f"({_delta(old['throughput_rps'], new['throughput_rps'])})")
+
+    old_ops = old.get("operations", {})
+    new_ops = new.get("operations", {})
+    if old_ops or new_ops:
+        print(f"{'operation':<16}{'p50 ms':>20}{'p95 ms':>20}{'p99 ms':>20}")
+        for op in sorted(set(old_ops) | set(new_ops)):
+            before = old_ops.get(op, {})
+            after = new_ops.get(op, {})
+            cells = []
+            for key in ("p50_ms", "p95_ms", "p99_ms"):
+                a, b = before.get(key, 0), after.get(key, 0)
+                cells.append(f"{a}->{b} {_delta(a, b)}")
+            print(f"{op:<16}" + "".join(f"{cell:>20}" for cell in cells))
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("old")
+    parser.add_argument("new")
+    args = parser.parse_args(argv)
+    with open(args.old) as fh:
+        old = json.load(fh)
+    with open(args.new) as fh:
+        new = json.load(fh)
+    compare(old, new)
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,422 @@
+"""
+End-to-end load test for the banking API.
+
+Seeds users (register, login, credit application, opening deposits) through the
+public API, then drives a weighted mix of operations at a fixed concurrency
+either in-process (httpx ASGI transport) or against a real uvicorn server.
+
+    python -m benchmarks.load_test --users 200 --concurrency 32 --duration 30
+    python -m benchmarks.load_test --mode uvicorn --workers 4
+    python -m benchmarks.load_test --base-url http://localhost:8000
+
+Results (p50/p95/p99 per operation over 2xx responses, throughput of 2xx
+responses, non-2xx counts, DB deadlock/lock-timeout counts scraped from
+/metrics and the balance-conservation check) are written to
+benchmarks/results/ for comparison across commits. The run fails if the
+balance check is violated or could not be made.
+
+It needs the accounts, transactions, credit and loans routers. app/main.py
+does not mount them in this tree (their SQL models and database module are
+not part of it), so until they are mounted again the run stops during
+seeding. Against a multi-worker server (--workers > 1, or a --base-url
+running several workers) each /metrics scrape is answered by a single
+worker, so the DB error counts cover that worker only.
+"""
+import argparse
+import asyncio
+import contextlib
+import os
+import random
+import socket
+import subprocess
+import sys
+import time
+import uuid
+from collections import defaultdict
+from dataclasses import dataclass, field
+from decimal import Decimal
+from typing import Dict, List, Optional
+
+import httpx
+
+from benchmarks.common import parse_prometheus_counter, save_results, summarize_latencies
+
+API = "/api/v1"
+
+DEFAULT_MIX = {
+    "login": 5,
+    "statement": 35,
+    "account": 15,
+    "deposit": 15,
+    "transfer": 20,
+    "loan": 5,
+    "credit": 5,
+}
+
+
+@dataclass
+class SeededUser:
+    email: str
+    password: str
+    token: str = ""
+    account_number: str = ""
+
+
+@dataclass
+class RunStats:
+    # 2xx only, so error responses (often fast 404s/429s) don't skew the percentiles
+    latencies: Dict[str, List[float]] = field(default_factory=lambda: defaultdict(list))
+    failures: Dict[str, int] = field(default_factory=lambda: defaultdict(int))
+    statuses: Dict[str, Dict[int, int]] = field(default_factory=lambda: defaultdict(lambda: defaultdict(int)))
+    errors: Dict[str, int] = field(default_factory=lambda: defaultdict(int))
+    # Net money that entered (+) or left (-) the seeded accounts
+    external_flow: Decimal = Decimal("0")
+
+    def record(self, op: str, elapsed: float, status: int):
+        self.statuses[op][status] += 1
+        if 200 <= status < 300:
+            self.latencies[op].append(elapsed)
+        else:
+            self.failures[op] += 1
+
+
+def parse_mix(spec: Optional[str]) -> Dict[str, int]:
+    if not spec:
+        return dict(DEFAULT_MIX)
+    mix = {}
+    for part in spec.split(","):
+        name, _, weight = part.partition("=")
+        if name.strip() not in DEFAULT_MIX:
+            raise SystemExit(f"Unknown operation in mix: {name}")
+        mix[name.strip()] = int(weight)
+    return mix
+
+
+def auth_headers(user: SeededUser) -> Dict[str, str]:
+    return {"Authorization": f"Bearer {user.token}"}
+
+
+# Seeding
+
+async def seed_user(client: httpx.AsyncClient, index: int, run_id: str, opening_deposits: int, stats: RunStats) -> Optional[SeededUser]:
+    user = SeededUser(email=f"bench-{run_id}-{index}@example.com", password="bench-password")
+    response = await client.post(f"{API}/auth/register", json={
+        "name": f"Bench User {index}",
+        "email": user.email,
+        "cpf": f"{run_id[:3]}{index:08d}",
+        "password": user.password,
+    })
+    if response.status_code != 200:
+        stats.errors["seed_register"] += 1
+        return None
+
+    response = await client.post(f"{API}/auth/login", data={"username": user.email, "password": user.password})
+    if response.status_code != 200:
+        stats.errors["seed_login"] += 1
+        return None
+    user.token = response.json()["access_token"]
+
+    response = await client.get(f"{API}/accounts/me", headers=auth_headers(user))
+    if response.status_code != 200:
+        # Every later operation needs the account (e.g. its router isn't mounted)
+        stats.errors["seed_account"] += 1
+        return None
+    user.account_number = response.json()["number"]
+
+    # Approved credit so loan requests exercise the happy path
+    await client.post(f"{API}/credit/apply", headers=auth_headers(user), json={
+        "age": 35, "mother_name": "Bench", "monthly_income": "8000", "assets_value": "50000",
+    })
+
+    for _ in range(opening_deposits):
+        amount = Decimal(random.randint(100, 5000))
+        response = await client.post(f"{API}/transactions/deposit", headers=auth_headers(user), json={
+            "amount": str(amount), "type": "deposit", "category": "Seed",
+        })
+        if response.status_code == 200:
+            stats.external_flow += amount
+    return user
+
+
+async def seed(client: httpx.AsyncClient, users: int, opening_deposits: int, concurrency: int, stats: RunStats) -> List[SeededUser]:
+    run_id = uuid.uuid4().hex[:8]
+    semaphore = asyncio.Semaphore(concurrency)
+
+    async def one(i):
+        async with semaphore:
+            return await seed_user(client, i, run_id, opening_deposits, stats)
+
+    seeded = await asyncio.gather(*(one(i) for i in range(users)))
+    return [user for user in seeded if user is not None]
+
+
+async def total_balance(client: httpx.AsyncClient, users: List[SeededUser]) -> Optional[Decimal]:
+    total = Decimal("0")
+    for user in users:
+        response = await client.get(f"{API}/accounts/me", headers=auth_headers(user))
+        if response.status_code != 200:
+            return None
+        total += Decimal(str(response.json()["balance"]))
+    return total
+
+
+async def db_error_counts(client: httpx.AsyncClient) -> Dict[str, float]:
+    response = await client.get("/metrics")
+    if response.status_code != 200:
+        return {}
+    return parse_prometheus_counter(response.text, "db_errors_total")
+
+
+# Workload
+
+class Workload:
+    def __init__(self, users: List[SeededUser], mix: Dict[str, int], hot_accounts: int, hot_ratio: float, stats: RunStats):
+        self.users = users
+        self.ops = list(mix)
+        self.weights = [mix[op] for op in self.ops]
+        self.hot = users[:max(1, hot_accounts)]
+        self.hot_ratio = hot_ratio
+        self.stats = stats
+
+    def pick_destination(self, source: SeededUser) -> SeededUser:
+        # Hot-account skew: a small set of accounts receives a large share of transfers
+        pool = self.hot if random.random() < self.hot_ratio else self.users
+        dest = random.choice(pool)
+        while dest is source and len(self.users) > 1:
+            dest = random.choice(self.users)
+        return dest
+
+    async def run_one(self, client: httpx.AsyncClient):
+        op = random.choices(self.ops, self.weights)[0]
+        user = random.choice(self.users)
+        headers = auth_headers(user)
+        amount = Decimal(random.randint(1, 200))
+
+        start = time.perf_counter()
+        if op == "login":
+            response = await client.post(f"{API}/auth/login", data={"username": user.email, "password": user.password})
+        elif op == "statement":
+            response = await client.get(f"{API}/transactions/statement", headers=headers)
+        elif op == "account":
+            response = await client.get(f"{API}/accounts/me", headers=headers)
+        elif op == "deposit":
+            response = await client.post(f"{API}/transactions/deposit", headers=headers, json={
+                "amount": str(amount), "type": "deposit",
+            })
+            if response.status_code == 200:
+                self.stats.external_flow += amount
+        elif op == "transfer":
+            dest = self.pick_destination(user)
+            response = await client.post(f"{API}/transactions/transfer", headers=headers, json={
+                "destination_account": dest.account_number, "amount": str(amount),
+            })
+        elif op == "loan":
+            loan_amount = Decimal(random.randint(100, 1000))
+            response = await client.post(f"{API}/loans/request", headers=headers, json={
+                "amount": str(loan_amount), "installments": random.randint(1, 24),
+            })
+            if response.status_code == 200:
+                self.stats.external_flow += loan_amount
+        else:
+            response = await client.post(f"{API}/credit/apply", headers=headers, json={
+                "age": random.randint(18, 80), "mother_name": "Bench",
+                "monthly_income": str(random.randint(500, 20000)), "assets_value": "0",
+            })
+        self.stats.record(op, time.perf_counter() - start, response.status_code)
+
+
+async def drive(client: httpx.AsyncClient, workload: Workload, concurrency: int, duration: float, max_requests: int) -> float:
+    deadline = time.perf_counter() + duration
+    issued = 0
+
+    async def worker():
+        nonlocal issued
+        while time.perf_counter() < deadline and (not max_requests or issued < max_requests):
+            issued += 1
+            try:
+                await workload.run_one(client)
+            except httpx.HTTPError as exc:
+                workload.stats.errors[type(exc).__name__] += 1
+
+    start = time.perf_counter()
+    await asyncio.gather(*(worker() for _ in range(concurrency)))
+    return time.perf_counter() - start
+
+
+# Targets
+
+def configure_environment(env, rate_limit: bool):
+    # The credit model is stubbed: without an API key ai_service uses its offline rules
+    env.pop("GEMINI_API_KEY", None)
+    # Every simulated user shares one client IP, so limits would dominate the numbers
+    if not rate_limit:
+        env["RATE_LIMIT_ENABLED"] = "false"
+    return env
+
+
+def build_in_process_client(model_latency: float, rate_limit: bool) -> httpx.AsyncClient:
+    configure_environment(os.environ, rate_limit)
+    from app.main import app
+    from app.services import ai_service
+
+    if model_latency:
+        offline = ai_service.analyze_credit_with_ai
+
+        def slow_model(**kwargs):
+            time.sleep(model_latency)
+            return offline(**kwargs)
+        ai_service.analyze_credit_with_ai = slow_model
+
+    transport = httpx.ASGITransport(app=app, raise_app_exceptions=False)
+    return httpx.AsyncClient(transport=transport, base_url="http://bench", timeout=60)
+
+
+def _free_port() -> int:
+    with socket.socket() as sock:
+        sock.bind(("127.0.0.1", 0))
+        return sock.getsockname()[1]
+
+
+@contextlib.contextmanager
+def uvicorn_server(workers: int, rate_limit: bool):
+    port = _free_port()
+    env = configure_environment(dict(os.environ), rate_limit)
+    proc = subprocess.Popen(
+        [sys.executable, "-m", "uvicorn", "app.main:app", "--host", "127.0.0.1",
+         "--port", str(port), "--workers", str(workers), "--log-level", "warning"],
+        env=env,
+    )
+    base_url = f"http://127.0.0.1:{port}"
+    try:
+        deadline = time.time() + 30
+        while time.time() < deadline:
+            try:
+                httpx.get(f"{base_url}/metrics", timeout=1)
+                break
+            except httpx.HTTPError:
+                time.sleep(0.2)
+        else:
+            raise SystemExit("uvicorn did not become ready")
+        yield base_url
+    finally:
+        proc.terminate()
+        proc.wait(timeout=30)
+
+
+async def run(args, client: httpx.AsyncClient) -> dict:
+    stats = RunStats()
+    async with client:
+        seed_start = time.perf_counter()
+        users = await seed(client, args.users, args.opening_deposits, args.concurrency, stats)
+        seed_elapsed = time.perf_counter() - seed_start
+        if len(users) < 2:
+            raise SystemExit(f"Seeding failed ({dict(stats.errors)}). The accounts, transactions, credit and "
+                             f"loans routers must be mounted in app/main.py; this tree leaves them commented out.")
+
+        balance_before = await total_balance(client, users)
+        flow_before = stats.external_flow
+        errors_before = await db_error_counts(client)
+
+        workload = Workload(users, parse_mix(args.mix), args.hot_accounts, args.hot_ratio, stats)
+        elapsed = await drive(client, workload, args.concurrency, args.duration, args.requests)
+
+        balance_after = await total_balance(client, users)
+        errors_after = await db_error_counts(client)
+
+    succeeded = sum(len(v) for v in stats.latencies.values())
+    failed = sum(stats.failures.values())
+    invariant = None
+    if balance_before is not None and balance_after is not None:
+        expected = balance_before + (stats.external_flow - flow_before)
+        invariant = {
+            "before": str(balance_before),
+            "after": str(balance_after),
+            "expected": str(expected),
+            "conserved": balance_after == expected,
+        }
+
+    return {
+        "config": vars(args),
+        "seeded_users": len(users),
+        "seed_seconds": round(seed_elapsed, 3),
+        "duration_seconds": round(elapsed, 3),
+        "requests": succeeded + failed,
+        "failed_requests": failed,
+        "throughput_rps": round(succeeded / elapsed, 2) if elapsed else 0.0,
+        "operations": {
+            op: {**summarize_latencies(stats.latencies[op]), "failed": stats.failures[op], "statuses": dict(statuses)}
+            for op, statuses in sorted(stats.statuses.items())
+        },
+        "client_errors": dict(stats.errors),
+        # Scraped from whichever worker answered /metrics, see the module docstring
+        "db_errors": {
+            labels: errors_after.get(labels, 0) - errors_before.get(labels, 0) for labels in errors_after
+        },
+        "db_errors_scope": "one worker" if args.base_url or args.workers > 1 else "all",
+        "balance_invariant": invariant,
+    }
+
+
+def print_report(results: dict):
+    print(f"{results['requests']} requests in {results['duration_seconds']}s "
+          f"-> {results['throughput_rps']} successful req/s, {results['failed_requests']} non-2xx "
+          f"({results['seeded_users']} users)")
+    print(f"{'operation':<12}{'2xx':>8}{'non-2xx':>9}{'p50 ms':>10}{'p95 ms':>10}{'p99 ms':>10}  statuses")
+    for op, summary in results["operations"].items():
+        print(f"{op:<12}{summary['count']:>8}{summary['failed']:>9}{summary['p50_ms']:>10}{summary['p95_ms']:>10}"
+              f"{summary['p99_ms']:>10}  {summary['statuses']}")
+    if results["db_errors"]:
+        scope = " (one worker only)" if results["db_errors_scope"] != "all" else ""
+        print(f"DB errors{scope}: {results['db_errors']}")
+    if results["client_errors"]:
+        print(f"Client errors: {results['client_errors']}")
+    invariant = results["balance_invariant"]
+    if invariant is None:
+        print("Balance invariant: NOT CHECKED (balances unavailable) - failing the run")
+    else:
+        print(f"Balance invariant: {'OK' if invariant['conserved'] else 'VIOLATED'} "
+              f"(after={invariant['after']}, expected={invariant['expected']})")
+
+
+def build_parser() -> argparse.ArgumentParser:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--mode", choices=["inprocess", "uvicorn"], default="inprocess")
+    parser.add_argument("--base-url", help="Run against an already running server instead")
+    parser.add_argument("--workers", type=int, default=1, help="uvicorn workers (uvicorn mode)")
+    parser.add_argument("--users", type=int, default=50)
+    parser.add_argument("--opening-deposits", type=int, default=3)
+    parser.add_argument("--concurrency", type=int, default=16)
+    parser.add_argument("--duration", type=float, default=20.0, help="seconds")
+    parser.add_argument("--requests", type=int, default=0, help="stop after N requests (0 = duration only)")
+    parser.add_argument("--mix", help="e.g. statement=50,transfer=30,deposit=20")
+    parser.add_argument("--hot-accounts", type=int, default=3)
+    parser.add_argument("--hot-ratio", type=float, default=0.3, help="share of transfers aimed at hot accounts")
+    parser.add_argument("--model-latency", type=float, default=0.0, help="stubbed credit model delay (in-process)")
+    parser.add_argument("--rate-limit", action="store_true", help="keep the API rate limiter enabled")
+    parser.add_argument("--seed", type=int, default=None, help="random seed")
+    parser.add_argument("--output", help="results file (default: benchmarks/results/...)")
+    return parser
+
+
+def main(argv=None):
+    args = build_parser().parse_args(argv)
+    if args.seed is not None:
+        random.seed(args.seed)
+
+    if args.base_url:
+        results = asyncio.run(run(args, httpx.AsyncClient(base_url=args.base_url, timeout=60)))
+    elif args.mode == "uvicorn":
+        with uvicorn_server(args.workers, args.rate_limit) as base_url:
+            results = asyncio.run(run(args, httpx.AsyncClient(base_url=base_url, timeout=60)))
+    else:
+        results = asyncio.run(run(args, build_in_process_client(args.model_latency, args.rate_limit)))
+
+    print_report(results)
+    path = save_results("load_test", results, args.output)
+    print(f"Results saved to {path}")
+    invariant = results["balance_invariant"]
+    return 0 if invariant and invariant["conserved"] else 1
+
+
+if __name__ == "__main__":
+    sys.exit(main())
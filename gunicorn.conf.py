@@ -0,0 +1,67 @@
+# Production launcher: gunicorn managing uvicorn workers, driven by Settings.
+#   gunicorn -c gunicorn.conf.py app.main:app
+import gc
+import os
+
+from app.core.config import settings
+
+bind = f"{settings.HOST}:{settings.PORT}"
+worker_class = "uvicorn.workers.UvicornWorker"
+
+
+def _usable_cpus() -> int:
+    # Honours CPU affinity (taskset, container cpusets); cpu_count() reports the whole host
+    try:
+        return len(os.sched_getaffinity(0))
+    except AttributeError:
+        return os.cpu_count() or 1
+
+
+# Rate-limit buckets live in each worker unless they are kept in Redis
+shared_rate_limits = bool(settings.RATE_LIMIT_STORE_URL) and not settings.RATE_LIMIT_STORE_URL.startswith(("memory://", "fake://"))
+# Python work (bcrypt, Pydantic, JSON) is GIL-bound, so scale with processes
+workers = settings.WEB_CONCURRENCY or _usable_cpus()
+
+
+def _per_process_state() -> list:
+    """State that is only correct when a single process serves every request."""
+    problems = []
+    if settings.RATE_LIMIT_ENABLED and not shared_rate_limits:
+        problems.append("rate limits use the in-memory store, so every worker would grant the full budget "
+                        "(set RATE_LIMIT_STORE_URL to a Redis URL)")
+    if settings.FRAUD_ENABLED:
+        problems.append("velocity (fraud) windows are kept per process, so debits spread over the workers "
+                        "would escape the limits (set FRAUD_ENABLED=false to run without them)")
+    return problems
+
+
+keepalive = settings.WEB_KEEPALIVE
+backlog = settings.WEB_BACKLOG
+timeout = settings.WEB_TIMEOUT
+graceful_timeout = settings.WEB_GRACEFUL_TIMEOUT
+max_requests = settings.WEB_MAX_REQUESTS
+max_requests_jitter = settings.WEB_MAX_REQUESTS_JITTER
+
+preload_app = settings.WEB_PRELOAD
+
+accesslog = "-"
+errorlog = "-"
+
+
+def on_starting(server):
+    problems = _per_process_state() if workers > 1 else []
+    if problems:
+        raise SystemExit(
+            f"Refusing to start {workers} workers: " + "; ".join(problems)
+            + ". Or set WEB_CONCURRENCY=1 to run a single worker."
+        )
+    if preload_app:
+        from app.core import warmup
+        warmup.preload()
+
+
+def when_ready(server):
+    # Everything loaded so far is long-lived; keep the GC from touching it in
+    # the workers so those pages stay shared copy-on-write.
+    if preload_app:
+        gc.freeze()
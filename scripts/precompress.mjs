@@ -0,0 +1,39 @@
+// Writes .br and .gz siblings for compressible files in dist/ so the API can
+// serve them without compressing on every request (see app/core/spa.py).
+import { readdirSync, readFileSync, statSync, writeFileSync } from 'node:fs';
+import { join, extname } from 'node:path';
+import { brotliCompressSync, gzipSync, constants } from 'node:zlib';
+
+const DIST = process.argv[2] ?? 'dist';
+const COMPRESSIBLE = new Set(['.html', '.js', '.mjs', '.css', '.svg', '.json', '.txt', '.map', '.ico', '.webmanifest', '.xml']);
+const MIN_SIZE = 1024;
+
+function* walk(dir) {
+    for (const name of readdirSync(dir)) {
+        const path = join(dir, name);
+        if (statSync(path).isDirectory()) {
+            yield* walk(path);
+        } else {
+            yield path;
+        }
+    }
+}
+
+let written = 0;
+for (const path of walk(DIST)) {
+    if (!COMPRESSIBLE.has(extname(path)) || statSync(path).size < MIN_SIZE) continue;
+    const source = readFileSync(path);
+
+    const br = brotliCompressSync(source, {
+        params: {
+            [constants.BROTLI_PARAM_QUALITY]: constants.BROTLI_MAX_QUALITY,
+            [constants.BROTLI_PARAM_SIZE_HINT]: source.length,
+        },
+    });
+    const gz = gzipSync(source, { level: 9 });
+
+    // Only keep variants that actually save bytes
+    if (br.length < source.length) { writeFileSync(`${path}.br`, br); written++; }
+    if (gz.length < source.length) { writeFileSync(`${path}.gz`, gz); written++; }
+}
+console.log(`precompress: wrote ${written} compressed files in ${DIST}`);
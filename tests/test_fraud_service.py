@@ -0,0 +1,56 @@
+import time
+from datetime import datetime, timezone
+from decimal import Decimal
+
+import pytest
+from fastapi import HTTPException
+
+from app.services import fraud_service
+from app.services.fraud_service import SlidingWindow, VelocityEngine, VelocityRules
+
+
+class _Ledger:
+    """Stands in for the session rebuild() streams debits from."""
+
+    def __init__(self, rows):
+        self.rows = rows
+
+    def __getattr__(self, name):
+        # query(), filter(), order_by(), yield_per() all chain
+        return lambda *args, **kwargs: self
+
+    def __iter__(self):
+        return iter(self.rows)
+
+
+def test_remove_never_takes_a_counter_below_zero():
+    window = SlidingWindow(60, 60)
+    window.add(0, 1000)  # counted without a destination, as rebuild() does
+    window.remove(0, 1000, destination_id=7, new_destination=True)
+    window.remove(0, 1000, destination_id=7, new_destination=True)
+    assert window.totals(0) == (0, 0, 0)
+
+
+def test_release_after_rebuild_is_a_no_op():
+    engine = VelocityEngine(VelocityRules.from_settings())
+    now = 1_000_000.0
+    reason, reservation = engine.reserve(1, Decimal("10"), destination_id=2, now=now)
+    assert reason is None and reservation.new_destination
+
+    timestamp = datetime.fromtimestamp(now, tz=timezone.utc).replace(tzinfo=None)
+    engine.rebuild(_Ledger([(1, Decimal("10"), timestamp)]), now=now)
+    engine.release(reservation)
+
+    assert engine._windows[1].totals(now) == (1000, 1, 0)
+
+
+def test_failed_debit_is_released(monkeypatch):
+    engine = VelocityEngine(VelocityRules.from_settings())
+    monkeypatch.setattr(fraud_service, "engine", engine)
+    monkeypatch.setattr(fraud_service.settings, "FRAUD_ENABLED", True)
+
+    with pytest.raises(HTTPException):
+        with fraud_service.reserve_debit(1, Decimal("10"), destination_id=2):
+            raise HTTPException(status_code=400, detail="Insufficient funds.")
+
+    assert engine._windows[1].totals(time.time()) == (0, 0, 0)
@@ -0,0 +1,91 @@
+from dataclasses import replace
+from datetime import datetime, timedelta, timezone
+from decimal import Decimal
+
+import pytest
+from fastapi import HTTPException
+from sqlalchemy import create_engine
+from sqlalchemy.orm import sessionmaker
+from sqlalchemy.pool import StaticPool
+
+from app.core.database import Base
+from app.models.all_models import Account
+from app.models.scheduled_models import ScheduledTransfer
+from app.services import fraud_service, scheduled_transfer_service
+
+RULES = replace(
+    fraud_service.VelocityRules.from_settings(),
+    max_amount=Decimal("1000"),
+    max_count=5,
+    max_new_destinations=2,
+)
+
+
+@pytest.fixture
+def db():
+    engine = create_engine("sqlite://", connect_args={"check_same_thread": False}, poolclass=StaticPool)
+    Base.metadata.create_all(engine)
+    session = sessionmaker(bind=engine)()
+    session.add_all([
+        Account(id=i, user_id=i, number=f"{i:08d}", balance=Decimal("100000"), credit_limit=Decimal("0"))
+        for i in range(1, 6)
+    ])
+    session.commit()
+    yield session
+    session.close()
+    engine.dispose()
+
+
+@pytest.fixture(autouse=True)
+def velocity(monkeypatch):
+    monkeypatch.setattr(fraud_service.settings, "FRAUD_ENABLED", True)
+    engine = fraud_service.VelocityEngine(RULES)
+    engine.learning_since -= RULES.window_seconds  # new-destination rule active from the start
+    monkeypatch.setattr(fraud_service, "engine", engine)
+    return engine
+
+
+def _schedule(db, destination: int, amount: str = "10"):
+    return scheduled_transfer_service.create(
+        db, account_id=1, destination_account=f"{destination:08d}", amount=Decimal(amount),
+        run_at=datetime.now(timezone.utc) + timedelta(minutes=1),
+    )
+
+
+def _orders(db) -> int:
+    return db.query(ScheduledTransfer).filter(ScheduledTransfer.account_id == 1).count()
+
+
+def test_burst_of_orders_above_count_limit_is_rejected(db):
+    for _ in range(RULES.max_count):
+        _schedule(db, destination=2)
+    with pytest.raises(HTTPException) as excinfo:
+        _schedule(db, destination=2)
+    assert excinfo.value.status_code == 403
+    assert _orders(db) == RULES.max_count
+
+
+def test_orders_above_amount_limit_are_rejected(db):
+    _schedule(db, destination=2, amount="600")
+    with pytest.raises(HTTPException) as excinfo:
+        _schedule(db, destination=2, amount="600")
+    assert excinfo.value.status_code == 403
+    assert _orders(db) == 1
+
+
+def test_orders_to_too_many_new_destinations_are_rejected(db):
+    _schedule(db, destination=2)
+    _schedule(db, destination=3)
+    with pytest.raises(HTTPException) as excinfo:
+        _schedule(db, destination=4)
+    assert excinfo.value.status_code == 403
+    assert _orders(db) == 2
+
+
+def test_order_that_fails_validation_does_not_use_the_window(db, velocity):
+    with pytest.raises(HTTPException):
+        scheduled_transfer_service.create(
+            db, account_id=1, destination_account="99999999", amount=Decimal("10"),
+            run_at=datetime.now(timezone.utc) + timedelta(minutes=1),
+        )
+    assert velocity.reserve(1, Decimal("1000"))[0] is None